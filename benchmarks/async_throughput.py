@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Async throughput benchmark for MessageClassifier.
+
+Runs ``aclassify_many`` against ``FakeChatModel`` with an injected per-call
+latency and reports how throughput scales with ``max_concurrency``.
+
+    python benchmarks/async_throughput.py --messages 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+MESSAGES = [
+    "Where is my order #12345?",
+    "I would like a refund for this item",
+    "Your support team was very helpful",
+    "The package still hasn't been delivered",
+    "Can I exchange this for a larger size?",
+]
+
+
+def run(concurrency: int, total: int, latency: float) -> float:
+    llm = FakeChatModel(latency=latency)
+    classifier = MessageClassifier(settings=Settings(max_concurrency=concurrency), llm=llm)
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(total)]
+
+    start = time.perf_counter()
+    asyncio.run(classifier.aclassify_many(messages))
+    elapsed = time.perf_counter() - start
+
+    assert llm.max_in_flight <= concurrency
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200, help="Messages to classify per run")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrency limits to compare")
+    args = parser.parse_args()
+
+    print(f"{'concurrency':>12} {'msgs/s':>10} {'speedup':>8}")
+    baseline = None
+    for concurrency in args.concurrency:
+        throughput = run(concurrency, args.messages, args.latency)
+        baseline = baseline or throughput
+        print(f"{concurrency:>12} {throughput:>10.1f} {throughput / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
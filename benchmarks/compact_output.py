@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Output tokens and latency of the full and the compact output schemas.
+
+Classifies single-turn messages and the turns of several conversations with
+``FakeChatModel``, whose latency grows with the output tokens it generates,
+once with the default schemas (which echo the message and always give
+reasoning) and once with ``COMPACT_OUTPUT_ENABLED``. Reports output tokens and
+latency per call for both.
+
+    python benchmarks/compact_output.py --messages 40 --token-latency 0.01
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+SHORT = ["Where is my order #12345?", "I would like a refund for this item", "Your support team was very helpful"]
+LONG = (
+    "Hi, I ordered a pair of running shoes two weeks ago and the tracking page still says label created. "
+    "I have emailed twice already and nobody has replied, and the courier says they never received the parcel. "
+    "Could you please check what happened to order #12345 and tell me when it will actually be delivered?"
+)
+
+
+async def timed_calls(calls: List[Callable[[], Awaitable[object]]]) -> List[float]:
+    async def timed(call: Callable[[], Awaitable[object]]) -> float:
+        start = time.perf_counter()
+        await call()
+        return time.perf_counter() - start
+
+    return list(await asyncio.gather(*(timed(call) for call in calls)))
+
+
+def run(compact: bool, messages: List[str], conversations: int, turns: int, latency: float, token_latency: float) -> Tuple[float, float, float, float]:
+    """(output tokens per single-turn call, its mean latency, the same for conversational calls)."""
+    settings = Settings(compact_output_enabled=compact, max_concurrency=64)
+    classifier = MessageClassifier(settings=settings, llm=FakeChatModel(latency=latency, output_token_latency=token_latency))
+
+    latencies = asyncio.run(timed_calls([lambda m=m: classifier.aclassify(m) for m in messages]))
+    single = (classifier.token_usage().output_tokens / len(messages), statistics.mean(latencies))
+
+    classifier.usage.reset()
+    states = [classifier.new_conversation() for _ in range(conversations)]
+    latencies = []
+    for turn in range(turns):
+        message = LONG if turn % 3 == 0 else SHORT[turn % len(SHORT)]
+        latencies += asyncio.run(timed_calls([lambda s=s: classifier.aclassify_conversational(message, s) for s in states]))
+    conversational = (classifier.token_usage().output_tokens / len(latencies), statistics.mean(latencies))
+    return single + conversational
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=40, help="Single-turn messages, every other one long")
+    parser.add_argument("--conversations", type=int, default=8, help="Conversations classified in parallel")
+    parser.add_argument("--turns", type=int, default=6, help="Turns per conversation")
+    parser.add_argument("--latency", type=float, default=0.2, help="Injected time to first token in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Injected seconds per output token")
+    args = parser.parse_args()
+
+    messages = [f"{LONG if i % 2 else SHORT[i % len(SHORT)]} ({i})" for i in range(args.messages)]
+    print(f"{'schema':>8} {'single tokens':>14} {'single ms':>10} {'conv tokens':>12} {'conv ms':>9}")
+    for compact in (False, True):
+        single_tokens, single_seconds, conv_tokens, conv_seconds = run(
+            compact, messages, args.conversations, args.turns, args.latency, args.token_latency
+        )
+        print(
+            f"{'compact' if compact else 'full':>8} {single_tokens:>14.1f} {single_seconds * 1000:>10.0f} "
+            f"{conv_tokens:>12.1f} {conv_seconds * 1000:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
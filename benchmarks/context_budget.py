@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Conversational prompt size with and without token-budget mode.
+
+Plays a long synthetic conversation through ``classify_conversational`` on
+``FakeChatModel`` and reports the estimated input tokens of the prompt and the
+time to build it at several points in the conversation.
+
+    python benchmarks/context_budget.py --turns 200 --budget 600
+"""
+
+import argparse
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.tokens import estimate_tokens
+
+MESSAGES = [
+    "Hi, I ordered a pair of running shoes two weeks ago and the tracking page still says label created, can you check order #12345 for me?",
+    "I would like a refund for the jacket in the same order, it arrived with a torn sleeve and I have photos of the damage if you need them.",
+    "Your support team was very helpful last time, but this is the third time I'm writing about the same delayed parcel and I'm getting frustrated.",
+]
+# Every few turns the customer pastes a long email thread.
+PASTED = "Forwarding the courier's reply below. " + "The parcel is held at the regional depot pending address verification. " * 40
+
+
+def run(settings: Settings, turns: int, checkpoints: list) -> dict:
+    classifier = MessageClassifier(settings=settings, llm=FakeChatModel())
+    state = classifier.new_conversation()
+    results = {}
+    for turn in range(1, turns + 1):
+        message = PASTED if turn % 7 == 0 else MESSAGES[turn % len(MESSAGES)]
+        if turn in checkpoints:
+            start = time.perf_counter()
+            prompt = classifier._conversational_prompt_messages(message, state)
+            elapsed = time.perf_counter() - start
+            results[turn] = (sum(estimate_tokens(part.text()) for part in prompt), elapsed)
+        classifier.classify_conversational(message, state)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200, help="Turns in the conversation")
+    parser.add_argument("--budget", type=int, default=600, help="CONTEXT_TOKEN_BUDGET in token-budget mode")
+    parser.add_argument("--context-turns", type=int, default=10, help="CONTEXT_TURNS, the verbatim window in both modes")
+    args = parser.parse_args()
+
+    checkpoints = sorted({1, 5, 8, 15, 50, args.turns})
+    default = run(Settings(context_turns=args.context_turns), args.turns, checkpoints)
+    budgeted = run(Settings(context_turns=args.context_turns, token_budget_enabled=True, context_token_budget=args.budget), args.turns, checkpoints)
+
+    print(f"{'turn':>6} {'default tokens':>15} {'budget tokens':>14} {'budget build us':>16}")
+    for turn in checkpoints:
+        print(f"{turn:>6} {default[turn][0]:>15} {budgeted[turn][0]:>14} {budgeted[turn][1] * 1e6:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
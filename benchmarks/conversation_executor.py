@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Bursty conversational traffic with and without the per-conversation executor.
+
+Many chats each send a burst of turns at once. Without the executor every turn
+calls ``aclassify_conversational`` directly, so turns of the same chat race
+on the session store and the losers are classified again. With
+``ConversationExecutor`` the turns of a chat are queued and classified in
+order while chats run concurrently. With ``--speculative`` the executor also
+pipelines each burst speculatively. Reports wall time, mean turn latency,
+LLM calls, turns that failed after exhausting their retries and, with
+speculation, the hit rate and latency saved.
+
+    python benchmarks/conversation_executor.py --conversations 500 --burst 4 --latency 0.02 --speculative
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Optional, Tuple
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.executor import ConversationExecutor
+from ai_classifier_sample.service.speculation import SpeculationStats
+
+TURNS = ["Where is my order #12345?", "Has the package shipped yet?", "The tracking page has not changed", "Actually, I want a refund"]
+
+
+def run(ordered: bool, speculative: bool, conversations: int, burst: int, latency: float, concurrency: int) -> Tuple[float, float, int, int, Optional[SpeculationStats]]:
+    """(seconds, mean turn latency, LLM calls, failed turns, speculation counters)."""
+    llm = FakeChatModel(latency=latency)
+    settings = Settings(
+        max_concurrency=concurrency, session_max_entries=conversations, speculative_turns_enabled=speculative, speculative_max_turns=burst
+    )
+    classifier = MessageClassifier(settings=settings, llm=llm)
+    executor = ConversationExecutor(classifier, queue_size=burst)
+
+    async def turn(conversation_id: str, message: str) -> float:
+        start = time.perf_counter()
+        if ordered:
+            await executor.classify(conversation_id, message)
+        else:
+            await classifier.aclassify_conversational(message, conversation_id=conversation_id)
+        return time.perf_counter() - start
+
+    async def main():
+        calls = [turn(f"c{i}", TURNS[t % len(TURNS)]) for t in range(burst) for i in range(conversations)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        await executor.drain()
+        latencies = [result for result in results if not isinstance(result, Exception)]
+        return elapsed, statistics.mean(latencies), len(results) - len(latencies)
+
+    elapsed, mean_latency, failed = asyncio.run(main())
+    return elapsed, mean_latency, llm.calls, failed, classifier.speculation_stats() if speculative else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=500, help="Concurrent chats")
+    parser.add_argument("--burst", type=int, default=4, help="Turns each chat sends at once")
+    parser.add_argument("--latency", type=float, default=0.02, help="Injected seconds per LLM call")
+    parser.add_argument("--concurrency", type=int, default=64, help="MAX_CONCURRENCY")
+    parser.add_argument("--speculative", action="store_true", help="Also run the executor with speculative pipelining")
+    args = parser.parse_args()
+
+    turns = args.conversations * args.burst
+    print(f"{turns} turns from {args.conversations} conversations")
+    print(f"{'mode':>12} {'seconds':>8} {'mean ms':>8} {'llm calls':>10} {'failed':>7} {'hit rate':>9} {'saved s':>8}")
+    modes = [("direct", False, False), ("executor", True, False)]
+    if args.speculative:
+        modes.append(("speculative", True, True))
+    for name, ordered, speculative in modes:
+        elapsed, mean_latency, calls, failed, speculation = run(ordered, speculative, args.conversations, args.burst, args.latency, args.concurrency)
+        hit_rate = f"{speculation.hit_rate:.0%}" if speculation else "-"
+        saved = f"{speculation.latency_saved_seconds:.1f}" if speculation else "-"
+        print(f"{name:>12} {elapsed:>8.2f} {mean_latency * 1000:>8.0f} {calls:>10} {failed:>7} {hit_rate:>9} {saved:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark.
+
+Imports a module in a fresh interpreter with ``-X importtime`` several times
+and reports the best cumulative import time, the slowest dependencies and
+whether any of the heavy provider packages were loaded. Exits non-zero when
+the time exceeds ``--budget-ms`` or a heavy package was imported, so it can
+guard against regressions in CI.
+
+    python benchmarks/import_time.py --budget-ms 400
+    python benchmarks/import_time.py --module ai_classifier_sample --budget-ms 50
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Packages that should only load on the first classification, not at import.
+HEAVY_PACKAGES = ["langchain_core", "langchain_aws", "langsmith", "boto3", "botocore", "numpy"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[Dict[str, int], List[str]]:
+    """Import module in a new interpreter; return cumulative microseconds per import and loaded heavy packages."""
+    probe = f"import sys, {module}; print(','.join(p for p in {HEAVY_PACKAGES!r} if p in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=True)
+
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    heavy = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="ai_classifier_sample.service.classifier", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to try; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the import takes longer than this")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    cumulative, heavy = min(runs, key=lambda run: run[0].get(args.module, 0))
+    total_ms = cumulative.get(args.module, 0) / 1000
+
+    print(f"{args.module}: {total_ms:.1f} ms (best of {args.runs})")
+    print(f"\n{'cumulative ms':>14}  import")
+    for name, micros in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[1:args.top + 1]:
+        print(f"{micros / 1000:>14.1f}  {name}")
+    print(f"\nheavy packages loaded: {', '.join(heavy) or 'none'}")
+
+    failed = bool(heavy)
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms exceeds the {args.budget_ms:g} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Distill fake LLM labels into the local classifier and compare the two.
+
+Labels a synthetic message stream with the fake LLM through classify_batch
+while recording the calls, exports the labels from the recording, trains a
+local model on them and evaluates it on held-out messages. Reports the LLM's
+seconds and calls, training time, the local model's microseconds per message
+and its agreement with the LLM.
+
+    python benchmarks/local_model.py --messages 20000 --latency 0.2
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.distill import distill, export_labels
+
+SUBJECTS = ["order", "package", "refund", "return", "exchange", "invoice", "password", "account", "delivery", "parcel", "subscription", "tracking number"]
+TEMPLATES = [
+    "where is my {}", "I need help with my {}", "can you check the {} please", "what happened to the {} from last week",
+    "hi, quick question about the {}", "my {} is wrong", "the {} still has not arrived", "how do I change my {}",
+]
+
+
+def messages(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(TEMPLATES).format(rng.choice(SUBJECTS))} (ref {rng.randrange(10 ** 6)})" for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000, help="Messages labeled by the fake LLM")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected seconds per LLM call")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Share of messages held out for evaluation")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        recording, labels, model = (os.path.join(directory, name) for name in ("calls.rec", "labels.jsonl", "model.bin"))
+        llm = FakeChatModel(latency=args.latency)
+        classifier = MessageClassifier(settings=Settings(record_path=recording), llm=llm)
+        start = time.perf_counter()
+        classifier.classify_batch(messages(args.messages))
+        labeling = time.perf_counter() - start
+        classifier.recorder.close()
+
+        exported = export_labels([recording], labels)
+        start = time.perf_counter()
+        report = distill(labels, model, holdout=args.holdout)
+        training = time.perf_counter() - start
+        size = os.path.getsize(model)
+
+    print(f"llm labeling   {labeling:>8.2f}s for {exported.written} messages in {llm.calls} calls")
+    print(f"distill        {training:>8.2f}s, model {report.model_version} ({size / 2 ** 20:.0f} MiB)")
+    print(f"local model    {report.mean_latency_us:>8.0f}us mean, {report.p99_latency_us:.0f}us p99 per message")
+    print(f"agreement      {report.agreement:>8.1%} on {report.examples} held-out messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro-batching benchmark for the HTTP server.
+
+Sends concurrent ``POST /classify`` requests through the ASGI app (no network)
+backed by ``FakeChatModel`` and compares throughput, latency and LLM calls
+across batching windows. A window of 0 disables batching.
+
+    python benchmarks/micro_batching.py --requests 500 --clients 64 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.server import create_app
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+MESSAGES = [
+    "Where is my order #12345?",
+    "I would like a refund for this item",
+    "Your support team was very helpful",
+    "The package still hasn't been delivered",
+    "Can I exchange this for a larger size?",
+]
+
+
+async def post(app, message: str) -> float:
+    body = json.dumps({"message": message}).encode()
+    events = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return events.pop(0)
+
+    async def send(_):
+        pass
+
+    start = time.perf_counter()
+    await app({"type": "http", "method": "POST", "path": "/classify", "headers": []}, receive, send)
+    return time.perf_counter() - start
+
+
+async def run(wait_ms: float, total: int, clients: int, latency: float, concurrency: int):
+    llm = FakeChatModel(latency=latency)
+    settings = Settings(server_batch_max_wait_ms=wait_ms, max_concurrency=concurrency)
+    app = create_app(MessageClassifier(settings=settings, llm=llm))
+    # Unique messages, so the rule fast path and caches never short-circuit the LLM.
+    queue = [f"{MESSAGES[i % len(MESSAGES)]} ({i})" for i in range(total)]
+    latencies = []
+
+    async def client():
+        while queue:
+            latencies.append(await post(app, queue.pop()))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return total / elapsed, statistics.median(latencies), p95, llm.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests to send per run")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="MAX_CONCURRENCY, the in-flight LLM call limit")
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[0, 2, 5, 10], help="Batching windows to compare")
+    args = parser.parse_args()
+
+    print(f"{'wait ms':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'LLM calls':>10}")
+    for wait_ms in args.wait_ms:
+        throughput, p50, p95, calls = asyncio.run(run(wait_ms, args.requests, args.clients, args.latency, args.concurrency))
+        print(f"{wait_ms:>8g} {throughput:>8.1f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {calls:>10}")
+
+
+if __name__ == "__main__":
+    main()
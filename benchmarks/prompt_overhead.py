@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of prompt construction, before and after the prompt registry.
+
+"per-call" rebuilds ChatPromptTemplate and the structured-output runnable on
+every request, as MessageClassifier used to; "compiled" uses the runnables
+prebuilt by PromptRegistry. FakeChatModel answers instantly, so the numbers
+are pure Python overhead.
+
+    python benchmarks/prompt_overhead.py --iterations 2000
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.prompts import SINGLE_TURN, SINGLE_TURN_PROMPT
+
+MESSAGE = "Where is my order #12345? It was supposed to arrive yesterday."
+
+
+def per_call_messages(message: str):
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(SINGLE_TURN_PROMPT.system_prompt),
+        HumanMessagePromptTemplate.from_template(SINGLE_TURN_PROMPT.human_template)
+    ])
+    return prompt.format_prompt(question=message).to_messages()
+
+
+def time_per_call(func: Callable[[], object], iterations: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    llm = FakeChatModel()
+    classifier = MessageClassifier(settings=Settings(result_cache_enabled=False, similarity_cache_enabled=False), llm=llm)
+    compiled = classifier.prompts[SINGLE_TURN]
+
+    def per_call_classify():
+        structured_llm = llm.with_structured_output(SINGLE_TURN_PROMPT.schema)
+        return structured_llm.invoke(input=per_call_messages(MESSAGE))
+
+    rows = [
+        ("prompt formatting", lambda: per_call_messages(MESSAGE), lambda: compiled.format_messages(question=MESSAGE)),
+        ("runnable construction", lambda: llm.with_structured_output(SINGLE_TURN_PROMPT.schema), lambda: classifier.prompts[SINGLE_TURN].runnable),
+        ("classify end to end", per_call_classify, lambda: classifier.classify(MESSAGE)),
+    ]
+
+    print(f"{'stage':<24} {'per-call us':>12} {'compiled us':>12} {'saved':>8}")
+    for name, before, after in rows:
+        before_us = time_per_call(before, args.iterations)
+        after_us = time_per_call(after, args.iterations)
+        print(f"{name:<24} {before_us:>12.1f} {after_us:>12.1f} {1 - after_us / before_us:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
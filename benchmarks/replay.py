@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Replay lookup benchmark.
+
+Writes a synthetic recording of ``--records`` single-turn calls, then reports
+the time to build its index, the file sizes, the rate of keyed lookups
+through the memory-mapped index, and end-to-end ``classify`` throughput of a
+classifier replaying the recording with ``REPLAY_LATENCY_SCALE=0``.
+
+    python benchmarks/replay.py --records 1000000 --lookups 200000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.prompts import DEFAULT_PROMPTS, SINGLE_TURN
+from ai_classifier_sample.service.recording import Recording, RecordingWriter, index_path, prompt_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200000, help="Calls in the synthetic recording")
+    parser.add_argument("--lookups", type=int, default=100000, help="Random keyed lookups to time")
+    parser.add_argument("--classify", type=int, default=2000, help="Replayed classify calls to time")
+    args = parser.parse_args()
+
+    prompt = DEFAULT_PROMPTS[SINGLE_TURN]
+    schema = prompt.schema.__name__
+    messages = [f"Where is my order #{i}?" for i in range(args.records)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calls.rec")
+        writer = RecordingWriter(path)
+        start = time.perf_counter()
+        for message in messages:
+            writer.append(schema, prompt.format_messages(question=message), {"message": message, "category": "Order Tracking"}, 0.5)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        writer.close()  # writes the index
+        index_seconds = time.perf_counter() - start
+
+        recording = Recording(path)
+        keys = [prompt_key(schema, [SystemMessage(content=prompt.system_prompt), HumanMessage(content=prompt.human_template.format(question=message))])
+                for message in random.sample(messages, min(args.lookups, len(messages)))]
+        start = time.perf_counter()
+        for key in keys:
+            assert recording.lookup(key) is not None
+        lookup_seconds = time.perf_counter() - start
+
+        classifier = MessageClassifier(settings=Settings(replay_path=path, replay_latency_scale=0))
+        sample = random.sample(messages, min(args.classify, len(messages)))
+        start = time.perf_counter()
+        for message in sample:
+            classifier.classify(message)
+        classify_seconds = time.perf_counter() - start
+
+        print(f"records:           {args.records}")
+        print(f"recording size:    {os.path.getsize(path) / 1e6:.1f} MB, index {os.path.getsize(index_path(path)) / 1e6:.1f} MB")
+        print(f"append:            {args.records / write_seconds:,.0f} records/s")
+        print(f"index build:       {index_seconds:.2f} s")
+        print(f"indexed lookups:   {len(keys) / lookup_seconds:,.0f} /s")
+        print(f"replayed classify: {len(sample) / classify_seconds:,.0f} /s")
+        recording.close()
+
+
+if __name__ == "__main__":
+    main()
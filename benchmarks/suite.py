@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite with regression thresholds.
+
+Runs every classification path of ``MessageClassifier`` against a seeded
+``FakeChatModel`` with a latency distribution, an injected transient error
+rate and canned structured outputs, so no network or credentials are needed:
+
+- ``classify``: sequential single-turn calls
+- ``aclassify``: concurrent single-turn calls
+- ``classify_batch`` / ``aclassify_batch``: batched calls, one LLM call per batch
+- ``classify_conversational``: every turn of one long conversation
+- ``aclassify_conversational``: several long conversations in parallel
+
+Each scenario runs ``--repeat`` times on a fresh classifier and keeps its
+fastest run. It reports throughput (messages per second), p50/p99 latency per
+operation and the LLM calls made. Results are written as JSON. With
+``--baseline`` they are compared against a stored run: the suite exits
+non-zero if throughput drops, or p50/p99 latency rises, by more than
+``--tolerance``, or if a scenario makes a different number of LLM calls.
+Concurrent scenarios are bound by CPU, so record the baseline on the machine
+(or CI runner type) that checks against it.
+
+    python benchmarks/suite.py --output results.json --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --update-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import canned_responder
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+MESSAGES = [
+    "Where is my order #12345?",
+    "I would like a refund for this item",
+    "Your support team was very helpful",
+    "The package still hasn't been delivered",
+    "Can I exchange this for a larger size?",
+]
+
+# Conversational answers are canned; single-turn and batch answers keep echoing the prompt.
+CANNED_OUTPUTS = {
+    "ConversationalClassifierOutput": [
+        {"message": "", "reasoning": "Customer asks about a delivery", "intent_transition": "NEW", "intent": "Order Tracking", "confidence": "HIGH"},
+        {"message": "", "reasoning": "Same delivery", "intent_transition": "CONTINUE", "intent": "Order Tracking", "confidence": "HIGH"},
+        {"message": "", "reasoning": "Customer wants their money back", "intent_transition": "NEW", "intent": "Refund/Exchange", "confidence": "MEDIUM"},
+    ],
+}
+
+# Takes the classifier; returns a result, or a coroutine for async paths.
+Operation = Callable[[MessageClassifier], Any]
+
+# Throughput must not drop, and latency must not rise, by more than the tolerance.
+HIGHER_IS_BETTER = ("throughput",)
+LOWER_IS_BETTER = ("p50_ms", "p99_ms")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def messages(count: int) -> List[str]:
+    # Unique messages, so no cache could answer them.
+    return [f"{MESSAGES[i % len(MESSAGES)]} ({i})" for i in range(count)]
+
+
+def make_classifier(args: argparse.Namespace) -> MessageClassifier:
+    """A classifier on a seeded fake model, with every prompt compiled before timing starts."""
+    llm = FakeChatModel(
+        latency=args.latency,
+        latency_distribution="lognormal",
+        latency_sigma=args.sigma,
+        error_rate=args.error_rate,
+        responder=canned_responder(CANNED_OUTPUTS),
+        seed=args.seed,
+    )
+    settings = Settings(max_concurrency=args.concurrency, batch_max_size=args.batch_size, llm_retry_base_delay=0.001)
+    classifier = MessageClassifier(settings=settings, llm=llm)
+    classifier.classify("warm up")
+    classifier.classify_batch(["warm up"])
+    classifier.classify_conversational("warm up", classifier.new_conversation())
+    # Restarts the seeded sequence, so every run sees the same injected errors and latencies.
+    llm.reset_stats()
+    return classifier
+
+
+def measure(classifier: MessageClassifier, items: int, operations: List[Operation]) -> Dict[str, Any]:
+    """Run operations concurrently on one event loop (sync ones in order) and summarize them."""
+    latencies: List[float] = []
+
+    async def timed(operation: Operation) -> None:
+        began = time.perf_counter()
+        outcome = operation(classifier)
+        if asyncio.iscoroutine(outcome):
+            await outcome
+        latencies.append(time.perf_counter() - began)
+
+    async def run_all() -> None:
+        await asyncio.gather(*(timed(operation) for operation in operations))
+
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    llm: FakeChatModel = classifier.llm  # type: ignore[assignment]
+    return {
+        "items": items,
+        "operations": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput": round(items / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "llm_calls": llm.calls,
+        "llm_errors": llm.errors,
+    }
+
+
+async def play_conversation(classifier: MessageClassifier, turns: List[str]) -> None:
+    state = classifier.new_conversation()
+    for message in turns:
+        await classifier.aclassify_conversational(message, state)
+
+
+def scenarios(args: argparse.Namespace) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    single = messages(args.messages)
+    batches = [single[i:i + args.batch_size] for i in range(0, len(single), args.batch_size)]
+    turns = [MESSAGES[turn % len(MESSAGES)] for turn in range(args.turns)]
+
+    def classify_conversational() -> Dict[str, Any]:
+        classifier = make_classifier(args)
+        state = classifier.new_conversation()
+        return measure(classifier, len(turns), [lambda c, m=m: c.classify_conversational(m, state) for m in turns])
+
+    return {
+        "classify": lambda: measure(make_classifier(args), len(single), [lambda c, m=m: c.classify(m) for m in single]),
+        "aclassify": lambda: measure(make_classifier(args), len(single), [lambda c, m=m: c.aclassify(m) for m in single]),
+        "classify_batch": lambda: measure(make_classifier(args), len(single), [lambda c, b=b: c.classify_batch(b) for b in batches]),
+        "aclassify_batch": lambda: measure(make_classifier(args), len(single), [lambda c, b=b: c.aclassify_batch(b) for b in batches]),
+        "classify_conversational": classify_conversational,
+        "aclassify_conversational": lambda: measure(
+            make_classifier(args), len(turns) * args.conversations,
+            [lambda c: play_conversation(c, turns) for _ in range(args.conversations)],
+        ),
+    }
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Run each scenario args.repeat times and keep its fastest run."""
+    return {
+        name: max((run() for _ in range(args.repeat)), key=lambda scenario: scenario["throughput"])
+        for name, run in scenarios(args).items()
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of results against baseline, as readable lines."""
+    if results["config"] != baseline["config"]:
+        return [f"baseline was recorded with different parameters: {baseline['config']}"]
+
+    regressions = []
+    for name, expected in baseline["scenarios"].items():
+        actual = results["scenarios"].get(name)
+        if actual is None:
+            regressions.append(f"{name}: scenario missing")
+            continue
+        for metric in HIGHER_IS_BETTER:
+            if actual[metric] < expected[metric] * (1 - tolerance):
+                regressions.append(f"{name}: {metric} {actual[metric]} < baseline {expected[metric]}")
+        for metric in LOWER_IS_BETTER:
+            if actual[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {actual[metric]} > baseline {expected[metric]}")
+        if actual["llm_calls"] != expected["llm_calls"]:
+            regressions.append(f"{name}: llm_calls {actual['llm_calls']} != baseline {expected['llm_calls']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200, help="Messages per single-turn and batch scenario")
+    parser.add_argument("--turns", type=int, default=100, help="Turns per conversation")
+    parser.add_argument("--conversations", type=int, default=4, help="Parallel conversations in the async conversational scenario")
+    parser.add_argument("--batch-size", type=int, default=20, help="BATCH_MAX_SIZE, messages per batch call")
+    parser.add_argument("--concurrency", type=int, default=16, help="MAX_CONCURRENCY, the in-flight LLM call limit")
+    parser.add_argument("--latency", type=float, default=0.005, help="Median injected LLM latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Lognormal shape of the injected latency")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of LLM calls failing with a transient error")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for injected latencies and errors")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the fastest counts")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Fail on regressions against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change of throughput and latency")
+    parser.add_argument("--update-baseline", metavar="PATH", help="Write the results to PATH as the new baseline")
+    args = parser.parse_args()
+
+    config = {
+        name: getattr(args, name)
+        for name in (
+            "messages", "turns", "conversations", "batch_size", "concurrency", "latency", "sigma", "error_rate", "seed", "repeat",
+        )
+    }
+    results = {
+        "config": config,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": run_suite(args),
+    }
+
+    print(f"{'scenario':<26} {'items/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'LLM calls':>10} {'errors':>7}")
+    for name, scenario in results["scenarios"].items():
+        print(
+            f"{name:<26} {scenario['throughput']:>9.1f} {scenario['p50_ms']:>8.2f} {scenario['p99_ms']:>8.2f} "
+            f"{scenario['llm_calls']:>10} {scenario['llm_errors']:>7}"
+        )
+
+    for path in filter(None, (args.output, args.update_baseline)):
+        with open(path, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:\n" + "\n".join(f"  {line}" for line in regressions))
+            sys.exit(1)
+        print(f"\nno regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
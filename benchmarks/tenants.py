@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tenant classifier registry under skewed multi-tenant traffic.
+
+Many tenants, spread over a few model and region configurations, send
+requests with Zipf-distributed popularity. Each request gets its tenant's
+classifier from a ``ClassifierRegistry`` and compiles its prompts, so a cold
+tenant pays the full build. Clients and chat models come from the real
+process-wide Bedrock factory (no calls are made). Reports, per registry
+capacity, hit rate, builds, evictions, time spent building, total time, and
+the chat models and compiled prompt sets created. The last two stay at the
+number of distinct configurations however often tenants are evicted.
+
+    python benchmarks/tenants.py --tenants 200 --requests 20000 --capacities 16 64 200
+"""
+
+import argparse
+import random
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers.bedrock import get_client_factory
+from ai_classifier_sample.service.tenants import ClassifierRegistry
+
+MODELS = ["us.anthropic.claude-sonnet-4-20250514-v1:0", "us.anthropic.claude-3-5-haiku-20241022-v1:0"]
+REGIONS = ["us-east-1", "us-west-2"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=200, help="Configured tenants")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests over all tenants")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of tenant popularity")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[16, 64, 200], help="TENANT_MAX_CLASSIFIERS values to compare")
+    args = parser.parse_args()
+
+    tenants = {
+        f"tenant-{i}": {"model_arn": MODELS[i % len(MODELS)], "cloud_region": REGIONS[i // len(MODELS) % len(REGIONS)], "max_tokens": 1000 + i % 3}
+        for i in range(args.tenants)
+    }
+    rng = random.Random(0)
+    names = list(tenants)
+    weights = [1 / (rank + 1) ** args.skew for rank in range(len(names))]
+    traffic = rng.choices(names, weights=weights, k=args.requests)
+    configurations = len({(overrides["model_arn"], overrides["cloud_region"], overrides["max_tokens"]) for overrides in tenants.values()})
+
+    print(f"{args.requests} requests from {args.tenants} tenants over {configurations} client configurations")
+    print(f"{'capacity':>9} {'hit rate':>9} {'builds':>7} {'evictions':>10} {'build s':>8} {'seconds':>8} {'models':>7} {'prompts':>8}")
+    for capacity in args.capacities:
+        get_client_factory().clear()
+        registry = ClassifierRegistry(Settings(cloud_profile=None), tenants, max_classifiers=capacity)
+        start = time.perf_counter()
+        for tenant in traffic:
+            registry.get(tenant).prompts
+        elapsed = time.perf_counter() - start
+
+        stats = registry.stats()
+        build_seconds = sum(tenant.build_seconds for tenant in registry.tenant_stats())
+        hit_rate = 1 - stats.builds / stats.requests
+        models, prompts = len(get_client_factory()._models), len(get_client_factory()._shared)
+        print(f"{capacity:>9} {hit_rate:>9.1%} {stats.builds:>7} {stats.evictions:>10} {build_seconds:>8.2f} {elapsed:>8.2f} {models:>7} {prompts:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Throttling benchmark for the LLM scheduler.
+
+Runs ``aclassify_many`` against a ``FakeChatModel`` that throttles every call
+above ``--capacity`` in flight, once with a fixed concurrency limit and once
+with AIMD adaptive concurrency, and reports throughput, throttles, retries and
+the final concurrency limit.
+
+    python benchmarks/throttling.py --messages 300 --capacity 8 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+
+def run(adaptive: bool, args: argparse.Namespace) -> None:
+    llm = FakeChatModel(latency=args.latency, capacity=args.capacity)
+    settings = Settings(
+        max_concurrency=args.concurrency,
+        adaptive_concurrency_enabled=adaptive,
+        llm_max_retries=50,
+        llm_retry_base_delay=args.latency / 2,
+        llm_retry_max_delay=args.latency * 4,
+    )
+    classifier = MessageClassifier(settings=settings, llm=llm)
+    messages = [f"message {i}" for i in range(args.messages)]
+
+    start = time.perf_counter()
+    asyncio.run(classifier.aclassify_many(messages))
+    elapsed = time.perf_counter() - start
+
+    stats = classifier.scheduler.stats()
+    label = "adaptive" if adaptive else "fixed"
+    print(f"{label:>9} {args.messages / elapsed:>10.1f} {stats.throttles:>10} {stats.retries:>8} {stats.concurrency_limit:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300, help="Messages to classify per run")
+    parser.add_argument("--latency", type=float, default=0.02, help="Injected LLM latency in seconds")
+    parser.add_argument("--capacity", type=int, default=8, help="Calls in flight the fake model accepts before throttling")
+    parser.add_argument("--concurrency", type=int, default=32, help="Initial (and fixed-mode) concurrency limit")
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} {'msgs/s':>10} {'throttles':>10} {'retries':>8} {'limit':>7}")
+    for adaptive in (False, True):
+        run(adaptive, args)
+
+
+if __name__ == "__main__":
+    main()
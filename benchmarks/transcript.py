@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+LLM calls, tokens and wall time of labeling stored transcripts.
+
+Labels the same transcripts with ``FakeChatModel`` once turn by turn through
+``classify_conversational`` and once through ``classify_transcript``, and
+checks that both leave the same conversation state. Reports LLM calls, input
+and output tokens and seconds for both.
+
+    python benchmarks/transcript.py --transcripts 10 --turns 60 --window 40
+"""
+
+import argparse
+import time
+from typing import List, Tuple
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+TURNS = [
+    "Where is my order #12345?",
+    "It was supposed to arrive on Monday",
+    "The tracking page has not changed in a week",
+    "Actually, I just want a refund",
+    "How long does the refund take?",
+    "Thanks, your support team was very helpful",
+]
+
+
+def run(transcript_mode: bool, transcripts: List[List[str]], window: int, latency: float) -> Tuple[int, int, int, float, list]:
+    """(LLM calls, input tokens, output tokens, seconds, final state of each transcript)."""
+    llm = FakeChatModel(latency=latency)
+    classifier = MessageClassifier(settings=Settings(transcript_window_turns=window), llm=llm)
+    states = []
+    start = time.perf_counter()
+    for turns in transcripts:
+        if transcript_mode:
+            _, state = classifier.classify_transcript(turns)
+        else:
+            state = classifier.new_conversation()
+            for turn in turns:
+                classifier.classify_conversational(turn, state)
+        states.append((state.current_intent, state.resolved_intents, [item.intent for item in state.conversation_history]))
+    elapsed = time.perf_counter() - start
+    usage = classifier.token_usage()
+    return llm.calls, usage.input_tokens, usage.output_tokens, elapsed, states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcripts", type=int, default=10, help="Transcripts to label")
+    parser.add_argument("--turns", type=int, default=60, help="Turns per transcript")
+    parser.add_argument("--window", type=int, default=40, help="TRANSCRIPT_WINDOW_TURNS")
+    parser.add_argument("--latency", type=float, default=0.02, help="Injected seconds per LLM call")
+    args = parser.parse_args()
+
+    transcripts = [[f"{TURNS[(turn + offset) % len(TURNS)]} ({turn})" for turn in range(args.turns)] for offset in range(args.transcripts)]
+    print(f"{'mode':>12} {'llm calls':>10} {'input tokens':>13} {'output tokens':>14} {'seconds':>8}")
+    results = {}
+    for transcript_mode in (False, True):
+        calls, input_tokens, output_tokens, elapsed, states = run(transcript_mode, transcripts, args.window, args.latency)
+        results[transcript_mode] = states
+        mode = "transcript" if transcript_mode else "turn-by-turn"
+        print(f"{mode:>12} {calls:>10} {input_tokens:>13} {output_tokens:>14} {elapsed:>8.2f}")
+    print(f"same final states: {results[False] == results[True]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,30 @@
-# AI Classifier Sample Package
\ No newline at end of file
+# AI Classifier Sample Package
+from importlib import import_module
+from typing import Any
+
+__version__ = "1.0.0"
+
+# The package import stays lightweight: the classifier and its dependencies load on first access.
+_EXPORTS = {
+    "ClassifierRegistry": "ai_classifier_sample.service.tenants",
+    "ConversationState": "ai_classifier_sample.service.conversation",
+    "MessageClassifier": "ai_classifier_sample.service.classifier",
+    "Settings": "ai_classifier_sample.config.settings",
+    "get_settings": "ai_classifier_sample.config.settings",
+}
+
+__all__ = [
+    "ClassifierRegistry",
+    "ConversationState",
+    "MessageClassifier",
+    "Settings",
+    "get_settings"
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,69 @@
+"""
+Command-line bulk classification.
+
+    ai-classifier-bulk tickets.jsonl -o results.jsonl --concurrency 32
+    ai-classifier-bulk tickets.csv -o results.jsonl --text-field body --id-field ticket_id
+
+Rows stream from the input and results are written to a JSONL file in input
+order. Re-running the same command after a crash resumes from the last
+checkpoint; pass --no-resume to start over.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+from ai_classifier_sample.config.settings import get_settings
+from ai_classifier_sample.service.bulk import BulkClassifier, BulkStats
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+
+def _report(stats: BulkStats, final: bool = False) -> None:
+    label = "done" if final else "progress"
+    print(
+        f"[{label}] rows={stats.rows} skipped={stats.skipped} errors={stats.errors} "
+        f"rows/s={stats.rows_per_second:.1f} p50={stats.p50_seconds * 1000:.0f}ms p95={stats.p95_seconds * 1000:.0f}ms",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="ai-classifier-bulk", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL or CSV file to classify")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write results to")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the file extension)")
+    parser.add_argument("--text-field", default="message", help="Field holding the message text")
+    parser.add_argument("--id-field", help="Field copied to each result as its id (default: the row number)")
+    parser.add_argument("--concurrency", type=int, default=settings.max_concurrency, help="Requests in flight at once")
+    parser.add_argument("--checkpoint-every", type=int, default=500, help="Rows between checkpoints")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint and start from the first row")
+    args = parser.parse_args(argv)
+
+    classifier = MessageClassifier(settings=settings.model_copy(update={"max_concurrency": args.concurrency}))
+    try:
+        bulk = BulkClassifier(
+            classifier,
+            concurrency=args.concurrency,
+            checkpoint_every=args.checkpoint_every,
+            progress=_report,
+            progress_interval=args.progress_interval,
+        )
+        stats = asyncio.run(bulk.run(
+            args.input,
+            args.output,
+            input_format=args.format,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            resume=not args.no_resume,
+        ))
+    finally:
+        classifier.close()
+    _report(stats, final=True)
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,24 @@
 from functools import lru_cache
-from typing import Optional
+from typing import List, Literal, Optional
 
 from dotenv import load_dotenv
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class Endpoint(BaseModel):
+    """One region and model that requests can be routed to."""
+
+    region: str = Field(..., description="Cloud provider region of the endpoint")
+    model_arn: str = Field(..., description="AI model ARN or identifier served in that region")
+    weight: float = Field(default=1.0, gt=0, description="Relative share of traffic the endpoint can take")
+    name: Optional[str] = Field(default=None, description="Label used in metrics (defaults to region and model)")
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.region}/{self.model_arn.rsplit('/', 1)[-1]}"
+
+
 class Settings(BaseSettings):
     """Application settings for AI classification service."""
     
@@ -40,7 +53,414 @@ class Settings(BaseSettings):
     
     provider: str = Field(
         default="aws",
-        description="AI service provider type"
+        description="AI service provider type ('local' answers single-turn and batch classification from LOCAL_MODEL_PATH)"
+    )
+    
+    # Endpoint Routing Configuration
+    endpoints: List[Endpoint] = Field(
+        default_factory=list,
+        description="Endpoints to spread requests across, as a JSON list (empty uses cloud_region and model_arn)"
+    )
+    
+    router_strategy: Literal["least_outstanding", "ewma"] = Field(
+        default="least_outstanding",
+        description="How the router picks an endpoint: fewest requests in flight, or lowest EWMA latency under load"
+    )
+    
+    router_ewma_alpha: float = Field(
+        default=0.3,
+        gt=0,
+        le=1,
+        description="Weight of the newest latency sample in each endpoint's moving average"
+    )
+    
+    circuit_failure_threshold: int = Field(
+        default=5,
+        ge=1,
+        description="Consecutive failed calls after which an endpoint is ejected"
+    )
+    
+    circuit_reset_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds an ejected endpoint rests before one trial call is let through"
+    )
+    
+    # Token Budget Configuration
+    context_turns: int = Field(
+        default=5,
+        ge=1,
+        description="Most recent turns sent verbatim to the conversational prompt"
+    )
+    
+    token_budget_enabled: bool = Field(
+        default=False,
+        description="Fit conversational context into a token budget and cap output tokens per call type"
+    )
+    
+    context_token_budget: int = Field(
+        default=1000,
+        ge=50,
+        description="Estimated input tokens allowed for conversation context in token-budget mode"
+    )
+    
+    free_text_output_tokens: int = Field(
+        default=200,
+        ge=16,
+        description="Output tokens allowed per free-text schema field when output limits are derived from the schema"
+    )
+    
+    # Prompt Caching Configuration
+    prompt_caching_enabled: bool = Field(
+        default=False,
+        description="Mark the static system prompts as a Bedrock prompt-cache prefix"
+    )
+    
+    prompt_cache_min_tokens: int = Field(
+        default=1024,
+        ge=0,
+        description="Estimated tokens a system prompt and its tool schema need before they get a cache point; Bedrock does not cache shorter prefixes (1,024 for most Claude models, 2,048 for Haiku)"
+    )
+    
+    # Output Schema Configuration
+    compact_output_enabled: bool = Field(
+        default=False,
+        description="Ask the model only for enum-constrained fields, with optional reasoning, and rebuild full outputs from the input"
+    )
+    
+    # Bedrock Client Configuration
+    bedrock_max_pool_connections: int = Field(
+        default=50,
+        ge=1,
+        description="HTTP connections each shared Bedrock client keeps in its pool"
+    )
+    
+    bedrock_connect_timeout: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds to wait for a connection to Bedrock"
+    )
+    
+    bedrock_read_timeout: float = Field(
+        default=60.0,
+        gt=0,
+        description="Seconds to wait for a Bedrock response"
+    )
+    
+    bedrock_tcp_keepalive: bool = Field(
+        default=True,
+        description="Enable TCP keep-alive on pooled Bedrock connections"
+    )
+    
+    bedrock_max_attempts: int = Field(
+        default=3,
+        ge=1,
+        description="Attempts per Bedrock request, including the first, made by the AWS SDK; only used with LLM_MAX_RETRIES=0 and adaptive concurrency off, since otherwise the LLM scheduler retries and the SDK makes one attempt"
+    )
+    
+    # Throughput Configuration
+    max_concurrency: int = Field(
+        default=16,
+        ge=1,
+        description="LLM calls kept in flight per classifier, sync and async alike; the starting limit when adaptive concurrency is enabled, and the default --concurrency of ai-classifier-bulk"
+    )
+    
+    adaptive_concurrency_enabled: bool = Field(
+        default=False,
+        description="Adjust the concurrency limit with AIMD: grow on success, shrink on throttling"
+    )
+    
+    adaptive_min_concurrency: int = Field(
+        default=1,
+        ge=1,
+        description="Lowest concurrency limit adaptive mode backs off to"
+    )
+    
+    adaptive_max_concurrency: int = Field(
+        default=64,
+        ge=1,
+        description="Highest concurrency limit adaptive mode ramps up to"
+    )
+    
+    adaptive_backoff_ratio: float = Field(
+        default=0.5,
+        gt=0,
+        lt=1,
+        description="Factor the concurrency limit is multiplied by after throttling"
+    )
+    
+    llm_max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="Times a throttled or transiently failing LLM call is retried"
+    )
+    
+    llm_retry_base_delay: float = Field(
+        default=0.2,
+        ge=0,
+        description="Seconds of backoff before the first retry; doubles per retry, with full jitter"
+    )
+    
+    llm_retry_max_delay: float = Field(
+        default=5.0,
+        ge=0,
+        description="Upper bound in seconds on the backoff before a retry"
+    )
+    
+    llm_deadline_seconds: float = Field(
+        default=60.0,
+        ge=0,
+        description="Seconds an LLM call may take including queueing and retries (0 disables the deadline)"
+    )
+    
+    hedging_enabled: bool = Field(
+        default=False,
+        description="Start a second async LLM call when the first runs longer than recent latencies"
+    )
+    
+    hedge_latency_percentile: float = Field(
+        default=0.95,
+        gt=0,
+        lt=1,
+        description="Latency percentile of recent calls after which a call is hedged"
+    )
+    
+    hedge_min_samples: int = Field(
+        default=20,
+        ge=1,
+        description="Successful calls observed before hedging starts"
+    )
+    
+    batch_max_size: int = Field(
+        default=20,
+        ge=1,
+        description="Maximum number of messages packed into one batch classification request"
+    )
+    
+    batch_max_tokens: int = Field(
+        default=4000,
+        ge=1,
+        description="Approximate input token budget for the messages in one batch request"
+    )
+    
+    batch_max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="Times a batch is re-issued for items missing from the model response"
+    )
+    
+    transcript_window_turns: int = Field(
+        default=40,
+        ge=1,
+        description="Maximum number of turns labeled in one classify_transcript call"
+    )
+    
+    transcript_window_tokens: int = Field(
+        default=4000,
+        ge=1,
+        description="Approximate input token budget for the turns in one classify_transcript call"
+    )
+    
+    # Result Cache Configuration
+    result_cache_enabled: bool = Field(
+        default=False,
+        description="Cache single-turn classification results by normalized message"
+    )
+    
+    result_cache_max_entries: int = Field(
+        default=10000,
+        ge=1,
+        description="Maximum number of entries in the in-memory result cache"
+    )
+    
+    result_cache_ttl_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Seconds a cached result stays valid (0 disables expiry)"
+    )
+    
+    result_cache_path: Optional[str] = Field(
+        default=None,
+        description="SQLite file for a persistent result cache tier"
+    )
+    
+    # Similarity Cache Configuration
+    similarity_cache_enabled: bool = Field(
+        default=False,
+        description="Reuse the category of a near-duplicate message seen earlier"
+    )
+    
+    similarity_threshold: float = Field(
+        default=0.9,
+        ge=0,
+        le=1,
+        description="Minimum cosine similarity for a stored message to count as a near-duplicate"
+    )
+    
+    similarity_max_entries: int = Field(
+        default=5000,
+        ge=1,
+        description="Maximum number of messages kept in the similarity index"
+    )
+    
+    similarity_dimensions: int = Field(
+        default=1024,
+        ge=16,
+        description="Width of the hashed n-gram vectors in the similarity index"
+    )
+    
+    similarity_snapshot_path: Optional[str] = Field(
+        default=None,
+        description="File the similarity index is loaded from and periodically saved to"
+    )
+    
+    # Rule Fast Path Configuration
+    rules_enabled: bool = Field(
+        default=False,
+        description="Answer unambiguous messages with local keyword and regex rules before calling the LLM"
+    )
+    
+    rules_path: Optional[str] = Field(
+        default=None,
+        description="JSON rules file (defaults to the bundled config/rules.json)"
+    )
+    
+    rules_min_confidence: float = Field(
+        default=0.9,
+        ge=0,
+        le=1,
+        description="Minimum rule confidence for a message to be served locally"
+    )
+    
+    # Local Model Configuration
+    local_model_path: Optional[str] = Field(
+        default=None,
+        description="Weight file of the distilled local classifier served when provider is 'local'"
+    )
+    
+    local_min_confidence: float = Field(
+        default=0.0,
+        ge=0,
+        le=1,
+        description="Minimum local model probability to answer without the LLM (0 answers every message locally)"
+    )
+    
+    # Conversation Session Configuration
+    session_store: Literal["memory", "sqlite"] = Field(
+        default="memory",
+        description="Backend for conversation sessions keyed by conversation id"
+    )
+    
+    session_store_path: Optional[str] = Field(
+        default=None,
+        description="SQLite file for the shared session store"
+    )
+    
+    session_ttl_seconds: float = Field(
+        default=1800.0,
+        ge=0,
+        description="Seconds a conversation session may stay idle before it expires (0 disables expiry)"
+    )
+    
+    session_max_entries: int = Field(
+        default=10000,
+        ge=1,
+        description="Maximum number of sessions kept by the in-process store"
+    )
+    
+    session_max_retries: int = Field(
+        default=3,
+        ge=0,
+        description="Times a turn is re-classified after a concurrent update to the same conversation"
+    )
+    
+    # Conversation Executor Configuration
+    conversation_queue_size: int = Field(
+        default=16,
+        ge=1,
+        description="Turns of one conversation the server queues while an earlier turn is being classified"
+    )
+    
+    conversation_queue_timeout: float = Field(
+        default=5.0,
+        ge=0,
+        description="Seconds a turn waits for room in a full conversation queue before it is refused (0 refuses at once)"
+    )
+    
+    conversation_idle_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds a conversation's worker waits for another turn before it stops"
+    )
+    
+    # Speculative Pipelining Configuration
+    speculative_turns_enabled: bool = Field(
+        default=False,
+        description="Send queued turns of a conversation before the turn ahead is classified, assuming it continues the current intent"
+    )
+    
+    speculative_max_turns: int = Field(
+        default=4,
+        ge=1,
+        description="Turns of one conversation in flight at once when speculating"
+    )
+    
+    # Instrumentation Configuration
+    metrics_enabled: bool = Field(
+        default=False,
+        description="Record per-stage latency histograms, token counts and error counters in a metrics registry"
+    )
+    
+    # Record/Replay Configuration
+    record_path: Optional[str] = Field(
+        default=None,
+        description="Append every LLM prompt and structured response, with its latency, to this recording file"
+    )
+    
+    replay_path: Optional[str] = Field(
+        default=None,
+        description="Answer LLM calls from this recording instead of Bedrock, without network access"
+    )
+    
+    replay_latency_scale: float = Field(
+        default=1.0,
+        ge=0,
+        description="Multiplier for recorded latencies when replaying (0 answers at once)"
+    )
+    
+    # HTTP Server Configuration
+    server_batch_max_size: int = Field(
+        default=20,
+        ge=1,
+        description="Concurrent single-turn requests the server groups into one LLM call"
+    )
+    
+    server_batch_max_wait_ms: float = Field(
+        default=5.0,
+        ge=0,
+        description="Milliseconds the server waits for more requests before sending a batch (0 disables batching)"
+    )
+    
+    # Tenant Registry Configuration
+    tenants_path: Optional[str] = Field(
+        default=None,
+        description="JSON file mapping tenant ids to settings overrides; enables one classifier per tenant"
+    )
+    
+    tenant_max_classifiers: int = Field(
+        default=32,
+        ge=1,
+        description="Tenant classifiers kept at once; the least recently used one is evicted"
+    )
+    
+    tenant_warmup_enabled: bool = Field(
+        default=True,
+        description="Build the tenants' classifiers and compile their prompts at server startup"
+    )
+    
+    tenant_header: str = Field(
+        default="x-tenant-id",
+        description="HTTP header naming the tenant of a request"
     )
 
 
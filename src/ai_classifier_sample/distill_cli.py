@@ -0,0 +1,76 @@
+"""
+Command-line distillation of LLM labels into a local classifier.
+
+    ai-classifier-distill export calls.rec results.jsonl -o labels.jsonl
+    ai-classifier-distill train labels.jsonl -o model.bin --holdout 0.1
+    ai-classifier-distill evaluate model.bin labels.jsonl
+
+``export`` collects labeled messages from recordings (RECORD_PATH) and JSONL
+results, ``train`` fits the model, writes it with a JSON evaluation report on
+the held-out messages, and ``evaluate`` scores an existing model. Serve the
+model with PROVIDER=local and LOCAL_MODEL_PATH.
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from ai_classifier_sample.providers.local import LocalModel
+from ai_classifier_sample.service.distill import EvaluationReport, distill, evaluate, export_labels, load_examples
+
+
+def _print_report(report: EvaluationReport) -> None:
+    print(f"model {report.model_version}: agreement {report.agreement:.1%} on {report.examples} examples, "
+          f"{report.mean_latency_us:.0f}us mean / {report.p99_latency_us:.0f}us p99 per message")
+    for category, detail in report.categories.items():
+        print(f"  {category:<30} precision {detail.precision:.3f} recall {detail.recall:.3f} f1 {detail.f1:.3f} support {detail.support}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="ai-classifier-distill", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Collect LLM-labeled messages into a JSONL file")
+    export.add_argument("sources", nargs="+", help="Recordings or JSONL files with message and category fields")
+    export.add_argument("-o", "--output", required=True, help="JSONL file to write the labels to")
+    export.add_argument("--text-field", default="message", help="Field holding the message text in JSONL sources")
+
+    train = commands.add_parser("train", help="Train a local model on exported labels")
+    train.add_argument("labels", help="JSONL file written by export")
+    train.add_argument("-o", "--output", required=True, help="Weight file to write")
+    train.add_argument("--report", help="JSON evaluation report (default: <output>.report.json)")
+    train.add_argument("--holdout", type=float, default=0.1, help="Share of messages held out for evaluation")
+    train.add_argument("--dimensions", type=int, default=2 ** 18, help="Hashed feature buckets")
+    train.add_argument("--epochs", type=int, default=5, help="Passes over the training messages")
+    train.add_argument("--learning-rate", type=float, default=2.0, help="Initial SGD step size")
+    train.add_argument("--l2", type=float, default=1e-6, help="L2 weight decay per step")
+
+    check = commands.add_parser("evaluate", help="Score a model against LLM labels")
+    check.add_argument("model", help="Weight file to evaluate")
+    check.add_argument("labels", help="JSONL file of LLM labels")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        stats = export_labels(args.sources, args.output, text_field=args.text_field)
+        print(f"read {stats.read} labels, wrote {stats.written} messages, skipped {stats.duplicates} duplicates")
+        return 0 if stats.written else 1
+
+    if args.command == "train":
+        report = distill(
+            args.labels,
+            args.output,
+            holdout=args.holdout,
+            report_path=args.report,
+            dimensions=args.dimensions,
+            epochs=args.epochs,
+            learning_rate=args.learning_rate,
+            l2=args.l2,
+        )
+    else:
+        report = evaluate(LocalModel.load(args.model), load_examples(args.labels))
+    _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,16 @@
-from .conversation import ConversationTurn, ConversationalClassifierOutput
-from .classifier import ClassifierOutput
+from .conversation import ConversationTurn, ConversationalClassifierOutput, CompactConversationalClassifierOutput, TranscriptTurnLabel, TranscriptClassifierOutput
+from .classifier import ClassifierOutput, BatchClassifierItem, BatchClassifierOutput, CompactClassifierOutput, CompactBatchClassifierItem, CompactBatchClassifierOutput
 
 __all__ = [
     "ConversationTurn",
     "ConversationalClassifierOutput", 
-    "ClassifierOutput"
-]
\ No newline at end of file
+    "CompactConversationalClassifierOutput",
+    "TranscriptTurnLabel",
+    "TranscriptClassifierOutput",
+    "ClassifierOutput",
+    "BatchClassifierItem",
+    "BatchClassifierOutput",
+    "CompactClassifierOutput",
+    "CompactBatchClassifierItem",
+    "CompactBatchClassifierOutput"
+]
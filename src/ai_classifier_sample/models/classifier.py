@@ -1,6 +1,37 @@
+from typing import List, Literal
+
 from pydantic import BaseModel, Field
 
+Category = Literal["Support, Feedback, Complaint", "Order Tracking", "Refund/Exchange"]
+
 
 class ClassifierOutput(BaseModel):
     message: str = Field(..., description="The original message that was classified")
-    category: str = Field(..., description="The category of the message: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'")
\ No newline at end of file
+    category: str = Field(..., description="The category of the message: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'")
+
+
+class BatchClassifierItem(BaseModel):
+    index: int = Field(..., description="The index attribute of the <message> tag being classified")
+    category: str = Field(..., description="The category of the message: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'")
+
+
+class BatchClassifierOutput(BaseModel):
+    classifications: List[BatchClassifierItem] = Field(..., description="One classification per message, in the order given")
+
+
+class CompactClassifierOutput(BaseModel):
+    """Model output in compact mode: the category only, without echoing the message."""
+
+    category: Category = Field(..., description="The category of the message")
+
+    def expand(self, message: str) -> ClassifierOutput:
+        return ClassifierOutput(message=message, category=self.category)
+
+
+class CompactBatchClassifierItem(BaseModel):
+    index: int = Field(..., description="The index attribute of the <message> tag being classified")
+    category: Category = Field(..., description="The category of the message")
+
+
+class CompactBatchClassifierOutput(BaseModel):
+    classifications: List[CompactBatchClassifierItem] = Field(..., description="One classification per message, in the order given")
@@ -1,7 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
+from .classifier import Category
+
+IntentTransition = Literal["CONTINUE", "NEW", "CLARIFICATION"]
+Confidence = Literal["HIGH", "MEDIUM", "LOW"]
+
 
 class ConversationTurn(BaseModel):
     message: str = Field(..., description="The message content")
@@ -15,4 +20,34 @@ class ConversationalClassifierOutput(BaseModel):
     reasoning: str = Field(..., description="Reasoning for the classification")
     intent_transition: str = Field(..., description="Whether this is CONTINUE, NEW, or CLARIFICATION")
     intent: str = Field(..., description="The classified intent")
-    confidence: str = Field(..., description="Confidence level: HIGH, MEDIUM, LOW")
\ No newline at end of file
+    confidence: str = Field(..., description="Confidence level: HIGH, MEDIUM, LOW")
+
+
+class CompactConversationalClassifierOutput(BaseModel):
+    """Model output in compact mode: enum fields only, reasoning if the model gives any."""
+
+    intent_transition: IntentTransition = Field(..., description="Whether this is CONTINUE, NEW, or CLARIFICATION")
+    intent: Category = Field(..., description="The classified intent")
+    confidence: Confidence = Field(..., description="Confidence level")
+    reasoning: Optional[str] = Field(None, description="One short sentence, only if the classification is ambiguous")
+
+    def expand(self, message: str) -> ConversationalClassifierOutput:
+        return ConversationalClassifierOutput(
+            message=message,
+            reasoning=self.reasoning or "",
+            intent_transition=self.intent_transition,
+            intent=self.intent,
+            confidence=self.confidence,
+        )
+
+
+class TranscriptTurnLabel(BaseModel):
+    index: int = Field(..., description="The index attribute of the <turn> tag being labeled")
+    intent_transition: IntentTransition = Field(..., description="Whether this turn is CONTINUE, NEW, or CLARIFICATION relative to the intent active before it")
+    intent: Category = Field(..., description="The classified intent of this turn")
+    confidence: Confidence = Field(..., description="Confidence level")
+    reasoning: Optional[str] = Field(None, description="One short sentence, only if the label is ambiguous")
+
+
+class TranscriptClassifierOutput(BaseModel):
+    labels: List[TranscriptTurnLabel] = Field(..., description="One label per turn, in transcript order")
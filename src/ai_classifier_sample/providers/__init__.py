@@ -0,0 +1,25 @@
+from importlib import import_module
+from typing import Any
+
+# Exports are resolved on first access, so importing the package does not pull in langchain.
+_EXPORTS = {
+    "BedrockClientFactory": ".bedrock",
+    "FakeChatModel": ".fake",
+    "ReplayChatModel": ".replay",
+    "get_client_factory": ".bedrock",
+}
+
+__all__ = [
+    "BedrockClientFactory",
+    "FakeChatModel",
+    "ReplayChatModel",
+    "get_client_factory"
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
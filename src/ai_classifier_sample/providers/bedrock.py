@@ -0,0 +1,146 @@
+"""
+Process-wide factory for Bedrock clients and chat models.
+
+Creating a ``ChatBedrockConverse`` normally builds a boto3 session, two
+clients and their connection pools. The factory builds each of those once
+per configuration, on first request, and hands the same objects to every
+``MessageClassifier`` that asks for them. boto3 clients are thread-safe, so
+sharing them across threads and classifiers is fine; boto3 sessions are not,
+so they are only ever created under the factory lock. Objects derived from a
+shared chat model, such as compiled prompts, can be shared the same way
+through ``shared``.
+
+boto3 and langchain_aws are imported on first use, not with this module.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+from ai_classifier_sample.config.settings import Settings
+
+if TYPE_CHECKING:
+    from botocore.config import Config
+    from langchain_aws import ChatBedrockConverse
+
+T = TypeVar("T")
+
+
+def _client_key(settings: Settings) -> Tuple[Hashable, ...]:
+    return (
+        settings.cloud_region,
+        settings.cloud_profile,
+        settings.bedrock_max_pool_connections,
+        settings.bedrock_connect_timeout,
+        settings.bedrock_read_timeout,
+        settings.bedrock_tcp_keepalive,
+        sdk_max_attempts(settings),
+    )
+
+
+def sdk_max_attempts(settings: Settings) -> int:
+    """Attempts the AWS SDK makes per request.
+
+    When the LLM scheduler retries, or adapts its limit to throttling, the SDK
+    makes a single attempt so every throttle reaches the scheduler and retries
+    do not multiply.
+    """
+    if settings.llm_max_retries > 0 or settings.adaptive_concurrency_enabled:
+        return 1
+    return settings.bedrock_max_attempts
+
+
+def client_config(settings: Settings) -> "Config":
+    """botocore configuration for pooled, keep-alive Bedrock connections."""
+    from botocore.config import Config
+
+    return Config(
+        region_name=settings.cloud_region,
+        max_pool_connections=settings.bedrock_max_pool_connections,
+        connect_timeout=settings.bedrock_connect_timeout,
+        read_timeout=settings.bedrock_read_timeout,
+        tcp_keepalive=settings.bedrock_tcp_keepalive,
+        retries={"total_max_attempts": sdk_max_attempts(settings), "mode": "standard"},
+    )
+
+
+class BedrockClientFactory:
+    """Thread-safe cache of Bedrock clients keyed on region, profile and pool settings,
+    and of chat models keyed additionally on the model and its generation settings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[Hashable, ...], Tuple[Any, Any]] = {}
+        self._models: Dict[Tuple[Hashable, ...], "ChatBedrockConverse"] = {}
+        self._shared: Dict[Tuple[Hashable, ...], Any] = {}
+
+    def clients(self, settings: Settings) -> Tuple[Any, Any]:
+        """Return the shared (bedrock-runtime, bedrock) client pair for settings."""
+        key = _client_key(settings)
+        with self._lock:
+            pair = self._clients.get(key)
+            if pair is None:
+                import boto3
+
+                session = boto3.Session(profile_name=settings.cloud_profile, region_name=settings.cloud_region)
+                config = client_config(settings)
+                pair = (session.client("bedrock-runtime", config=config), session.client("bedrock", config=config))
+                self._clients[key] = pair
+            return pair
+
+    @staticmethod
+    def model_key(settings: Settings) -> Tuple[Hashable, ...]:
+        """Key of the chat model for settings; settings with equal keys get the same model."""
+        return _client_key(settings) + (settings.model_arn, settings.provider, settings.max_tokens)
+
+    def chat_model(self, settings: Settings) -> "ChatBedrockConverse":
+        """Return the shared chat model for settings, creating it on first use."""
+        key = self.model_key(settings)
+        with self._lock:
+            model = self._models.get(key)
+        if model is not None:
+            return model
+
+        from langchain_aws import ChatBedrockConverse
+
+        runtime_client, control_client = self.clients(settings)
+        model = ChatBedrockConverse(
+            model=settings.model_arn,
+            max_tokens=settings.max_tokens,
+            # With the local provider, only calls the local model cannot answer reach Bedrock.
+            provider=settings.provider if settings.provider != "local" else "",
+            region_name=settings.cloud_region,
+            temperature=0.0,
+            credentials_profile_name=settings.cloud_profile,
+            client=runtime_client,
+            bedrock_client=control_client,
+        )
+        with self._lock:
+            # Another thread may have built the same model meanwhile; keep the first one.
+            return self._models.setdefault(key, model)
+
+    def shared(self, key: Tuple[Hashable, ...], build: Callable[[], T]) -> T:
+        """Return the object cached under key, calling build() on first use.
+
+        Keys should start with model_key(settings) for objects tied to a chat model.
+        """
+        with self._lock:
+            if key in self._shared:
+                return self._shared[key]
+        value = build()
+        with self._lock:
+            return self._shared.setdefault(key, value)
+
+    def clear(self) -> None:
+        """Forget every cached client, model and shared object; later requests build new ones."""
+        with self._lock:
+            self._clients.clear()
+            self._models.clear()
+            self._shared.clear()
+
+
+_factory = BedrockClientFactory()
+
+
+def get_client_factory() -> BedrockClientFactory:
+    """Get the process-wide client factory."""
+    return _factory
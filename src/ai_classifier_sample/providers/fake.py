@@ -0,0 +1,315 @@
+"""
+Offline chat model used for tests and benchmarks.
+
+``FakeChatModel`` speaks the same tool-calling protocol that
+``ChatBedrockConverse.with_structured_output`` relies on, so the classifier's
+prompt formatting and structured-output parsing run unchanged while the
+network round trip is replaced by an injected latency.
+
+Responses carry estimated ``usage_metadata``. Messages up to a Bedrock
+``cachePoint`` block are reported as a cache write the first time that prefix
+is seen and as a cache read afterwards, like Bedrock prompt caching.
+
+Throttling and latency spikes can be injected to exercise the scheduler:
+calls beyond ``capacity`` in flight, and a random ``throttle_rate`` share of
+calls, fail at once with a ``ThrottlingError``; a ``latency_spike_rate`` share
+of calls take ``latency_spike`` seconds longer.
+
+For benchmarks, ``latency`` can be the median of a ``uniform`` or
+``lognormal`` distribution of width ``latency_sigma``,
+``output_token_latency`` adds decode time per output token, an
+``error_rate`` share of calls fail with a transient ``ConnectionError``, and
+``canned_responder`` answers from fixed structured outputs instead of the
+keyword heuristics. Every random draw comes from one generator seeded with
+``seed``, so a seeded model injects the same sequence of errors and latencies
+on every run.
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Set, Union
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+from ai_classifier_sample.service.scheduler import ThrottlingError
+from ai_classifier_sample.service.tokens import estimate_tokens
+
+Responder = Callable[[List[BaseMessage], Dict[str, Any]], Dict[str, Any]]
+
+_CATEGORY_KEYWORDS = [
+    ("Refund/Exchange", ("refund", "return", "exchange")),
+    ("Order Tracking", ("order", "tracking", "package", "deliver", "shipped")),
+]
+_DEFAULT_CATEGORY = "Support, Feedback, Complaint"
+
+_MESSAGE_PATTERNS = [
+    re.compile(r"<current_message>(.*?)</current_message>", re.DOTALL),
+    re.compile(r"Message: '(.*)'\nCategory:", re.DOTALL),
+]
+_CURRENT_INTENT_PATTERN = re.compile(r"Current Active Intent: (.*)")
+_BATCH_MESSAGE_PATTERN = re.compile(r'<message index="(\d+)">(.*?)</message>', re.DOTALL)
+_TRANSCRIPT_TURN_PATTERN = re.compile(r'<turn index="(\d+)">(.*?)</turn>', re.DOTALL)
+
+
+def keyword_category(text: str) -> str:
+    """Pick a category with a simple keyword match."""
+    lowered = text.lower()
+    for category, keywords in _CATEGORY_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return _DEFAULT_CATEGORY
+
+
+def _last_human_text(messages: List[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.text()
+    return ""
+
+
+def _extract_message(prompt: str) -> str:
+    for pattern in _MESSAGE_PATTERNS:
+        match = pattern.search(prompt)
+        if match:
+            return match.group(1)
+    return prompt
+
+
+def _has_cache_point(message: BaseMessage) -> bool:
+    return isinstance(message.content, list) and any(
+        isinstance(block, dict) and "cachePoint" in block for block in message.content
+    )
+
+
+def default_responder(messages: List[BaseMessage], function: Dict[str, Any]) -> Dict[str, Any]:
+    """Produce deterministic tool arguments for the package's output schemas."""
+    prompt = _last_human_text(messages)
+
+    if function["name"] in ("BatchClassifierOutput", "CompactBatchClassifierOutput"):
+        return {
+            "classifications": [
+                {"index": int(index), "category": keyword_category(text)}
+                for index, text in _BATCH_MESSAGE_PATTERN.findall(prompt)
+            ]
+        }
+
+    if function["name"] == "TranscriptClassifierOutput":
+        # Walk the turns in order, as classifying them one by one would.
+        match = _CURRENT_INTENT_PATTERN.search(prompt)
+        current_intent = match.group(1).strip() if match else "None"
+        labels = []
+        for index, text in _TRANSCRIPT_TURN_PATTERN.findall(prompt):
+            category = keyword_category(text)
+            transition = "CONTINUE" if current_intent == category else "NEW"
+            current_intent = category
+            labels.append({"index": int(index), "intent_transition": transition, "intent": category, "confidence": "HIGH"})
+        return {"labels": labels}
+
+    message = _extract_message(prompt)
+    category = keyword_category(message)
+
+    if function["name"] == "ClassifierOutput":
+        return {"message": message, "category": category}
+
+    if function["name"] == "CompactClassifierOutput":
+        return {"category": category}
+
+    if function["name"] in ("ConversationalClassifierOutput", "CompactConversationalClassifierOutput"):
+        match = _CURRENT_INTENT_PATTERN.search(prompt)
+        current_intent = match.group(1).strip() if match else "None"
+        transition = "CONTINUE" if current_intent == category else "NEW"
+        if function["name"] == "CompactConversationalClassifierOutput":
+            return {"intent_transition": transition, "intent": category, "confidence": "HIGH"}
+        return {
+            "message": message,
+            "reasoning": f"Keyword match for '{category}'",
+            "intent_transition": transition,
+            "intent": category,
+            "confidence": "HIGH",
+        }
+
+    raise ValueError(f"FakeChatModel has no default response for schema '{function['name']}'")
+
+
+def canned_responder(outputs: Mapping[str, Union[Dict[str, Any], Sequence[Dict[str, Any]]]]) -> Responder:
+    """A responder answering each schema with fixed tool arguments.
+
+    outputs maps a schema name to one set of arguments, or to a list that is
+    cycled through call by call. Schemas not in outputs fall back to
+    default_responder.
+    """
+    cycles = {name: list(value) if isinstance(value, (list, tuple)) else [value] for name, value in outputs.items()}
+    counters = {name: 0 for name in cycles}
+    lock = threading.Lock()
+
+    def respond(messages: List[BaseMessage], function: Dict[str, Any]) -> Dict[str, Any]:
+        name = function["name"]
+        if name not in cycles:
+            return default_responder(messages, function)
+        with lock:
+            index = counters[name]
+            counters[name] += 1
+        return dict(cycles[name][index % len(cycles[name])])
+
+    return respond
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model with injected latency and in-flight tracking."""
+
+    latency: float = Field(default=0.0, description="Seconds to wait before answering each call, the median if distributed")
+    latency_distribution: Literal["constant", "uniform", "lognormal"] = Field(
+        default="constant", description="How per-call latency varies around latency"
+    )
+    latency_sigma: float = Field(
+        default=0.0, description="Spread of the distribution: +/- this share of latency if uniform, the shape parameter if lognormal"
+    )
+    responder: Responder = Field(default=default_responder, description="Builds tool arguments for a call")
+    capacity: Optional[int] = Field(default=None, description="Calls in flight above which further calls are throttled")
+    throttle_rate: float = Field(default=0.0, description="Share of calls rejected with a ThrottlingError")
+    latency_spike_rate: float = Field(default=0.0, description="Share of calls delayed by latency_spike")
+    latency_spike: float = Field(default=0.0, description="Extra seconds a spiking call waits")
+    error_rate: float = Field(default=0.0, description="Share of calls failing with a transient ConnectionError")
+    output_token_latency: float = Field(default=0.0, description="Extra seconds per output token, like a model decoding its answer")
+    seed: Optional[int] = Field(default=None, description="Seed for the injected throttles, errors and latencies")
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+    _calls: int = PrivateAttr(default=0)
+    _throttled: int = PrivateAttr(default=0)
+    _errors: int = PrivateAttr(default=0)
+    _in_flight: int = PrivateAttr(default=0)
+    _max_in_flight: int = PrivateAttr(default=0)
+    _cached_prefixes: Set[str] = PrivateAttr(default_factory=set)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def max_in_flight(self) -> int:
+        return self._max_in_flight
+
+    @property
+    def throttled(self) -> int:
+        return self._throttled
+
+    @property
+    def errors(self) -> int:
+        return self._errors
+
+    def reset_stats(self) -> None:
+        """Zero the counters and restart the seeded sequence of injected errors and latencies."""
+        with self._lock:
+            self._rng = random.Random(self.seed)
+            self._calls = 0
+            self._throttled = 0
+            self._errors = 0
+            self._max_in_flight = self._in_flight
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        formatted_tools = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted_tools, tool_choice=tool_choice, **kwargs)
+
+    def _sample_latency(self) -> float:
+        if self.latency_distribution == "uniform" and self.latency_sigma:
+            return self.latency * self._rng.uniform(1.0 - self.latency_sigma, 1.0 + self.latency_sigma)
+        if self.latency_distribution == "lognormal" and self.latency_sigma:
+            return self.latency * self._rng.lognormvariate(0.0, self.latency_sigma)
+        return self.latency
+
+    def _enter(self) -> float:
+        """Count a call and return how long it takes, or raise if it is throttled or fails."""
+        with self._lock:
+            self._calls += 1
+            throttled = (self.capacity is not None and self._in_flight >= self.capacity) or (
+                self.throttle_rate > 0 and self._rng.random() < self.throttle_rate
+            )
+            if throttled:
+                self._throttled += 1
+                raise ThrottlingError("FakeChatModel is over capacity")
+            if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                self._errors += 1
+                raise ConnectionError("FakeChatModel injected a transient error")
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            spike = self.latency_spike_rate > 0 and self._rng.random() < self.latency_spike_rate
+            return max(0.0, self._sample_latency()) + (self.latency_spike if spike else 0.0)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        if not tools:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=""))])
+
+        function = tools[0]["function"]
+        args = self.responder(messages, function)
+        tool_call = {"name": function["name"], "args": args, "id": f"call_{self._calls}", "type": "tool_call"}
+        message = AIMessage(content="", tool_calls=[tool_call], usage_metadata=self._usage(messages, args))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _usage(self, messages: List[BaseMessage], args: Dict[str, Any]) -> Dict[str, Any]:
+        split = next((index + 1 for index, message in enumerate(messages) if _has_cache_point(message)), 0)
+        prefix = "".join(message.text() for message in messages[:split])
+        input_tokens = sum(estimate_tokens(message.text()) for message in messages[split:])
+        output_tokens = estimate_tokens(json.dumps(args))
+
+        cache_read = cache_write = 0
+        if prefix:
+            with self._lock:
+                if prefix in self._cached_prefixes:
+                    cache_read = estimate_tokens(prefix)
+                else:
+                    self._cached_prefixes.add(prefix)
+                    cache_write = estimate_tokens(prefix)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens + cache_read + cache_write,
+            "input_token_details": {"cache_read": cache_read, "cache_creation": cache_write},
+        }
+
+    def _decode_latency(self, result: ChatResult) -> float:
+        usage = getattr(result.generations[0].message, "usage_metadata", None) or {}
+        return self.output_token_latency * usage.get("output_tokens", 0)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        latency = self._enter()
+        try:
+            result = self._respond(messages, **kwargs)
+            latency += self._decode_latency(result)
+            if latency:
+                time.sleep(latency)
+            return result
+        finally:
+            self._exit()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        latency = self._enter()
+        try:
+            result = self._respond(messages, **kwargs)
+            latency += self._decode_latency(result)
+            if latency:
+                await asyncio.sleep(latency)
+            return result
+        finally:
+            self._exit()
@@ -0,0 +1,164 @@
+"""
+Local CPU classifier distilled from LLM labels.
+
+A ``LocalModel`` is a multinomial logistic regression over hashed features:
+word unigrams and bigrams plus character trigrams, hashed with CRC32 into
+``dimensions`` signed buckets and L2-normalized. Scoring a message gathers one
+row of weights per feature, so it costs microseconds and needs no network.
+Models are trained by ``service.distill``.
+
+Weight files are versioned and laid out for memory mapping::
+
+    b"AICLIN1\\n" <header length: u32> <JSON header> <padding to 64 bytes>
+    <weights: float32[dimensions, categories]> <bias: float32[categories]>
+
+The header holds the format version, the model version (a digest of the
+weights), the categories, the feature settings and training metadata.
+``LocalModel.load`` maps the weights read-only instead of reading them, so
+every worker process on a host shares one copy through the page cache.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.models import ClassifierOutput
+
+LOCAL_PROVIDER = "local"
+MAGIC = b"AICLIN1\n"
+FORMAT_VERSION = 1
+
+_HEADER_LENGTH = struct.Struct("<I")
+_ALIGNMENT = 64
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class LocalModelFormatError(ValueError):
+    """A file is not a local model weight file, or is truncated."""
+
+
+def hashed_features(message: str, dimensions: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(bucket indices, L2-normalized signed counts) of the message's hashed features."""
+    words = _TOKEN.findall(message.lower())
+    grams = [f"w:{word}" for word in words]
+    grams += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        grams += [f"c:{padded[start:start + 3]}" for start in range(len(padded) - 2)]
+
+    # A dict beats NumPy for the few dozen features of a message.
+    buckets: Dict[int, float] = {}
+    for gram in grams:
+        # crc32 is stable across processes, unlike hash(), so trained weights stay valid.
+        digest = zlib.crc32(gram.encode("utf-8"))
+        bucket = digest % dimensions
+        buckets[bucket] = buckets.get(bucket, 0.0) + (1.0 if digest & 0x80000000 else -1.0)
+    if not buckets:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    indices = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+    values = np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets))
+    norm = np.sqrt(values @ values)
+    return indices, values / norm if norm else values
+
+
+def model_version(weights: np.ndarray, bias: np.ndarray) -> str:
+    """Digest identifying a model by its float32 weights and bias."""
+    data = np.ascontiguousarray(weights, dtype=np.float32).tobytes() + np.ascontiguousarray(bias, dtype=np.float32).tobytes()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def save_model(path: str, weights: np.ndarray, bias: np.ndarray, categories: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Write a weight file atomically and return its model version."""
+    weights = np.ascontiguousarray(weights, dtype=np.float32)
+    bias = np.ascontiguousarray(bias, dtype=np.float32)
+    if weights.shape[1] != len(categories) or bias.shape != (len(categories),):
+        raise ValueError("weights and bias must have one column per category")
+
+    version = model_version(weights, bias)
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "categories": list(categories),
+        "dimensions": int(weights.shape[0]),
+        "metadata": metadata or {},
+    }).encode()
+    start = len(MAGIC) + _HEADER_LENGTH.size + len(header)
+    padding = -start % _ALIGNMENT
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header + b"\0" * padding)
+        file.write(weights.tobytes())
+        file.write(bias.tobytes())
+    os.replace(temporary, path)
+    return version
+
+
+class LocalModel:
+    """Memory-mapped linear classifier answering single-turn classifications."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, categories: List[str], version: str = "", metadata: Optional[Dict[str, Any]] = None):
+        self.weights = weights
+        self.bias = bias
+        self.categories = list(categories)
+        self.dimensions = int(weights.shape[0])
+        self.version = version
+        self.metadata = metadata or {}
+
+    @classmethod
+    def load(cls, path: str) -> "LocalModel":
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise LocalModelFormatError(f"{path} is not a local model")
+            try:
+                (header_length,) = _HEADER_LENGTH.unpack(file.read(_HEADER_LENGTH.size))
+                header = json.loads(file.read(header_length))
+            except (struct.error, ValueError) as exc:
+                raise LocalModelFormatError(f"{path} has a damaged header") from exc
+        if header.get("format_version") != FORMAT_VERSION:
+            raise LocalModelFormatError(f"{path} has unsupported format version {header.get('format_version')}")
+
+        categories, dimensions = header["categories"], header["dimensions"]
+        start = len(MAGIC) + _HEADER_LENGTH.size + header_length
+        start += -start % _ALIGNMENT
+        expected = start + 4 * (dimensions + 1) * len(categories)
+        if os.path.getsize(path) != expected:
+            raise LocalModelFormatError(f"{path} is truncated")
+
+        # A plain ndarray view of the map indexes faster than the memmap subclass; the map stays open through it.
+        weights = np.asarray(np.memmap(path, dtype=np.float32, mode="r", offset=start, shape=(dimensions, len(categories))))
+        bias = np.array(np.memmap(path, dtype=np.float32, mode="r", offset=start + weights.nbytes, shape=(len(categories),)))
+        return cls(weights, bias, categories, version=header["version"], metadata=header["metadata"])
+
+    def probabilities(self, message: str) -> np.ndarray:
+        """Softmax probability of each category for message."""
+        indices, values = hashed_features(message, self.dimensions)
+        logits = values @ self.weights[indices] + self.bias
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+    def predict(self, message: str) -> Tuple[str, float]:
+        """The most likely category and its probability."""
+        probabilities = self.probabilities(message)
+        best = int(np.argmax(probabilities))
+        return self.categories[best], float(probabilities[best])
+
+    def classify(self, message: str) -> ClassifierOutput:
+        return ClassifierOutput(message=message, category=self.predict(message)[0])
+
+
+def build_local_model(settings: Settings) -> Optional[LocalModel]:
+    """The model at settings.local_model_path when the local provider is selected, else None."""
+    if settings.provider != LOCAL_PROVIDER:
+        return None
+    if not settings.local_model_path:
+        raise ValueError("PROVIDER=local needs LOCAL_MODEL_PATH pointing at a trained model")
+    return LocalModel.load(settings.local_model_path)
@@ -0,0 +1,106 @@
+"""
+Chat model that answers from a recording instead of calling a provider.
+
+``ReplayChatModel`` speaks the same tool-calling protocol as ``FakeChatModel``:
+each call is keyed by its output schema and prompt text (see
+``service.recording.prompt_key``) and answered with the structured response
+recorded for it, after the recorded latency multiplied by ``latency_scale``.
+A prompt that was never recorded raises ``ReplayMissError``. Nothing is sent
+over the network, so recorded production traffic can be replayed as a
+deterministic load test.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+from ai_classifier_sample.service.recording import Recording, prompt_key
+from ai_classifier_sample.service.tokens import estimate_tokens
+
+
+class ReplayMissError(LookupError):
+    """The prompt of a call is not in the recording."""
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serves recorded structured responses keyed by prompt hash, with recorded latencies."""
+
+    path: str = Field(..., description="Recording to answer from")
+    latency_scale: float = Field(default=1.0, ge=0, description="Multiplier for recorded latencies (0 answers at once)")
+
+    _recording: Recording = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._recording = Recording(self.path)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat-model"
+
+    @property
+    def recording(self) -> Recording:
+        return self._recording
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        formatted_tools = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted_tools, tool_choice=tool_choice, **kwargs)
+
+    def _lookup(self, messages: List[BaseMessage], **kwargs: Any) -> Tuple[Optional[Dict[str, Any]], str, float]:
+        """The recorded arguments for this call, its schema name and the seconds to wait."""
+        with self._lock:
+            self._calls += 1
+        tools = kwargs.get("tools") or []
+        if not tools:
+            return None, "", 0.0
+        schema = tools[0]["function"]["name"]
+        found = self._recording.lookup(prompt_key(schema, messages))
+        if found is None:
+            with self._lock:
+                self._misses += 1
+            raise ReplayMissError(f"No recorded response for this {schema} prompt in {self.path}")
+        args, latency = found
+        return args, schema, latency * self.latency_scale
+
+    def _result(self, messages: List[BaseMessage], args: Optional[Dict[str, Any]], schema: str) -> ChatResult:
+        if args is None:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=""))])
+        input_tokens = sum(estimate_tokens(message.text()) for message in messages)
+        output_tokens = estimate_tokens(json.dumps(args))
+        message = AIMessage(
+            content="",
+            tool_calls=[{"name": schema, "args": args, "id": f"call_{self._calls}", "type": "tool_call"}],
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        args, schema, latency = self._lookup(messages, **kwargs)
+        if latency:
+            time.sleep(latency)
+        return self._result(messages, args, schema)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        args, schema, latency = self._lookup(messages, **kwargs)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._result(messages, args, schema)
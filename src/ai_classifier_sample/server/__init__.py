@@ -0,0 +1,6 @@
+from .app import ClassifierApp, create_app
+
+__all__ = [
+    "ClassifierApp",
+    "create_app"
+]
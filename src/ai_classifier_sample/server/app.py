@@ -0,0 +1,347 @@
+"""
+ASGI application serving a MessageClassifier over HTTP.
+
+Endpoints:
+
+- ``POST /classify`` with ``{"message": ...}`` returns a ``ClassifierOutput``.
+  Concurrent requests are grouped by a ``MicroBatcher`` into multi-message
+  LLM calls.
+- ``POST /classify/conversational`` with ``{"message": ..., "conversation_id": ...}``
+  returns a ``ConversationalClassifierOutput``; state lives in the session store.
+  Turns of one conversation are classified in order by a ``ConversationExecutor``;
+  a conversation with too many turns waiting gets 429.
+- ``GET /health`` and ``GET /metrics`` (request, error, batching, conversation executor, speculation, token usage, LLM scheduler and per-endpoint counters).
+- ``GET /metrics/prometheus``: the classifier's metrics registry in the Prometheus
+  text format, when ``METRICS_ENABLED`` is set.
+
+With ``TENANTS_PATH`` set, the classify endpoints pick the tenant named by the
+``TENANT_HEADER`` request header (400 when it is missing, 404 when it is not
+configured) and use that tenant's classifier from a ``ClassifierRegistry``,
+with its own micro-batcher and conversation executor. ``/metrics`` then reports
+the registry and each built tenant, and ``/metrics/prometheus`` labels every
+tenant's metrics with ``tenant``.
+
+The app has no web-framework dependency; run it under any ASGI server, e.g.
+``uvicorn --factory ai_classifier_sample.server:create_app``.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field, ValidationError
+
+from ai_classifier_sample.config.settings import Settings, get_settings
+from ai_classifier_sample.service.batcher import MicroBatcher
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.executor import ConversationBusyError, ConversationExecutor
+from ai_classifier_sample.service.tenants import ClassifierRegistry, UnknownTenantError, build_classifier_registry
+
+logger = logging.getLogger(__name__)
+
+# Larger request bodies are rejected with 413 before they are parsed.
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ClassifyRequest(BaseModel):
+    message: str = Field(..., min_length=1, description="Message to classify")
+
+
+class ConversationalClassifyRequest(BaseModel):
+    message: str = Field(..., min_length=1, description="Latest message in the conversation")
+    conversation_id: str = Field(..., min_length=1, description="Conversation the message belongs to")
+
+
+class PlainText(str):
+    """A response body sent as text/plain instead of JSON."""
+
+    content_type = b"text/plain; version=0.0.4; charset=utf-8"
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, detail: Any, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.headers = headers or []
+
+
+Handler = Callable[[bytes, Dict[str, Any]], Awaitable[Tuple[int, Any]]]
+
+
+def _build_batcher(classifier: MessageClassifier, settings: Settings) -> MicroBatcher:
+    return MicroBatcher(
+        classifier,
+        max_batch_size=settings.server_batch_max_size,
+        max_wait_seconds=settings.server_batch_max_wait_ms / 1000,
+    )
+
+
+def _build_executor(classifier: MessageClassifier, settings: Settings) -> ConversationExecutor:
+    return ConversationExecutor(
+        classifier,
+        queue_size=settings.conversation_queue_size,
+        queue_timeout=settings.conversation_queue_timeout,
+        idle_seconds=settings.conversation_idle_seconds,
+    )
+
+
+class _TenantServing:
+    """A tenant's classifier with the micro-batcher and conversation executor serving it."""
+
+    def __init__(self, classifier: MessageClassifier):
+        self.classifier = classifier
+        # Batching and queue limits follow the tenant's own settings.
+        self.batcher = _build_batcher(classifier, classifier.settings)
+        self.executor = _build_executor(classifier, classifier.settings)
+
+    async def drain(self) -> None:
+        await self.batcher.drain()
+        await self.executor.drain()
+
+
+class ClassifierApp:
+    """ASGI callable wrapping a MessageClassifier, its micro-batcher and its conversation executor.
+
+    The classifier is created on first use (or at lifespan startup) unless one
+    is passed in, so importing and constructing the app stays cheap. With a
+    ClassifierRegistry, each tenant gets its own classifier, batcher and executor.
+    """
+
+    def __init__(self, classifier: Optional[MessageClassifier] = None, settings: Optional[Settings] = None, registry: Optional[ClassifierRegistry] = None):
+        self.settings: Settings = settings or (classifier.settings if classifier is not None else get_settings())
+        self._classifier = classifier
+        self._batcher: Optional[MicroBatcher] = None
+        self._executor: Optional[ConversationExecutor] = None
+
+        self.registry: Optional[ClassifierRegistry] = registry if registry is not None or classifier is not None else build_classifier_registry(self.settings)
+        self._tenants: Dict[str, _TenantServing] = {}
+        # Drains of evicted tenants' queues still running; kept so the tasks are not garbage collected.
+        self._draining: Set["asyncio.Task[None]"] = set()
+        if self.registry is not None:
+            self.registry.add_eviction_listener(self._on_evict)
+
+        self._routes: Dict[str, Dict[str, Handler]] = {
+            "/classify": {"POST": self._classify},
+            "/classify/conversational": {"POST": self._classify_conversational},
+            "/health": {"GET": self._health},
+            "/metrics": {"GET": self._metrics},
+            "/metrics/prometheus": {"GET": self._prometheus_metrics},
+        }
+        self._requests: Dict[str, int] = {path: 0 for path in self._routes}
+        self._errors = 0
+
+    @property
+    def classifier(self) -> MessageClassifier:
+        if self._classifier is None:
+            self._classifier = MessageClassifier(settings=self.settings)
+        return self._classifier
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        if self._batcher is None:
+            self._batcher = _build_batcher(self.classifier, self.settings)
+        return self._batcher
+
+    @property
+    def executor(self) -> ConversationExecutor:
+        if self._executor is None:
+            self._executor = _build_executor(self.classifier, self.settings)
+        return self._executor
+
+    @asynccontextmanager
+    async def _serving(self, scope: Dict[str, Any]) -> AsyncIterator[Tuple[MicroBatcher, ConversationExecutor]]:
+        """The batcher and executor for the request: the app's own, or those of the tenant it names.
+
+        A tenant's classifier is leased for the whole request, so evicting it
+        meanwhile does not close it under the request. Cold tenants are built
+        in a worker thread, not on the event loop.
+        """
+        if self.registry is None:
+            yield self.batcher, self.executor
+            return
+        header = self.settings.tenant_header.lower().encode()
+        tenant = next((value.decode() for name, value in scope.get("headers", []) if name.lower() == header), None)
+        if not tenant:
+            raise HTTPError(400, f"Missing {self.settings.tenant_header} header")
+        try:
+            classifier = self.registry.try_acquire(tenant) or await asyncio.to_thread(self.registry.acquire, tenant)
+        except UnknownTenantError:
+            raise HTTPError(404, f"Unknown tenant {tenant!r}")
+        try:
+            serving = self._tenants.get(tenant)
+            if serving is None or serving.classifier is not classifier:
+                serving = self._tenants[tenant] = _TenantServing(classifier)
+            yield serving.batcher, serving.executor
+        finally:
+            self.registry.release(classifier)
+
+    def _on_evict(self, tenant: str, classifier: MessageClassifier) -> None:
+        serving = self._tenants.get(tenant)
+        if serving is None or serving.classifier is not classifier:
+            return
+        # Requests still using the entry keep their own reference and lease; it just takes no new ones.
+        del self._tenants[tenant]
+        try:
+            task = asyncio.get_running_loop().create_task(serving.drain())
+        except RuntimeError:
+            # Evicted outside the event loop, e.g. during warmup, before it served anything.
+            return
+        self._draining.add(task)
+        task.add_done_callback(self._draining.discard)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            event = await receive()
+            if event["type"] == "lifespan.startup":
+                try:
+                    if self.registry is None:
+                        self.batcher
+                        self.executor
+                    elif self.settings.tenant_warmup_enabled:
+                        await asyncio.to_thread(self.registry.warmup)
+                except Exception as exc:
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif event["type"] == "lifespan.shutdown":
+                if self._batcher is not None:
+                    await self._batcher.drain()
+                if self._executor is not None:
+                    await self._executor.drain()
+                for serving in list(self._tenants.values()):
+                    await serving.drain()
+                if self._draining:
+                    await asyncio.gather(*self._draining)
+                if self.registry is not None:
+                    self.registry.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        headers: List[Tuple[bytes, bytes]] = []
+        path = scope["path"].rstrip("/") or "/"
+        try:
+            methods = self._routes.get(path)
+            if methods is None:
+                raise HTTPError(404, "Not found")
+            handler = methods.get(scope["method"])
+            if handler is None:
+                raise HTTPError(405, "Method not allowed", [(b"allow", ", ".join(methods).encode())])
+            self._requests[path] += 1
+            status, payload = await handler(await self._read_body(receive), scope)
+        except HTTPError as exc:
+            status, payload, headers = exc.status, {"detail": exc.detail}, exc.headers
+        except Exception:
+            logger.exception("Request to %s failed", path)
+            status, payload = 500, {"detail": "Classification failed"}
+
+        if status >= 500:
+            self._errors += 1
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        content_type = payload.content_type if isinstance(payload, PlainText) else b"application/json"
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())] + headers,
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _read_body(receive: Callable) -> bytes:
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            event = await receive()
+            if event["type"] == "http.disconnect":
+                break
+            chunk = event.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not event.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _parse(model: type, body: bytes) -> Any:
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as exc:
+            raise HTTPError(422, json.loads(exc.json(include_url=False)))
+
+    async def _classify(self, body: bytes, scope: Dict[str, Any]) -> Tuple[int, Any]:
+        request: ClassifyRequest = self._parse(ClassifyRequest, body)
+        async with self._serving(scope) as (batcher, _):
+            result = await batcher.classify(request.message)
+        return 200, result.model_dump_json()
+
+    async def _classify_conversational(self, body: bytes, scope: Dict[str, Any]) -> Tuple[int, Any]:
+        request: ConversationalClassifyRequest = self._parse(ConversationalClassifyRequest, body)
+        async with self._serving(scope) as (_, executor):
+            try:
+                result = await executor.classify(request.conversation_id, request.message)
+            except ConversationBusyError as exc:
+                raise HTTPError(429, str(exc), [(b"retry-after", b"1")])
+        return 200, result.model_dump_json()
+
+    async def _health(self, body: bytes, scope: Dict[str, Any]) -> Tuple[int, Any]:
+        return 200, {"status": "ok"}
+
+    @staticmethod
+    def _serving_metrics(classifier: Optional[MessageClassifier], batcher: Optional[MicroBatcher], executor: Optional[ConversationExecutor]) -> Dict[str, Any]:
+        metrics: Dict[str, Any] = {}
+        if batcher is not None:
+            stats = batcher.stats()
+            metrics["batcher"] = {**stats.model_dump(), "average_batch_size": stats.average_batch_size}
+        if executor is not None:
+            metrics["conversations"] = executor.stats().model_dump()
+        if classifier is not None and classifier.result_cache is not None:
+            stats = classifier.result_cache.stats()
+            metrics["result_cache"] = {**stats.model_dump(), "hit_rate": stats.hit_rate}
+        if classifier is not None:
+            usage = classifier.token_usage()
+            metrics["token_usage"] = {**usage.model_dump(), "cache_hit_rate": usage.cache_hit_rate}
+            metrics["scheduler"] = classifier.scheduler.stats().model_dump()
+            if classifier.settings.speculative_turns_enabled:
+                speculation = classifier.speculation_stats()
+                metrics["speculation"] = {**speculation.model_dump(), "hit_rate": speculation.hit_rate}
+        if classifier is not None and classifier.router is not None:
+            metrics["endpoints"] = [stats.model_dump() for stats in classifier.router.stats()]
+        return metrics
+
+    async def _metrics(self, body: bytes, scope: Dict[str, Any]) -> Tuple[int, Any]:
+        metrics: Dict[str, Any] = {"requests": dict(self._requests), "errors": self._errors}
+        if self.registry is None:
+            metrics.update(self._serving_metrics(self._classifier, self._batcher, self._executor))
+            return 200, metrics
+
+        metrics["registry"] = self.registry.stats().model_dump()
+        metrics["tenants"] = {}
+        for stats in self.registry.tenant_stats():
+            tenant = metrics["tenants"][stats.tenant] = stats.model_dump(exclude={"tenant"})
+            serving = self._tenants.get(stats.tenant)
+            if stats.active and serving is not None:
+                tenant.update(self._serving_metrics(serving.classifier, serving.batcher, serving.executor))
+        return 200, metrics
+
+    async def _prometheus_metrics(self, body: bytes, scope: Dict[str, Any]) -> Tuple[int, Any]:
+        if self.registry is not None:
+            return 200, PlainText(self.registry.render_metrics())
+        if self.classifier.metrics is None:
+            raise HTTPError(404, "Metrics are disabled; set METRICS_ENABLED=true")
+        return 200, PlainText(self.classifier.render_metrics())
+
+
+def create_app(classifier: Optional[MessageClassifier] = None, settings: Optional[Settings] = None, registry: Optional[ClassifierRegistry] = None) -> ClassifierApp:
+    """Build the ASGI app; suitable for ``uvicorn --factory``."""
+    return ClassifierApp(classifier=classifier, settings=settings, registry=registry)
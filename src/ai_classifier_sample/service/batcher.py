@@ -0,0 +1,110 @@
+"""
+Dynamic micro-batching of concurrent single-turn requests.
+
+Callers await ``MicroBatcher.classify`` as if each message were classified on
+its own. Behind the scenes, messages arriving within ``max_wait_seconds`` of
+the first waiting one (or until ``max_batch_size`` are waiting) are sent
+together through ``MessageClassifier.aclassify_batch`` and each caller gets
+its own result back. Messages the rules or caches can answer never wait.
+"""
+
+import asyncio
+from typing import List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.models import ClassifierOutput
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+
+class BatcherStats(BaseModel):
+    requests: int = Field(0, description="Messages submitted to the batcher")
+    answered_locally: int = Field(0, description="Messages answered by the rules or caches without waiting")
+    batches: int = Field(0, description="Groups of waiting messages flushed to the classifier")
+    batched_requests: int = Field(0, description="Messages sent in those groups")
+    largest_batch: int = Field(0, description="Size of the largest group flushed so far")
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.batched_requests / self.batches if self.batches else 0.0
+
+
+class MicroBatcher:
+    """Coalesces concurrent classify calls into multi-message LLM calls.
+
+    All calls must come from one event loop. With ``max_wait_seconds=0`` every
+    message goes straight to ``aclassify`` and nothing is batched.
+    """
+
+    def __init__(self, classifier: MessageClassifier, max_batch_size: int = 20, max_wait_seconds: float = 0.005):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: List[Tuple[str, "asyncio.Future[ClassifierOutput]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._stats = BatcherStats()
+
+    async def classify(self, message: str) -> ClassifierOutput:
+        self._stats.requests += 1
+        cached = await self.classifier.alookup(message)
+        if cached is not None:
+            self._stats.answered_locally += 1
+            return cached
+        if self.max_wait_seconds <= 0 or self.max_batch_size <= 1:
+            return await self.classifier.aclassify_output(message, lookup=False)
+
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[ClassifierOutput]" = loop.create_future()
+        self._pending.append((message, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Send every waiting message now instead of at the end of the window."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        self._stats.batches += 1
+        self._stats.batched_requests += len(batch)
+        self._stats.largest_batch = max(self._stats.largest_batch, len(batch))
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Keep a reference so the task is not garbage-collected mid-flight.
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: List[Tuple[str, "asyncio.Future[ClassifierOutput]"]]) -> None:
+        messages = [message for message, _ in batch]
+        try:
+            # classify already asked the rules and caches, so the lookup is not repeated.
+            if len(messages) == 1:
+                # A lone message gains nothing from the batch prompt.
+                results = [await self.classifier.aclassify_output(messages[0], lookup=False)]
+            else:
+                results = await self.classifier.aclassify_batch(messages, lookup=False)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def drain(self) -> None:
+        """Flush waiting messages and wait for every batch in flight to finish."""
+        self.flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def stats(self) -> BatcherStats:
+        return self._stats.model_copy()
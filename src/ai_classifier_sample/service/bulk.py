@@ -0,0 +1,196 @@
+"""
+Streaming bulk classification of JSONL or CSV files.
+
+Input rows are read lazily, classified with a bounded number of requests in
+flight and written to a JSONL output in input order. Every
+``checkpoint_every`` rows the output is flushed and a checkpoint records how
+many rows are done and how long the output is, so a crashed run resumes
+where it stopped: the output is truncated to the last checkpoint and the
+rows before it are skipped without calling the LLM again.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+# Latency percentiles are computed over this many recent rows.
+LATENCY_WINDOW = 10000
+
+
+class Checkpoint(BaseModel):
+    input_path: str = Field(..., description="Input file the checkpoint belongs to")
+    rows_done: int = Field(0, description="Input rows whose results are in the output")
+    output_bytes: int = Field(0, description="Output length after those rows")
+
+
+class BulkStats(BaseModel):
+    rows: int = Field(0, description="Rows classified in this run")
+    errors: int = Field(0, description="Rows whose classification failed")
+    skipped: int = Field(0, description="Rows skipped because an earlier run finished them")
+    elapsed_seconds: float = Field(0.0, description="Wall-clock time of this run")
+    p50_seconds: float = Field(0.0, description="Median per-row latency")
+    p95_seconds: float = Field(0.0, description="95th percentile per-row latency")
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def iter_records(path: str, input_format: str, text_field: str = "message", id_field: Optional[str] = None) -> Iterator[Tuple[Any, str]]:
+    """Yield (id, message) for every row, reading one row at a time.
+
+    Rows without id_field (or all rows, if it is not set) are identified by
+    their zero-based row number.
+    """
+    with open(path, encoding="utf-8", newline="") as handle:
+        if input_format == "csv":
+            rows: Iterator[Dict[str, Any]] = csv.DictReader(handle)
+        else:
+            rows = (json.loads(line) for line in handle if line.strip())
+        for number, row in enumerate(rows):
+            if text_field not in row:
+                raise ValueError(f"Row {number} has no '{text_field}' field")
+            yield (row.get(id_field, number) if id_field else number), row[text_field]
+
+
+def checkpoint_path(output_path: str) -> str:
+    return f"{output_path}.checkpoint"
+
+
+def load_checkpoint(output_path: str) -> Optional[Checkpoint]:
+    try:
+        with open(checkpoint_path(output_path), encoding="utf-8") as handle:
+            return Checkpoint.model_validate_json(handle.read())
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(output_path: str, checkpoint: Checkpoint) -> None:
+    # Write then rename, so a crash mid-write never leaves a torn checkpoint.
+    temporary = f"{checkpoint_path(output_path)}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(checkpoint.model_dump_json())
+    os.replace(temporary, checkpoint_path(output_path))
+
+
+class BulkClassifier:
+    """Classifies a file row by row with bounded concurrency and resumable output."""
+
+    def __init__(
+        self,
+        classifier: MessageClassifier,
+        concurrency: int = 16,
+        checkpoint_every: int = 500,
+        progress: Optional[Callable[[BulkStats], None]] = None,
+        progress_interval: float = 5.0,
+    ):
+        self.classifier = classifier
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.progress = progress
+        self.progress_interval = progress_interval
+
+    async def _classify_row(self, message: str, semaphore: asyncio.Semaphore) -> Tuple[Dict[str, Any], float]:
+        async with semaphore:
+            return await self._timed_classify(message)
+
+    async def _timed_classify(self, message: str) -> Tuple[Dict[str, Any], float]:
+        start = time.perf_counter()
+        try:
+            output = await self.classifier.aclassify_output(message)
+            result: Dict[str, Any] = {"category": output.category}
+        except Exception as exc:
+            result = {"error": f"{type(exc).__name__}: {exc}"}
+        return result, time.perf_counter() - start
+
+    async def run(
+        self,
+        input_path: str,
+        output_path: str,
+        input_format: Optional[str] = None,
+        text_field: str = "message",
+        id_field: Optional[str] = None,
+        resume: bool = True,
+    ) -> BulkStats:
+        checkpoint = load_checkpoint(output_path) if resume else None
+        if checkpoint is None or checkpoint.input_path != os.path.abspath(input_path) or not os.path.exists(output_path):
+            checkpoint = Checkpoint(input_path=os.path.abspath(input_path))
+
+        stats = BulkStats(skipped=checkpoint.rows_done)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        start = last_progress = time.perf_counter()
+
+        def refresh() -> BulkStats:
+            ordered = sorted(latencies)
+            stats.elapsed_seconds = time.perf_counter() - start
+            stats.p50_seconds = _percentile(ordered, 0.5)
+            stats.p95_seconds = _percentile(ordered, 0.95)
+            return stats
+
+        with open(output_path, "r+b" if checkpoint.rows_done else "wb") as output:
+            # Drop rows written after the last checkpoint; they are classified again.
+            output.truncate(checkpoint.output_bytes)
+            output.seek(0, os.SEEK_END)
+
+            # Tasks are awaited in input order; a few times `concurrency` are buffered
+            # so one slow row does not stall the rows behind it.
+            window: Deque[Tuple[Any, str, asyncio.Task]] = deque()
+
+            async def write_head() -> None:
+                nonlocal last_progress
+                row_id, message, task = window.popleft()
+                result, latency = await task
+                output.write((json.dumps({"id": row_id, "message": message, **result}) + "\n").encode("utf-8"))
+                latencies.append(latency)
+                stats.rows += 1
+                stats.errors += "error" in result
+                checkpoint.rows_done += 1
+
+                if checkpoint.rows_done % self.checkpoint_every == 0:
+                    output.flush()
+                    os.fsync(output.fileno())
+                    checkpoint.output_bytes = output.tell()
+                    save_checkpoint(output_path, checkpoint)
+                if self.progress is not None and time.perf_counter() - last_progress >= self.progress_interval:
+                    last_progress = time.perf_counter()
+                    self.progress(refresh())
+
+            records = iter_records(input_path, input_format or detect_format(input_path), text_field, id_field)
+            try:
+                for number, (row_id, message) in enumerate(records):
+                    if number < stats.skipped:
+                        continue
+                    window.append((row_id, message, asyncio.ensure_future(self._classify_row(message, semaphore))))
+                    if len(window) >= self.concurrency * 4:
+                        await write_head()
+                while window:
+                    await write_head()
+            finally:
+                for _, _, task in window:
+                    task.cancel()
+
+            output.flush()
+            os.fsync(output.fileno())
+            checkpoint.output_bytes = output.tell()
+            save_checkpoint(output_path, checkpoint)
+
+        return refresh()
@@ -0,0 +1,251 @@
+"""
+Result caches for single-turn classification.
+
+A cache maps a key derived from the normalized message, the model ARN and
+the prompt version to the category the model returned. ``MemoryResultCache``
+is an LRU with a TTL, ``SQLiteResultCache`` persists across restarts, and
+``TieredResultCache`` puts the first in front of the second.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.config.settings import Settings
+
+
+class CacheStats(BaseModel):
+    hits: int = Field(0, description="Lookups that returned a cached result")
+    misses: int = Field(0, description="Lookups that found nothing usable")
+    evictions: int = Field(0, description="Entries dropped for capacity or expiry")
+    size: int = Field(0, description="Entries currently stored")
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def normalize_message(message: str) -> str:
+    """Lower-case and collapse whitespace so trivially different inputs share a key."""
+    return " ".join(message.lower().split())
+
+
+def prompt_version_hash(*templates: str) -> str:
+    """Short, stable hash of prompt templates, used to invalidate entries when prompts change."""
+    digest = hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()
+    return digest[:12]
+
+
+def make_cache_key(message: str, model_arn: str, prompt_version: str) -> str:
+    raw = "\x00".join((model_arn, prompt_version, normalize_message(message)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache(ABC):
+    """Interface for classification result caches."""
+
+    # Whether calls wait on disk, so async callers run them in a worker thread.
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached category for key, or None."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store the category for key."""
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters."""
+
+    def close(self) -> None:
+        """Release any file or connection the cache holds."""
+
+
+class MemoryResultCache(ResultCache):
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._evictions += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions, size=len(self._entries))
+
+
+class SQLiteResultCache(ResultCache):
+    """Persistent cache in a SQLite file, shareable between worker processes."""
+
+    # Expired and over-capacity rows are pruned once every this many writes.
+    PRUNE_INTERVAL = 256
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 1000000, ttl_seconds: Optional[float] = 7 * 24 * 3600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._writes = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._evictions += 1
+                self._misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else float("inf")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        evicted = self._conn.execute("DELETE FROM results WHERE expires_at < ?", (now,)).rowcount
+        evicted += self._conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._evictions += evicted
+
+    def prune(self) -> None:
+        """Drop expired and over-capacity rows now."""
+        with self._lock:
+            self._prune(time.time())
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions, size=size)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredResultCache(ResultCache):
+    """Memory tier in front of a persistent tier; persistent hits are promoted to memory."""
+
+    def __init__(self, memory: ResultCache, persistent: ResultCache):
+        self.memory = memory
+        self.persistent = persistent
+        self.blocking = memory.blocking or persistent.blocking
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        self.persistent.set(key, value)
+
+    def stats(self) -> CacheStats:
+        memory, persistent = self.memory.stats(), self.persistent.stats()
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=memory.evictions + persistent.evictions,
+                size=persistent.size,
+            )
+
+    def close(self) -> None:
+        self.memory.close()
+        self.persistent.close()
+
+
+def build_result_cache(settings: Settings) -> Optional[ResultCache]:
+    """Build the cache configured in settings, or None when caching is disabled."""
+    if not settings.result_cache_enabled:
+        return None
+
+    memory = MemoryResultCache(
+        max_entries=settings.result_cache_max_entries,
+        ttl_seconds=settings.result_cache_ttl_seconds,
+    )
+    if not settings.result_cache_path:
+        return memory
+
+    persistent = SQLiteResultCache(settings.result_cache_path, ttl_seconds=settings.result_cache_ttl_seconds)
+    return TieredResultCache(memory, persistent)
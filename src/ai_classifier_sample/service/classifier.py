@@ -1,131 +1,815 @@
-from langchain_aws import ChatBedrockConverse
-from langchain_core.messages.base import BaseMessage
-from langchain_core.prompt_values import ChatPromptValue
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+import asyncio
+import threading
+import time
+
 from pydantic import BaseModel
-from typing import Union, List, Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Union, List, Optional, Tuple
 
 from ai_classifier_sample.config.settings import Settings, get_settings
-from ai_classifier_sample.models import ConversationTurn, ConversationalClassifierOutput, ClassifierOutput
-
-
-class ConversationState:
-    def __init__(self):
-        self.current_intent: Optional[str] = None
-        self.conversation_history: List[ConversationTurn] = []
-        self.resolved_intents: List[str] = []
-    
-    def add_turn(self, message: str, speaker: str, intent: Optional[str] = None):
-        turn = ConversationTurn(message=message, speaker=speaker, intent=intent)
-        self.conversation_history.append(turn)
-    
-    def get_recent_context(self, max_turns: int = 5) -> List[ConversationTurn]:
-        return self.conversation_history[-max_turns:] if self.conversation_history else []
-  
+from ai_classifier_sample.models import (
+    BatchClassifierOutput,
+    ClassifierOutput,
+    CompactClassifierOutput,
+    CompactConversationalClassifierOutput,
+    ConversationTurn,
+    ConversationalClassifierOutput,
+    TranscriptClassifierOutput,
+)
+from ai_classifier_sample.service.cache import ResultCache, build_result_cache, make_cache_key
+from ai_classifier_sample.service.conversation import NO_CONTEXT, ConversationState, format_turn
+from ai_classifier_sample.service.instrumentation import (
+    CACHE_LOOKUP,
+    CACHE_STORE,
+    FORMAT_PROMPT,
+    LLM_CALL,
+    LLM_SOURCE,
+    PARSE_OUTPUT,
+    SESSION_LOAD,
+    SESSION_SAVE,
+    STATE_UPDATE,
+    Instrumentation,
+    MetricsHook,
+    build_instrumentation,
+)
+from ai_classifier_sample.service.metrics import MetricFamily, MetricsRegistry, counter, gauge
+from ai_classifier_sample.service.prompts import (
+    BATCH,
+    COMPACT_PROMPTS,
+    CONVERSATIONAL,
+    DEFAULT_PROMPTS,
+    SINGLE_TURN,
+    TRANSCRIPT,
+    PromptRegistry,
+    PromptSpec,
+)
+from ai_classifier_sample.service.recording import RecordingWriter, build_recorder
+from ai_classifier_sample.service.router import EndpointRouter, RoutedEndpoint, build_router
+from ai_classifier_sample.service.rules import RuleClassifier, build_rule_classifier
+from ai_classifier_sample.service.scheduler import LLMScheduler, build_scheduler
+from ai_classifier_sample.service.sessions import ConcurrentModificationError, SessionStore, build_session_store
+from ai_classifier_sample.service.speculation import SpeculationStats, SpeculationTracker
+from ai_classifier_sample.service.tokens import estimate_tokens, schema_output_tokens
+from ai_classifier_sample.service.usage import TokenUsage, UsageTracker
+
+if TYPE_CHECKING:
+    # langchain and numpy are imported when first needed, which keeps this module quick to import.
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages.base import BaseMessage
+    from langchain_core.runnables import Runnable
+    from ai_classifier_sample.providers.local import LocalModel
+    from ai_classifier_sample.service.similarity import SimilarityIndex
+
+
+def _split_batches(messages: List[str], max_size: int, max_tokens: int) -> List[List[int]]:
+    """Group message indices into batches bounded by count and estimated tokens."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, message in enumerate(messages):
+        tokens = estimate_tokens(message)
+        if current and (len(current) >= max_size or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 class MessageClassifier:
-    def __init__(self):
-        settings: Settings = get_settings()
-            
-        self.llm = ChatBedrockConverse(
-            model=settings.model_arn,
-            max_tokens=settings.max_tokens,
-            provider=settings.provider,
-            region_name=settings.cloud_region,
-            temperature=0.0,
-            credentials_profile_name=settings.cloud_profile
+    def __init__(self, settings: Optional[Settings] = None, llm: Optional["BaseChatModel"] = None, result_cache: Optional[ResultCache] = None, similarity_index: Optional["SimilarityIndex"] = None, rules: Optional[RuleClassifier] = None, sessions: Optional[SessionStore] = None, scheduler: Optional[LLMScheduler] = None, router: Optional[EndpointRouter] = None, instrumentation: Optional[Instrumentation] = None, local_model: Optional["LocalModel"] = None):
+        self.settings: Settings = settings or get_settings()
+
+        # Compact prompts ask only for enum fields; full outputs are rebuilt from the input.
+        self.prompt_specs: Dict[str, PromptSpec] = COMPACT_PROMPTS if self.settings.compact_output_enabled else DEFAULT_PROMPTS
+
+        if llm is None and self.settings.replay_path:
+            # Replaying a recording needs no endpoints, clients or network access.
+            from ai_classifier_sample.providers.replay import ReplayChatModel
+
+            llm = ReplayChatModel(path=self.settings.replay_path, latency_scale=self.settings.replay_latency_scale)
+
+        # The chat model and compiled prompts are built on first use; when a model is
+        # passed in, its prompts are compiled right away since it is already loaded.
+        self._llm: Optional["BaseChatModel"] = llm
+        self._prompts: Optional[PromptRegistry] = self._build_prompts(llm) if llm is not None else None
+        self._init_lock = threading.Lock()
+        # Set once the chat model comes from the shared client factory, whose compiled prompts are shared too.
+        self._shared_llm = False
+
+        # With several endpoints configured, each call is routed to one of them and
+        # uses prompts compiled against that endpoint's model. A model passed in wins.
+        self.router: Optional[EndpointRouter] = router if router is not None or llm is not None else build_router(self.settings)
+        self._endpoint_prompts: Dict[str, PromptRegistry] = {}
+
+        self.result_cache: Optional[ResultCache] = result_cache or build_result_cache(self.settings)
+        # Components built here rather than passed in; close() releases their files and connections.
+        self._owned: List[Any] = [self.result_cache] if result_cache is None and self.result_cache is not None else []
+        if similarity_index is None and self.settings.similarity_cache_enabled:
+            from ai_classifier_sample.service.similarity import build_similarity_index
+
+            similarity_index = build_similarity_index(
+                self.settings, namespace=f"{self.settings.model_arn}:{self.single_turn_prompt_version}"
+            )
+            if similarity_index is not None:
+                self._owned.append(similarity_index)
+        self.similarity_index: Optional["SimilarityIndex"] = similarity_index
+        if local_model is None and self.settings.provider == "local":
+            from ai_classifier_sample.providers.local import build_local_model
+
+            local_model = build_local_model(self.settings)
+        # With PROVIDER=local, single-turn and batch messages are answered by the distilled model.
+        self.local_model: Optional["LocalModel"] = local_model
+        self.rules: Optional[RuleClassifier] = rules or build_rule_classifier(self.settings)
+        self.sessions: SessionStore = sessions if sessions is not None else build_session_store(self.settings)
+        if sessions is None:
+            self._owned.append(self.sessions)
+
+        # Per-stage timings and other hot-path events; a no-op unless hooks are registered.
+        self.instrumentation: Instrumentation = instrumentation if instrumentation is not None else build_instrumentation(self.settings)
+
+        # Token usage, including prompt-cache reads and writes, of every LLM call.
+        self.usage = UsageTracker(listener=self.instrumentation.llm_usage)
+
+        # Speculative calls of aclassify_conversational_turns and how many of them were kept.
+        self.speculation = SpeculationTracker()
+
+        # With RECORD_PATH set, every prompt and structured response is appended to a recording for replay.
+        self.recorder: Optional[RecordingWriter] = build_recorder(self.settings)
+        if self.recorder is not None:
+            self._owned.append(self.recorder)
+
+        # Every LLM call runs under the scheduler's concurrency limit, retries and deadline.
+        self.scheduler: LLMScheduler = scheduler if scheduler is not None else build_scheduler(self.settings)
+
+        self.metrics: Optional[MetricsRegistry] = next(
+            (hook.registry for hook in self.instrumentation.hooks if isinstance(hook, MetricsHook)), None
         )
-    
+        if self.metrics is not None:
+            self.metrics.register_collector(self._collect_metrics)
+
+    @property
+    def llm(self) -> "BaseChatModel":
+        if self._llm is None:
+            with self._init_lock:
+                if self._llm is None and self.router is not None:
+                    self._llm = self.router.endpoints[0].llm
+                elif self._llm is None:
+                    # Bedrock clients and chat models are shared by every classifier with the same configuration.
+                    from ai_classifier_sample.providers.bedrock import get_client_factory
+
+                    self._llm = get_client_factory().chat_model(self.settings)
+                    self._shared_llm = True
+        return self._llm
+
+    @property
+    def prompts(self) -> PromptRegistry:
+        """Prompts and their structured-output runnables, compiled once per classifier."""
+        if self._prompts is None:
+            llm = self.llm
+            with self._init_lock:
+                if self._prompts is None and self._shared_llm:
+                    from ai_classifier_sample.providers.bedrock import get_client_factory
+
+                    # Classifiers with the same chat model and prompt settings reuse one compiled registry.
+                    factory = get_client_factory()
+                    key = factory.model_key(self.settings) + ("prompts",) + self._prompt_settings()
+                    self._prompts = factory.shared(key, lambda: self._build_prompts(llm))
+                elif self._prompts is None:
+                    self._prompts = self._build_prompts(llm)
+        return self._prompts
+
+    def _prompt_settings(self) -> Tuple[Hashable, ...]:
+        """The settings _build_prompts depends on besides the chat model."""
+        settings = self.settings
+        return (
+            settings.compact_output_enabled,
+            settings.prompt_caching_enabled,
+            settings.prompt_cache_min_tokens,
+            settings.token_budget_enabled,
+            settings.free_text_output_tokens,
+            settings.transcript_window_turns,
+            settings.batch_max_size,
+        )
+
+    def _build_prompts(self, llm: "BaseChatModel") -> PromptRegistry:
+        caching = {"cache_system_prompts": self.settings.prompt_caching_enabled, "cache_min_tokens": self.settings.prompt_cache_min_tokens}
+        if not self.settings.token_budget_enabled:
+            return PromptRegistry(llm, self.prompt_specs, **caching)
+        # Cap output per call type at what its schema can need; batches at batch_max_size items,
+        # transcripts at transcript_window_turns labels.
+        output_limits = {
+            name: schema_output_tokens(
+                spec.schema,
+                self.settings.free_text_output_tokens,
+                max_items=self.settings.transcript_window_turns if name == TRANSCRIPT else self.settings.batch_max_size,
+            )
+            for name, spec in self.prompt_specs.items()
+        }
+        return PromptRegistry(
+            llm, self.prompt_specs, output_limits=output_limits, output_token_cap=self.settings.max_tokens, **caching
+        )
+
+    def _prompts_for(self, endpoint: RoutedEndpoint) -> PromptRegistry:
+        if endpoint is self.router.endpoints[0]:  # type: ignore[union-attr]
+            return self.prompts
+        prompts = self._endpoint_prompts.get(endpoint.name)
+        if prompts is None:
+            llm = endpoint.llm
+            with self._init_lock:
+                prompts = self._endpoint_prompts.get(endpoint.name)
+                if prompts is None:
+                    prompts = self._endpoint_prompts[endpoint.name] = self._build_prompts(llm)
+        return prompts
+
+    def _runnable_for(self, name: str, echoed_message: str, prompts: Optional[PromptRegistry] = None) -> "Runnable":
+        if self.settings.compact_output_enabled:
+            # Compact schemas never echo the message, so their output limit does not depend on it.
+            return (prompts or self.prompts)[name].runnable
+        # The schema estimate already allows free_text_output_tokens for the echoed message.
+        extra_tokens = estimate_tokens(echoed_message) - self.settings.free_text_output_tokens
+        return (prompts or self.prompts)[name].runnable_for(extra_tokens)
+
+    @property
+    def _run_config(self) -> Dict[str, Any]:
+        return {"callbacks": [self.usage.callback_handler]}
+
+    def _record(self, name: str, messages: List["BaseMessage"], response: Union[dict, BaseModel], seconds: float) -> None:
+        args = response.model_dump(mode="json") if isinstance(response, BaseModel) else response
+        self.recorder.append(self.prompt_specs[name].schema.__name__, messages, args, seconds)  # type: ignore[union-attr]
+
+    def _call_model(self, name: str, runnable: "Runnable", messages: List["BaseMessage"]) -> Union[dict, BaseModel]:
+        """One attempt of an LLM call, recorded if a recorder is configured."""
+        if self.recorder is None:
+            return runnable.invoke(input=messages, config=self._run_config)
+        start = time.perf_counter()
+        response = runnable.invoke(input=messages, config=self._run_config)
+        self._record(name, messages, response, time.perf_counter() - start)
+        return response
+
+    async def _acall_model(self, name: str, runnable: "Runnable", messages: List["BaseMessage"]) -> Union[dict, BaseModel]:
+        if self.recorder is None:
+            return await runnable.ainvoke(input=messages, config=self._run_config)
+        start = time.perf_counter()
+        response = await runnable.ainvoke(input=messages, config=self._run_config)
+        self._record(name, messages, response, time.perf_counter() - start)
+        return response
+
+    def _invoke(self, name: str, messages: List["BaseMessage"], echoed_message: str = "") -> Union[dict, BaseModel]:
+        """Call the model for prompt name through the scheduler and, if configured, the router."""
+        if self.router is None:
+            runnable = self._runnable_for(name, echoed_message)
+            with self.instrumentation.stage(name, LLM_CALL):
+                return self.scheduler.call(lambda: self._call_model(name, runnable, messages))
+
+        def on_endpoint(endpoint: RoutedEndpoint) -> Union[dict, BaseModel]:
+            return self._call_model(name, self._runnable_for(name, echoed_message, self._prompts_for(endpoint)), messages)
+
+        router = self.router
+        with self.instrumentation.stage(name, LLM_CALL):
+            return self.scheduler.call(lambda: router.call(on_endpoint))
+
+    async def _ainvoke(self, name: str, messages: List["BaseMessage"], echoed_message: str = "") -> Union[dict, BaseModel]:
+        if self.router is None:
+            runnable = self._runnable_for(name, echoed_message)
+            with self.instrumentation.stage(name, LLM_CALL):
+                return await self.scheduler.acall(lambda: self._acall_model(name, runnable, messages))
+
+        def on_endpoint(endpoint: RoutedEndpoint) -> Awaitable[Union[dict, BaseModel]]:
+            return self._acall_model(name, self._runnable_for(name, echoed_message, self._prompts_for(endpoint)), messages)
+
+        router = self.router
+        with self.instrumentation.stage(name, LLM_CALL):
+            return await self.scheduler.acall(lambda: router.acall(on_endpoint))
+
+    def _collect_metrics(self) -> List[MetricFamily]:
+        """Scheduler, cache, rule and endpoint counters, read when the metrics registry is scraped."""
+        scheduler = self.scheduler.stats()
+        families = [
+            gauge("ai_classifier_concurrency_limit", "Current limit on LLM calls in flight", scheduler.concurrency_limit),
+            gauge("ai_classifier_llm_in_flight", "LLM calls holding a scheduler slot", scheduler.in_flight),
+            counter("ai_classifier_llm_throttles_total", "LLM attempts rejected with a throttling error", scheduler.throttles),
+            counter("ai_classifier_llm_retries_total", "LLM attempts made after a retryable error", scheduler.retries),
+            counter("ai_classifier_llm_failures_total", "LLM calls that failed after their last attempt", scheduler.failed),
+            counter("ai_classifier_llm_deadline_exceeded_total", "LLM calls that ran out of time", scheduler.deadline_exceeded),
+            counter("ai_classifier_llm_hedges_total", "Hedged LLM attempts started", scheduler.hedges),
+        ]
+        for name, cache in (("result_cache", self.result_cache), ("similarity", self.similarity_index)):
+            if cache is None:
+                continue
+            stats = cache.stats()
+            labels = {"cache": name}
+            families += [
+                counter("ai_classifier_cache_hits_total", "Cache lookups that returned a result", stats.hits, labels),
+                counter("ai_classifier_cache_misses_total", "Cache lookups that found nothing usable", stats.misses, labels),
+                gauge("ai_classifier_cache_entries", "Entries currently cached", stats.size, labels),
+            ]
+        if self.rules is not None:
+            rules = self.rules.stats()
+            families.append(counter("ai_classifier_rules_served_total", "Messages answered by the local rules", rules.served_locally))
+        if self.settings.speculative_turns_enabled:
+            speculation = self.speculation.stats()
+            families += [
+                counter("ai_classifier_speculation_calls_total", "Conversational calls sent on an assumed state", speculation.speculated),
+                counter("ai_classifier_speculation_hits_total", "Speculative results kept", speculation.hits),
+                counter("ai_classifier_speculation_misses_total", "Speculative results discarded and re-sent", speculation.misses),
+                counter("ai_classifier_speculation_saved_seconds_total", "Time saved by kept speculative results", speculation.latency_saved_seconds),
+            ]
+        if self.router is not None:
+            for endpoint in self.router.stats():
+                labels = {"endpoint": endpoint.name}
+                families += [
+                    counter("ai_classifier_endpoint_requests_total", "Calls routed to an endpoint", endpoint.requests, labels),
+                    counter("ai_classifier_endpoint_failures_total", "Calls that failed on an endpoint", endpoint.failures, labels),
+                    gauge("ai_classifier_endpoint_open", "1 while the endpoint's circuit is not closed", float(endpoint.state != "closed"), labels),
+                ]
+        return families
+
+    def render_metrics(self) -> str:
+        """Prometheus text exposition of this classifier's metrics; empty when metrics are disabled."""
+        return self.metrics.render_prometheus() if self.metrics is not None else ""
+
+    def token_usage(self) -> TokenUsage:
+        """Tokens used by this classifier's LLM calls so far, including prompt-cache reads and writes."""
+        return self.usage.stats()
+
+    def speculation_stats(self) -> SpeculationStats:
+        """Speculative conversational calls so far, the share kept and the latency they saved."""
+        return self.speculation.stats()
+
+    def close(self) -> None:
+        """Release the files and connections this classifier opened.
+
+        Closes the result cache and session store it built (SQLite ones hold a
+        connection), writes the similarity snapshot and closes the recording,
+        writing its index. Components passed to the constructor belong to the
+        caller and stay open.
+        """
+        for component in self._owned:
+            component.close()
+
+    def new_conversation(self) -> ConversationState:
+        """A new ConversationState that follows this classifier's token-budget settings."""
+        return ConversationState.from_settings(self.settings)
+
+    @property
+    def single_turn_prompt_version(self) -> str:
+        return self.prompt_specs[SINGLE_TURN].version
+
     @staticmethod
     def _format_conversation_context(conversation_history: List[ConversationTurn]) -> str:
         if not conversation_history:
-            return "No previous conversation"
-        
-        formatted = []
-        for turn in conversation_history:
-            formatted.append(f"{turn.speaker}: {turn.message}")
-        return "\n".join(formatted)
-
-    def classify_conversational(self, current_message: str, conversation_state: ConversationState) -> ConversationalClassifierOutput:
-        """Classify a message within a conversational context"""
-        recent_context = conversation_state.get_recent_context(max_turns=5)
-        context_str = self._format_conversation_context(recent_context)
-        
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessagePromptTemplate.from_template(
-                """You are a conversational customer support intent classifier. Analyze the current message in the context of an ongoing conversation.
-
-Available intents: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'
-
-Determine:
-1. Is this continuing the current active intent or introducing a new one?
-2. What is the specific intent for this message?
-3. How confident are you in this classification?
-
-Intent Transitions:
-- CONTINUE: Following up on the same intent
-- NEW: Introducing a completely new intent  
-- CLARIFICATION: Asking for clarification or providing additional details"""
-            ),
-            HumanMessagePromptTemplate.from_template(
-                """<conversation_context>
-Current Active Intent: {current_intent}
-Recent Conversation:
-{conversation_context}
-</conversation_context>
-
-<current_message>{current_message}</current_message>
-
-Provide your analysis in the following format:
-- Reasoning for your classification
-- Intent transition type (CONTINUE/NEW/CLARIFICATION)
-- The specific intent category
-- Your confidence level (HIGH/MEDIUM/LOW)"""
+            return NO_CONTEXT
+
+        return "\n".join(format_turn(turn) for turn in conversation_history)
+
+    def _conversational_prompt_messages(self, current_message: str, conversation_state: ConversationState) -> List["BaseMessage"]:
+        with self.instrumentation.stage(CONVERSATIONAL, FORMAT_PROMPT):
+            return self.prompts[CONVERSATIONAL].format_messages(
+                current_intent=conversation_state.current_intent or "None",
+                conversation_context=conversation_state.render_context(),
+                current_message=current_message
             )
-        ])
-        
-        formatted_prompt = prompt.format_prompt(
-            current_intent=conversation_state.current_intent or "None",
-            conversation_context=context_str,
-            current_message=current_message
-        )
-        
-        structured_llm = self.llm.with_structured_output(ConversationalClassifierOutput)
-        raw_response = structured_llm.invoke(input=formatted_prompt.to_messages())
-        
-        if isinstance(raw_response, dict):
-            _response = ConversationalClassifierOutput(**raw_response)
-        else:
+
+    def _apply_conversational_response(self, raw_response: Union[dict, BaseModel], current_message: str, conversation_state: ConversationState) -> ConversationalClassifierOutput:
+        with self.instrumentation.stage(CONVERSATIONAL, PARSE_OUTPUT):
+            if isinstance(raw_response, dict):
+                raw_response = self.prompt_specs[CONVERSATIONAL].schema(**raw_response)
+            if isinstance(raw_response, CompactConversationalClassifierOutput):
+                raw_response = raw_response.expand(current_message)
             _response: ConversationalClassifierOutput = raw_response  # type: ignore
-            
+
         # Update conversation state
-        conversation_state.add_turn(current_message, "user", _response.intent)
-        
-        if _response.intent_transition == "NEW":
-            if conversation_state.current_intent:
-                conversation_state.resolved_intents.append(conversation_state.current_intent)
-            conversation_state.current_intent = _response.intent
-        
+        with self.instrumentation.stage(CONVERSATIONAL, STATE_UPDATE):
+            conversation_state.add_turn(current_message, "user", _response.intent)
+
+            if _response.intent_transition == "NEW":
+                conversation_state.resolve_current_intent(_response.intent)
+
         return _response
 
+    def _load_session(self, conversation_id: str) -> Tuple[ConversationState, int]:
+        with self.instrumentation.stage(CONVERSATIONAL, SESSION_LOAD):
+            return self.sessions.load(conversation_id)
+
+    def _save_session(self, conversation_id: str, state: ConversationState, version: int) -> None:
+        with self.instrumentation.stage(CONVERSATIONAL, SESSION_SAVE):
+            self.sessions.save(conversation_id, state, expected_version=version)
+
+    async def _off_loop(self, blocking: bool, function: Callable[..., Any], *args: Any) -> Any:
+        """function(*args), in a worker thread when it blocks on disk so the event loop keeps serving."""
+        if blocking:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    async def _aload_session(self, conversation_id: str) -> Tuple[ConversationState, int]:
+        return await self._off_loop(self.sessions.blocking, self._load_session, conversation_id)
+
+    async def _asave_session(self, conversation_id: str, state: ConversationState, version: int) -> None:
+        await self._off_loop(self.sessions.blocking, self._save_session, conversation_id, state, version)
+
+    def classify_conversational(self, current_message: str, conversation_state: Optional[ConversationState] = None, conversation_id: Optional[str] = None) -> ConversationalClassifierOutput:
+        """Classify a message within a conversational context.
+
+        Pass either a ConversationState owned by the caller, or a conversation_id
+        whose state is loaded from and saved back to the session store.
+        """
+        if conversation_id is None:
+            state = self._require_state(conversation_state)
+            messages = self._conversational_prompt_messages(current_message, state)
+            raw_response = self._invoke(CONVERSATIONAL, messages, current_message)
+            return self._apply_conversational_response(raw_response, current_message, state)
+
+        retries = 0
+        while True:
+            state, version = self._load_session(conversation_id)
+            messages = self._conversational_prompt_messages(current_message, state)
+            raw_response = self._invoke(CONVERSATIONAL, messages, current_message)
+            response = self._apply_conversational_response(raw_response, current_message, state)
+            try:
+                self._save_session(conversation_id, state, version)
+                return response
+            except ConcurrentModificationError:
+                # Another turn landed first; classify again against the state that now includes it.
+                retries += 1
+                if retries > self.settings.session_max_retries:
+                    raise
+
+    async def aclassify_conversational(self, current_message: str, conversation_state: Optional[ConversationState] = None, conversation_id: Optional[str] = None) -> ConversationalClassifierOutput:
+        """Async variant of classify_conversational, bounded by Settings.max_concurrency"""
+        if conversation_id is None:
+            state = self._require_state(conversation_state)
+            messages = self._conversational_prompt_messages(current_message, state)
+            raw_response = await self._ainvoke(CONVERSATIONAL, messages, current_message)
+            return self._apply_conversational_response(raw_response, current_message, state)
+
+        retries = 0
+        while True:
+            state, version = await self._aload_session(conversation_id)
+            messages = self._conversational_prompt_messages(current_message, state)
+            raw_response = await self._ainvoke(CONVERSATIONAL, messages, current_message)
+            response = self._apply_conversational_response(raw_response, current_message, state)
+            try:
+                await self._asave_session(conversation_id, state, version)
+                return response
+            except ConcurrentModificationError:
+                retries += 1
+                if retries > self.settings.session_max_retries:
+                    raise
+
+    async def aclassify_conversational_turns(self, messages: List[str], conversation_state: Optional[ConversationState] = None, conversation_id: Optional[str] = None, outputs: Optional[List[ConversationalClassifierOutput]] = None) -> List[ConversationalClassifierOutput]:
+        """Classify consecutive turns of one conversation, in order.
+
+        With Settings.speculative_turns_enabled, up to Settings.speculative_max_turns
+        turns are in flight at once: each turn after the first is sent with the
+        prompt it would get if the turns ahead of it continued the current
+        intent. Its result is kept if that prompt turns out to be the real one
+        once the turn ahead is applied; otherwise it is sent again. Without
+        speculation the turns are classified one after another.
+
+        Each turn's output is appended to outputs (a new list by default) once
+        it is applied, and outputs is returned. If a call fails, the turns
+        before it stay applied (and saved, for a conversation_id) and outputs
+        holds exactly those turns.
+        """
+        outputs = outputs if outputs is not None else []
+        if conversation_id is None:
+            await self._apipeline_turns(messages, self._require_state(conversation_state), outputs)
+            return outputs
+
+        retries = 0
+        while True:
+            state, version = await self._aload_session(conversation_id)
+            outputs.clear()
+            error: Optional[Exception] = None
+            try:
+                await self._apipeline_turns(messages, state, outputs)
+            except Exception as exc:
+                error = exc
+            if outputs:
+                try:
+                    await self._asave_session(conversation_id, state, version)
+                except ConcurrentModificationError:
+                    retries += 1
+                    if retries > self.settings.session_max_retries:
+                        outputs.clear()
+                        raise
+                    continue
+            if error is not None:
+                raise error
+            return outputs
+
+    async def _apipeline_turns(self, messages: List[str], state: ConversationState, outputs: List[ConversationalClassifierOutput]) -> None:
+        depth = self.settings.speculative_max_turns if self.settings.speculative_turns_enabled else 1
+        position = 0
+        while position < len(messages):
+            # Without a current intent the first turn's intent cannot be guessed, so it goes alone.
+            window = messages[position:position + (depth if state.current_intent is not None else 1)]
+            prompts = self._speculative_prompts(window, state)
+            tasks = [asyncio.ensure_future(self._atimed_conversational_call(prompt, message)) for prompt, message in zip(prompts, window)]
+            committed = 0
+            latency_saved = 0.0
+            try:
+                previous_done = 0.0
+                for index, message in enumerate(window):
+                    if index and self._conversational_prompt_messages(message, state) != prompts[index]:
+                        break
+                    raw_response, started, finished = await tasks[index]
+                    outputs.append(self._apply_conversational_response(raw_response, message, state))
+                    committed += 1
+                    if index:
+                        latency_saved += max(0.0, min(previous_done, finished) - started)
+                    previous_done = time.perf_counter()
+            finally:
+                for task in tasks[committed:]:
+                    task.cancel()
+                await asyncio.gather(*tasks[committed:], return_exceptions=True)
+                if len(window) > 1:
+                    self.speculation.record(len(window) - 1, max(committed - 1, 0), latency_saved)
+            position += committed
+
+    def _speculative_prompts(self, window: List[str], state: ConversationState) -> List[List["BaseMessage"]]:
+        """The prompt of each turn in window, assuming every turn before it continues the current intent."""
+        prompts = [self._conversational_prompt_messages(window[0], state)]
+        if len(window) > 1:
+            assumed = ConversationState.from_dict(state.to_dict())
+            for previous, message in zip(window, window[1:]):
+                assumed.add_turn(previous, "user", state.current_intent)
+                prompts.append(self._conversational_prompt_messages(message, assumed))
+        return prompts
+
+    async def _atimed_conversational_call(self, messages: List["BaseMessage"], current_message: str) -> Tuple[Union[dict, BaseModel], float, float]:
+        started = time.perf_counter()
+        raw_response = await self._ainvoke(CONVERSATIONAL, messages, current_message)
+        return raw_response, started, time.perf_counter()
+
+    @staticmethod
+    def _require_state(conversation_state: Optional[ConversationState]) -> ConversationState:
+        if conversation_state is None:
+            raise ValueError("Either conversation_state or conversation_id is required")
+        return conversation_state
+
+    def _single_turn_prompt_messages(self, message: str) -> List["BaseMessage"]:
+        with self.instrumentation.stage(SINGLE_TURN, FORMAT_PROMPT):
+            return self.prompts[SINGLE_TURN].format_messages(question=message)
+
+    def _to_classifier_output(self, raw_response: Union[dict, BaseModel], message: str) -> ClassifierOutput:
+        with self.instrumentation.stage(SINGLE_TURN, PARSE_OUTPUT):
+            # Convert response to ClassifierOutput if it's a dict
+            if isinstance(raw_response, dict):
+                raw_response = self.prompt_specs[SINGLE_TURN].schema(**raw_response)
+            if isinstance(raw_response, CompactClassifierOutput):
+                raw_response = raw_response.expand(message)
+            response: ClassifierOutput = raw_response  # type: ignore
+            return response
+
+    def _record_llm_latency(self, seconds: float) -> None:
+        # Lets the rule fast path estimate how much latency it saves.
+        if self.rules is not None:
+            self.rules.record_llm_latency(seconds)
+
+    def _cache_key(self, message: str) -> str:
+        return make_cache_key(message, self.settings.model_arn, self.single_turn_prompt_version)
+
+    def _cached_output(self, message: str) -> Optional[ClassifierOutput]:
+        """Answer from the local rules or the caches, if any of them can."""
+        with self.instrumentation.stage(SINGLE_TURN, CACHE_LOOKUP):
+            category: Optional[str] = None
+            source = LLM_SOURCE
+            if self.rules is not None:
+                match = self.rules.match(message)
+                category, source = (match.category, "rules") if match is not None else (None, source)
+            if category is None and self.result_cache is not None:
+                category, source = self.result_cache.get(self._cache_key(message)), "result_cache"
+            if category is None and self.similarity_index is not None:
+                category, source = self.similarity_index.lookup(message), "similarity"
+            if category is None and self.local_model is not None:
+                category, source = self._local_category(message), "local"
+        self.instrumentation.lookup(source if category is not None else LLM_SOURCE)
+        return ClassifierOutput(message=message, category=category) if category is not None else None
+
+    def _local_category(self, message: str) -> Optional[str]:
+        """The local model's category for message, unless it is less sure than Settings.local_min_confidence."""
+        category, probability = self.local_model.predict(message)  # type: ignore[union-attr]
+        return category if probability >= self.settings.local_min_confidence else None
+
+    def _answer_cached(self, messages: List[str], results: List[Optional[ClassifierOutput]]) -> List[int]:
+        """Fill in what the rules, caches and local model can answer and return the indices left for the LLM."""
+        remaining = []
+        for index, message in enumerate(messages):
+            results[index] = self._cached_output(message)
+            if results[index] is None:
+                remaining.append(index)
+        return remaining
+
+    @property
+    def _cache_blocks(self) -> bool:
+        return self.result_cache is not None and self.result_cache.blocking
+
+    async def alookup(self, message: str) -> Optional[ClassifierOutput]:
+        """The answer of the rules, caches or local model for message, or None if only the LLM can classify it.
+
+        A SQLite result cache is read off the event loop.
+        """
+        return await self._off_loop(self._cache_blocks, self._cached_output, message)
+
+    def _store_output(self, message: str, response: ClassifierOutput) -> ClassifierOutput:
+        with self.instrumentation.stage(SINGLE_TURN, CACHE_STORE):
+            # Key on the caller's message, not whatever text the model echoed back.
+            if self.result_cache is not None:
+                self.result_cache.set(self._cache_key(message), response.category)
+            if self.similarity_index is not None:
+                self.similarity_index.add(message, response.category)
+        return response
+
+    def _classify_output(self, message: str, lookup: bool = True) -> ClassifierOutput:
+        # lookup=False is for callers that already asked the rules and caches.
+        cached = self._cached_output(message) if lookup else None
+        if cached is not None:
+            return cached
+
+        messages = self._single_turn_prompt_messages(message)
+
+        start = time.perf_counter()
+        raw_response: Union[dict, BaseModel] = self._invoke(SINGLE_TURN, messages, message)
+        self._record_llm_latency(time.perf_counter() - start)
+
+        return self._store_output(message, self._to_classifier_output(raw_response, message))
+
     def classify(self, message: str) -> str:
         """Original single-turn classification method"""
-        prompt: ChatPromptTemplate = ChatPromptTemplate.from_messages([
-            SystemMessagePromptTemplate.from_template(
-                "You are a customer support message classifier. Classify the following message into one of the categories: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'."
-            ),
-            HumanMessagePromptTemplate.from_template("Message: '{question}'\nCategory:")
-        ])
-  
-        formatted_prompt: ChatPromptValue = prompt.format_prompt(question=message)
-        
-        structured_llm = self.llm.with_structured_output(ClassifierOutput)
-        raw_response: Union[dict, BaseModel] = structured_llm.invoke(input=formatted_prompt.to_messages())
-        
-        # Convert response to ClassifierOutput if it's a dict
-        if isinstance(raw_response, dict):
-            response: ClassifierOutput = ClassifierOutput(**raw_response)
-        else:
-            response: ClassifierOutput = raw_response  # type: ignore
-            
-        return response.model_dump_json()
+        return self._classify_output(message).model_dump_json()
+
+    async def aclassify_output(self, message: str, lookup: bool = True) -> ClassifierOutput:
+        """Like aclassify, but returns the ClassifierOutput rather than its JSON.
+
+        lookup=False skips the rules and caches, for callers that already
+        asked them through alookup.
+        """
+        cached = await self.alookup(message) if lookup else None
+        if cached is not None:
+            return cached
+
+        messages = self._single_turn_prompt_messages(message)
+
+        start = time.perf_counter()
+        raw_response: Union[dict, BaseModel] = await self._ainvoke(SINGLE_TURN, messages, message)
+        self._record_llm_latency(time.perf_counter() - start)
+
+        return await self._off_loop(self._cache_blocks, self._store_output, message, self._to_classifier_output(raw_response, message))
+
+    async def aclassify(self, message: str) -> str:
+        """Async variant of classify, bounded by Settings.max_concurrency"""
+        return (await self.aclassify_output(message)).model_dump_json()
+
+    async def aclassify_many(self, messages: List[str]) -> List[str]:
+        """Classify many messages concurrently, returning results in input order"""
+        return list(await asyncio.gather(*(self.aclassify(message) for message in messages)))
+
+    def _batch_prompt_messages(self, messages: List[str]) -> List["BaseMessage"]:
+        with self.instrumentation.stage(BATCH, FORMAT_PROMPT):
+            packed = "\n".join(f'<message index="{index}">{message}</message>' for index, message in enumerate(messages))
+            return self.prompts[BATCH].format_messages(messages=packed)
+
+    def _apply_batch_response(self, raw_response: Union[dict, BaseModel], messages: List[str], pending: List[int], results: List[Optional[ClassifierOutput]]) -> List[int]:
+        """Store the aligned items of a batch response and return the indices still missing."""
+        with self.instrumentation.stage(BATCH, PARSE_OUTPUT):
+            if isinstance(raw_response, dict):
+                raw_response = self.prompt_specs[BATCH].schema(**raw_response)
+            # BatchClassifierOutput or its compact form; both hold index and category pairs.
+            response: BatchClassifierOutput = raw_response  # type: ignore
+
+            for item in response.classifications:
+                # Indices are relative to the batch; anything out of range or repeated is misaligned.
+                if 0 <= item.index < len(pending) and results[pending[item.index]] is None:
+                    original = pending[item.index]
+                    output = ClassifierOutput(message=messages[original], category=item.category)
+                    results[original] = self._store_output(messages[original], output)
+
+            return [index for index in pending if results[index] is None]
+
+    def classify_batch(self, messages: List[str], lookup: bool = True) -> List[ClassifierOutput]:
+        """Classify many messages with one LLM call per batch, in input order.
+
+        Batches are bounded by Settings.batch_max_size and Settings.batch_max_tokens.
+        Items missing from a response are re-issued as a smaller batch up to
+        Settings.batch_max_retries times, then classified one at a time.
+        Messages the rules, caches or local model answer never reach the LLM,
+        and the LLM's answers are stored in the caches; lookup=False skips the
+        lookup for callers that already did it.
+        """
+        results: List[Optional[ClassifierOutput]] = [None] * len(messages)
+        remaining = self._answer_cached(messages, results) if lookup else list(range(len(messages)))
+
+        for batch in _split_batches([messages[index] for index in remaining], self.settings.batch_max_size, self.settings.batch_max_tokens):
+            pending = [remaining[position] for position in batch]
+            for _ in range(self.settings.batch_max_retries + 1):
+                if not pending:
+                    break
+                prompt_messages = self._batch_prompt_messages([messages[index] for index in pending])
+                raw_response = self._invoke(BATCH, prompt_messages)
+                pending = self._apply_batch_response(raw_response, messages, pending, results)
+
+            for index in pending:
+                results[index] = self._classify_output(messages[index], lookup=False)
+
+        return results  # type: ignore[return-value]
+
+    async def aclassify_batch(self, messages: List[str], lookup: bool = True) -> List[ClassifierOutput]:
+        """Async variant of classify_batch; batches run concurrently, bounded by Settings.max_concurrency"""
+        results: List[Optional[ClassifierOutput]] = [None] * len(messages)
+        remaining = await self._off_loop(self._cache_blocks, self._answer_cached, messages, results) if lookup else list(range(len(messages)))
+
+        async def run_batch(batch: List[int]) -> None:
+            pending = [remaining[position] for position in batch]
+            for _ in range(self.settings.batch_max_retries + 1):
+                if not pending:
+                    break
+                prompt_messages = self._batch_prompt_messages([messages[index] for index in pending])
+                raw_response = await self._ainvoke(BATCH, prompt_messages)
+                pending = await self._off_loop(self._cache_blocks, self._apply_batch_response, raw_response, messages, pending, results)
+
+            for index, output in zip(pending, await asyncio.gather(*(self.aclassify_output(messages[index], lookup=False) for index in pending))):
+                results[index] = output
+
+        batches = _split_batches([messages[index] for index in remaining], self.settings.batch_max_size, self.settings.batch_max_tokens)
+        await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return results  # type: ignore[return-value]
+
+    def _transcript_window(self, turns: List[str]) -> List[str]:
+        """The leading turns that fit in one transcript call, at least one."""
+        tokens = 0
+        for count, turn in enumerate(turns[:self.settings.transcript_window_turns]):
+            tokens += estimate_tokens(turn)
+            if count and tokens > self.settings.transcript_window_tokens:
+                return turns[:count]
+        return turns[:self.settings.transcript_window_turns]
+
+    def _transcript_prompt_messages(self, turns: List[str], conversation_state: ConversationState) -> List["BaseMessage"]:
+        with self.instrumentation.stage(TRANSCRIPT, FORMAT_PROMPT):
+            packed = "\n".join(f'<turn index="{index}">{turn}</turn>' for index, turn in enumerate(turns))
+            return self.prompts[TRANSCRIPT].format_messages(
+                current_intent=conversation_state.current_intent or "None",
+                conversation_context=conversation_state.render_context(),
+                turns=packed,
+            )
+
+    def _apply_transcript_response(self, raw_response: Union[dict, BaseModel], turns: List[str], conversation_state: ConversationState) -> List[ConversationalClassifierOutput]:
+        """Apply the labels of the leading turns in order, stopping at the first turn the response left out."""
+        with self.instrumentation.stage(TRANSCRIPT, PARSE_OUTPUT):
+            if isinstance(raw_response, dict):
+                raw_response = TranscriptClassifierOutput(**raw_response)
+            labels = {}
+            for label in raw_response.labels:  # type: ignore[union-attr]
+                labels.setdefault(label.index, label)
+
+        outputs = []
+        with self.instrumentation.stage(TRANSCRIPT, STATE_UPDATE):
+            for index, message in enumerate(turns):
+                label = labels.get(index)
+                if label is None:
+                    break
+                # The same state changes classify_conversational makes for each turn.
+                conversation_state.add_turn(message, "user", label.intent)
+                if label.intent_transition == "NEW":
+                    conversation_state.resolve_current_intent(label.intent)
+                outputs.append(ConversationalClassifierOutput(
+                    message=message,
+                    reasoning=label.reasoning or "",
+                    intent_transition=label.intent_transition,
+                    intent=label.intent,
+                    confidence=label.confidence,
+                ))
+        return outputs
+
+    def classify_transcript(self, turns: List[str], conversation_state: Optional[ConversationState] = None) -> Tuple[List[ConversationalClassifierOutput], ConversationState]:
+        """Label every turn of an existing transcript, in as few LLM calls as possible.
+
+        Turns are sent in windows of up to Settings.transcript_window_turns and
+        Settings.transcript_window_tokens. Each window's prompt carries the
+        current intent and recent context left by the turns before it, so long
+        transcripts are labeled in overlapping windows. conversation_state (a new
+        one by default) ends up as classify_conversational would leave it after
+        every turn. Turns missing from a response are sent again in the next
+        window; a turn the model still leaves out is classified on its own.
+        """
+        state = conversation_state if conversation_state is not None else self.new_conversation()
+        outputs: List[ConversationalClassifierOutput] = []
+        while len(outputs) < len(turns):
+            window = self._transcript_window(turns[len(outputs):])
+            raw_response = self._invoke(TRANSCRIPT, self._transcript_prompt_messages(window, state))
+            labeled = self._apply_transcript_response(raw_response, window, state)
+            outputs += labeled or [self.classify_conversational(window[0], state)]
+        return outputs, state
 
+    async def aclassify_transcript(self, turns: List[str], conversation_state: Optional[ConversationState] = None) -> Tuple[List[ConversationalClassifierOutput], ConversationState]:
+        """Async variant of classify_transcript; windows run one after another, since each depends on the last."""
+        state = conversation_state if conversation_state is not None else self.new_conversation()
+        outputs: List[ConversationalClassifierOutput] = []
+        while len(outputs) < len(turns):
+            window = self._transcript_window(turns[len(outputs):])
+            raw_response = await self._ainvoke(TRANSCRIPT, self._transcript_prompt_messages(window, state))
+            labeled = self._apply_transcript_response(raw_response, window, state)
+            outputs += labeled or [await self.aclassify_conversational(window[0], state)]
+        return outputs, state
@@ -0,0 +1,158 @@
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.models import ConversationTurn
+from ai_classifier_sample.service.tokens import estimate_tokens
+
+NO_CONTEXT = "No previous conversation"
+UNCLASSIFIED = "Unclassified"
+
+
+def format_turn(turn: ConversationTurn) -> str:
+    return f"{turn.speaker}: {turn.message}"
+
+
+class ConversationState:
+    """Conversation history with a bounded retention policy.
+
+    Only the last ``max_turns`` turns are kept, in a ring buffer, along with up
+    to ``max_resolved_intents`` resolved-intent markers. The prompt context for
+    the last ``context_turns`` turns is maintained as turns arrive, so
+    rendering it costs the same however long the conversation runs.
+
+    With a ``context_token_budget``, turns also leave the verbatim context once
+    it would exceed the budget, and every turn that leaves is folded into a
+    rolling summary: a turn count and the latest message per intent. Folding
+    is O(1) per turn, so the context stays within budget without ever being
+    re-summarized from the full history.
+    """
+
+    # Longest message excerpt kept per intent in the rolling summary.
+    SUMMARY_EXCERPT_CHARS = 80
+
+    def __init__(self, max_turns: int = 50, context_turns: int = 5, max_resolved_intents: int = 50, context_token_budget: Optional[int] = None):
+        self.current_intent: Optional[str] = None
+        self.conversation_history: Deque[ConversationTurn] = deque(maxlen=max_turns)
+        self.resolved_intents: List[str] = []
+        self.context_turns = context_turns
+        self.max_resolved_intents = max_resolved_intents
+        self.context_token_budget = context_token_budget
+
+        # Verbatim context as (turn, formatted line, estimated tokens), oldest first.
+        self._context_window: Deque[Tuple[ConversationTurn, str, int]] = deque()
+        self._context_tokens = 0
+        self._summary: Dict[str, Dict[str, Any]] = {}
+        self._summary_text = ""
+        self._context: Optional[str] = NO_CONTEXT
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ConversationState":
+        """A new conversation using the settings' context window and, in token-budget mode, its budget."""
+        return cls(
+            context_turns=settings.context_turns,
+            context_token_budget=settings.context_token_budget if settings.token_budget_enabled else None,
+        )
+
+    def add_turn(self, message: str, speaker: str, intent: Optional[str] = None):
+        self._append_turn(ConversationTurn(message=message, speaker=speaker, intent=intent))
+
+    def _append_turn(self, turn: ConversationTurn):
+        self.conversation_history.append(turn)
+        self._push_context(turn)
+        while len(self._context_window) > self.context_turns or self._over_budget():
+            self._fold(self._context_window.popleft())
+        self._context = None
+
+    def _push_context(self, turn: ConversationTurn):
+        line = format_turn(turn)
+        if self.context_token_budget and estimate_tokens(line) > self.context_token_budget:
+            # A single turn longer than the whole budget is cut to fit.
+            line = line[:self.context_token_budget * 4 - 4] + "..."
+        tokens = estimate_tokens(line)
+        self._context_window.append((turn, line, tokens))
+        self._context_tokens += tokens
+
+    def _over_budget(self) -> bool:
+        if not self.context_token_budget or len(self._context_window) <= 1:
+            return False
+        return self._context_tokens + estimate_tokens(self._summary_text) > self.context_token_budget
+
+    def _fold(self, entry: Tuple[ConversationTurn, str, int]):
+        turn, _, tokens = entry
+        self._context_tokens -= tokens
+        if not self.context_token_budget:
+            return
+        summary = self._summary.setdefault(turn.intent or UNCLASSIFIED, {"turns": 0, "latest": ""})
+        summary["turns"] += 1
+        summary["latest"] = turn.message[:self.SUMMARY_EXCERPT_CHARS]
+        self._summary_text = self._render_summary()
+
+    def _render_summary(self) -> str:
+        if not self._summary:
+            return ""
+        total = sum(entry["turns"] for entry in self._summary.values())
+        parts = [
+            f"{intent} ({entry['turns']} turns, latest: \"{entry['latest']}\")"
+            for intent, entry in self._summary.items()
+        ]
+        return f"Earlier in the conversation ({total} turns): " + "; ".join(parts)
+
+    def resolve_current_intent(self, new_intent: str):
+        """Record the active intent as resolved and switch to new_intent."""
+        if self.current_intent:
+            self.resolved_intents.append(self.current_intent)
+            if len(self.resolved_intents) > self.max_resolved_intents:
+                del self.resolved_intents[0]
+        self.current_intent = new_intent
+
+    def get_recent_context(self, max_turns: int = 5) -> List[ConversationTurn]:
+        start = max(len(self.conversation_history) - max_turns, 0)
+        return list(islice(self.conversation_history, start, None))
+
+    def render_context(self) -> str:
+        """The rolling summary and recent turns formatted for the prompt, rebuilt at most once per turn."""
+        if self._context is None:
+            lines = [line for _, line, _ in self._context_window]
+            if self._summary_text:
+                lines.insert(0, self._summary_text)
+            self._context = "\n".join(lines) if lines else NO_CONTEXT
+        return self._context
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot, used by session stores."""
+        return {
+            "current_intent": self.current_intent,
+            "resolved_intents": list(self.resolved_intents),
+            "turns": [turn.model_dump(mode="json") for turn in self.conversation_history],
+            "max_turns": self.conversation_history.maxlen,
+            "context_turns": self.context_turns,
+            "max_resolved_intents": self.max_resolved_intents,
+            "context_token_budget": self.context_token_budget,
+            "context_window": len(self._context_window),
+            "summary": {intent: dict(entry) for intent, entry in self._summary.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationState":
+        state = cls(
+            max_turns=data["max_turns"],
+            context_turns=data["context_turns"],
+            max_resolved_intents=data["max_resolved_intents"],
+            context_token_budget=data.get("context_token_budget"),
+        )
+        state.current_intent = data["current_intent"]
+        state.resolved_intents = list(data["resolved_intents"])
+        state._summary = {intent: dict(entry) for intent, entry in data.get("summary", {}).items()}
+        state._summary_text = state._render_summary()
+
+        # Restore the verbatim window as it was rather than re-folding, so the summary is not counted twice.
+        turns = [ConversationTurn(**turn) for turn in data["turns"]]
+        window_start = len(turns) - min(data.get("context_window", state.context_turns), len(turns))
+        for index, turn in enumerate(turns):
+            state.conversation_history.append(turn)
+            if index >= window_start:
+                state._push_context(turn)
+        state._context = None
+        return state
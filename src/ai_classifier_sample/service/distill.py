@@ -0,0 +1,245 @@
+"""
+Distillation of LLM labels into a local linear classifier.
+
+The pipeline has three steps:
+
+1. ``export_labels`` collects (message, category) pairs that the LLM already
+   produced, from recordings written with ``RECORD_PATH`` (single-turn and
+   batch calls) and from JSONL files such as ``ai-classifier-bulk`` results,
+   and writes them once each to a JSONL file.
+2. ``train`` fits a multinomial logistic regression over the hashed features
+   of ``providers.local`` with mini-batch SGD in NumPy.
+3. ``evaluate`` scores a model against held-out LLM labels: agreement,
+   per-category precision and recall, a confusion matrix and latency.
+
+``distill`` runs steps 2 and 3 with a stable hash-based holdout split and
+writes a versioned weight file for ``PROVIDER=local``.
+"""
+
+import hashlib
+import json
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.providers.local import LocalModel, hashed_features, model_version, save_model
+from ai_classifier_sample.service.recording import DATA_MAGIC, iter_records
+
+# A (message, category) pair labeled by the LLM.
+Example = Tuple[str, str]
+
+# Human messages of the single-turn and batch prompts (see service.prompts).
+_SINGLE_TURN_MESSAGE = re.compile(r"\AMessage: '(.*)'\nCategory:\Z", re.DOTALL)
+_BATCH_MESSAGE = re.compile(r'<message index="(\d+)">(.*?)</message>', re.DOTALL)
+_SINGLE_TURN_SCHEMAS = {"ClassifierOutput", "CompactClassifierOutput"}
+_BATCH_SCHEMAS = {"BatchClassifierOutput", "CompactBatchClassifierOutput"}
+
+
+class ExportStats(BaseModel):
+    read: int = Field(0, description="Labeled messages found in the sources")
+    written: int = Field(0, description="Distinct messages written")
+    duplicates: int = Field(0, description="Messages skipped because they were already written")
+
+
+class CategoryReport(BaseModel):
+    precision: float = Field(..., description="Share of local predictions of this category that the LLM agrees with")
+    recall: float = Field(..., description="Share of LLM labels of this category the local model reproduces")
+    f1: float = Field(..., description="Harmonic mean of precision and recall")
+    support: int = Field(..., description="Examples the LLM labeled with this category")
+
+
+class EvaluationReport(BaseModel):
+    model_version: str = Field(..., description="Version of the evaluated model")
+    examples: int = Field(..., description="Held-out examples scored")
+    agreement: float = Field(..., description="Share of examples where the local model matches the LLM label")
+    categories: Dict[str, CategoryReport] = Field(..., description="Precision and recall per category")
+    confusion: Dict[str, Dict[str, int]] = Field(..., description="Counts by LLM label, then by local prediction")
+    mean_latency_us: float = Field(..., description="Mean microseconds per local prediction")
+    p99_latency_us: float = Field(..., description="99th percentile microseconds per local prediction")
+
+
+def _recording_labels(path: str) -> Iterator[Example]:
+    for prompt, response, _ in iter_records(path):
+        schema = prompt["schema"]
+        human = [text for kind, text in prompt["messages"] if kind == "human"]
+        if not human:
+            continue
+        if schema in _SINGLE_TURN_SCHEMAS and "category" in response:
+            match = _SINGLE_TURN_MESSAGE.match(human[-1])
+            if match is not None:
+                yield match.group(1), response["category"]
+        elif schema in _BATCH_SCHEMAS:
+            messages = {int(index): message for index, message in _BATCH_MESSAGE.findall(human[-1])}
+            for item in response.get("classifications", []):
+                if item.get("index") in messages and "category" in item:
+                    yield messages[item["index"]], item["category"]
+
+
+def _jsonl_labels(path: str, text_field: str) -> Iterator[Example]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("error") is None and row.get(text_field) and row.get("category"):
+                yield row[text_field], row["category"]
+
+
+def iter_labels(path: str, text_field: str = "message") -> Iterator[Example]:
+    """LLM-labeled (message, category) pairs in a recording or a JSONL file.
+
+    Recordings contribute their single-turn and batch calls; JSONL rows need
+    text_field and a category, and rows with an error are skipped.
+    """
+    with open(path, "rb") as file:
+        is_recording = file.read(len(DATA_MAGIC)) == DATA_MAGIC
+    return _recording_labels(path) if is_recording else _jsonl_labels(path, text_field)
+
+
+def export_labels(sources: Sequence[str], output: str, text_field: str = "message") -> ExportStats:
+    """Write every distinct labeled message in sources to output as JSONL, keeping its first label."""
+    stats = ExportStats()
+    # 16-byte digests keep memory bounded however long the messages are.
+    seen = set()
+    with open(output, "w", encoding="utf-8") as file:
+        for source in sources:
+            for message, category in iter_labels(source, text_field):
+                stats.read += 1
+                digest = hashlib.blake2b(message.encode(), digest_size=16).digest()
+                if digest in seen:
+                    stats.duplicates += 1
+                    continue
+                seen.add(digest)
+                file.write(json.dumps({"message": message, "category": category}) + "\n")
+                stats.written += 1
+    return stats
+
+
+def load_examples(path: str) -> List[Example]:
+    return list(_jsonl_labels(path, "message"))
+
+
+def split_holdout(examples: Iterable[Example], fraction: float) -> Tuple[List[Example], List[Example]]:
+    """(training, held-out) examples; a message's side depends only on its text, so reruns agree."""
+    training: List[Example] = []
+    holdout: List[Example] = []
+    for example in examples:
+        bucket = int.from_bytes(hashlib.blake2b(example[0].encode(), digest_size=4).digest(), "little") / 2 ** 32
+        (holdout if bucket < fraction else training).append(example)
+    return training, holdout
+
+
+def _featurize(messages: Sequence[str], dimensions: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR (row pointers, feature indices, values) of the messages' hashed features."""
+    rows = [hashed_features(message, dimensions) for message in messages]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+    indices = np.concatenate([row[0] for row in rows]) if rows else np.zeros(0, dtype=np.int64)
+    values = np.concatenate([row[1] for row in rows]) if rows else np.zeros(0, dtype=np.float32)
+    return indptr, indices, values
+
+
+def train(
+    examples: Sequence[Example],
+    dimensions: int = 2 ** 18,
+    epochs: int = 5,
+    learning_rate: float = 2.0,
+    l2: float = 1e-6,
+    batch_size: int = 256,
+    seed: int = 0,
+) -> LocalModel:
+    """Fit a softmax regression on the hashed features of examples with mini-batch SGD.
+
+    Messages without any features are left out. The learning rate decays as
+    1/(1 + epoch).
+    """
+    categories = sorted({category for _, category in examples})
+    if len(categories) < 2:
+        raise ValueError("Training needs examples of at least two categories")
+    column = {category: position for position, category in enumerate(categories)}
+
+    indptr, indices, values = _featurize([message for message, _ in examples], dimensions)
+    labels = np.array([column[category] for _, category in examples], dtype=np.int64)
+    lengths = np.diff(indptr)
+    usable = np.flatnonzero(lengths)
+
+    weights = np.zeros((dimensions, len(categories)), dtype=np.float32)
+    bias = np.zeros(len(categories), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        rate = learning_rate / (1 + epoch)
+        order = rng.permutation(usable)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            counts = lengths[rows]
+            # Positions of each row's features in the CSR arrays, row after row.
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            positions = np.arange(counts.sum()) - np.repeat(offsets, counts) + np.repeat(indptr[rows], counts)
+            features, feature_values = indices[positions], values[positions]
+
+            logits = np.add.reduceat(feature_values[:, None] * weights[features], offsets, axis=0) + bias
+            logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+            gradient = logits / logits.sum(axis=1, keepdims=True)
+            gradient[np.arange(len(rows)), labels[rows]] -= 1.0
+            gradient /= len(rows)
+
+            if l2:
+                weights *= 1.0 - rate * l2
+            np.add.at(weights, features, -rate * feature_values[:, None] * np.repeat(gradient, counts, axis=0))
+            bias -= rate * gradient.sum(axis=0)
+
+    metadata = {"examples": len(usable), "epochs": epochs, "learning_rate": learning_rate, "l2": l2, "trained_at": time.time()}
+    return LocalModel(weights, bias, categories, version=model_version(weights, bias), metadata=metadata)
+
+
+def evaluate(model: LocalModel, examples: Sequence[Example]) -> EvaluationReport:
+    """Agreement of model with the LLM labels of examples, with per-category detail and latency."""
+    categories = sorted(set(model.categories) | {category for _, category in examples})
+    confusion = {expected: {predicted: 0 for predicted in categories} for expected in categories}
+    latencies = np.zeros(len(examples))
+    for position, (message, expected) in enumerate(examples):
+        start = time.perf_counter()
+        predicted = model.predict(message)[0]
+        latencies[position] = time.perf_counter() - start
+        confusion[expected][predicted] += 1
+
+    reports = {}
+    for category in categories:
+        true_positives = confusion[category][category]
+        predicted = sum(row[category] for row in confusion.values())
+        support = sum(confusion[category].values())
+        precision = true_positives / predicted if predicted else 0.0
+        recall = true_positives / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        reports[category] = CategoryReport(precision=precision, recall=recall, f1=f1, support=support)
+
+    agreed = sum(confusion[category][category] for category in categories)
+    return EvaluationReport(
+        model_version=model.version,
+        examples=len(examples),
+        agreement=agreed / len(examples) if examples else 0.0,
+        categories=reports,
+        confusion=confusion,
+        mean_latency_us=float(latencies.mean() * 1e6) if len(examples) else 0.0,
+        p99_latency_us=float(np.percentile(latencies, 99) * 1e6) if len(examples) else 0.0,
+    )
+
+
+def distill(labels_path: str, model_path: str, holdout: float = 0.1, report_path: Optional[str] = None, **train_options) -> EvaluationReport:
+    """Train on the exported labels at labels_path, save the model and evaluate it on the holdout.
+
+    The report is written as JSON to report_path (default: model_path + ".report.json")
+    and its agreement is stored in the model's metadata.
+    """
+    training, held_out = split_holdout(load_examples(labels_path), holdout)
+    model = train(training, **train_options)
+    report = evaluate(model, held_out)
+    model.metadata.update(source=labels_path, holdout_examples=report.examples, holdout_agreement=report.agreement)
+    save_model(model_path, model.weights, model.bias, model.categories, model.metadata)
+
+    with open(report_path or model_path + ".report.json", "w", encoding="utf-8") as file:
+        file.write(report.model_dump_json(indent=2))
+    return report
@@ -0,0 +1,160 @@
+"""
+Ordered execution of conversational turns, one actor per conversation.
+
+``ConversationExecutor.classify`` runs ``aclassify_conversational`` for a
+conversation id. Turns of the same conversation are classified one at a time,
+in the order they were submitted, so each turn sees the state left by the one
+before it and session saves never race. Turns of different conversations run
+concurrently on the event loop and share the classifier's LLM scheduler,
+which bounds the calls in flight.
+
+With ``SPECULATIVE_TURNS_ENABLED`` an actor takes every turn waiting in its
+queue, up to ``SPECULATIVE_MAX_TURNS``, and classifies them through
+``aclassify_conversational_turns``, which pipelines them speculatively.
+
+Each active conversation has an actor: a task draining a bounded queue.
+When the queue is full, callers wait up to ``queue_timeout`` seconds for room
+and then get ``ConversationBusyError``, so a chatty client slows itself
+down instead of growing memory. An actor whose queue stays empty for
+``idle_seconds`` exits, so thousands of mostly idle chats cost nothing
+between turns.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.models import ConversationalClassifierOutput
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+_Turn = Tuple[str, "asyncio.Future[ConversationalClassifierOutput]"]
+
+
+class ConversationBusyError(Exception):
+    """Raised when a conversation's queue stayed full for longer than the queue timeout."""
+
+
+class ExecutorStats(BaseModel):
+    requests: int = Field(0, description="Turns submitted to the executor")
+    rejected: int = Field(0, description="Turns refused because their conversation's queue stayed full")
+    backpressure_waits: int = Field(0, description="Turns that had to wait for room in a full queue")
+    actors_started: int = Field(0, description="Conversation actors started")
+    actors_expired: int = Field(0, description="Conversation actors stopped after idling")
+    active_actors: int = Field(0, description="Conversation actors currently running")
+    queued: int = Field(0, description="Turns waiting in conversation queues")
+
+
+class _Actor:
+    __slots__ = ("queue", "task")
+
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[_Turn]" = asyncio.Queue(maxsize=queue_size)
+        self.task: "asyncio.Task[None]"
+
+
+class ConversationExecutor:
+    """Serializes turns per conversation id and runs conversations concurrently.
+
+    All calls must come from one event loop. Conversation state lives in the
+    classifier's session store, keyed by the conversation id.
+    """
+
+    def __init__(self, classifier: MessageClassifier, queue_size: int = 16, queue_timeout: float = 5.0, idle_seconds: float = 30.0):
+        self.classifier = classifier
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.idle_seconds = idle_seconds
+
+        self._actors: Dict[str, _Actor] = {}
+        self._stats = ExecutorStats()
+
+    async def classify(self, conversation_id: str, message: str) -> ConversationalClassifierOutput:
+        """Classify message as the next turn of conversation_id, after the turns submitted before it."""
+        self._stats.requests += 1
+        actor = self._actors.get(conversation_id)
+        if actor is None:
+            actor = self._start(conversation_id)
+
+        future: "asyncio.Future[ConversationalClassifierOutput]" = asyncio.get_running_loop().create_future()
+        try:
+            actor.queue.put_nowait((message, future))
+        except asyncio.QueueFull:
+            self._stats.backpressure_waits += 1
+            try:
+                # A full queue keeps its actor alive, so the wait cannot outlive it.
+                await asyncio.wait_for(actor.queue.put((message, future)), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._stats.rejected += 1
+                raise ConversationBusyError(
+                    f"Conversation {conversation_id} already has {self.queue_size} turns waiting"
+                ) from None
+        return await future
+
+    def _start(self, conversation_id: str) -> _Actor:
+        actor = _Actor(self.queue_size)
+        self._actors[conversation_id] = actor
+        actor.task = asyncio.get_running_loop().create_task(self._run(conversation_id, actor))
+        self._stats.actors_started += 1
+        return actor
+
+    async def _run(self, conversation_id: str, actor: _Actor) -> None:
+        while True:
+            if actor.queue.empty():
+                try:
+                    message, future = await asyncio.wait_for(actor.queue.get(), self.idle_seconds)
+                except asyncio.TimeoutError:
+                    # A turn put while the wait was timing out is still queued; only stop when none is.
+                    if actor.queue.empty():
+                        if self._actors.get(conversation_id) is actor:
+                            del self._actors[conversation_id]
+                        self._stats.actors_expired += 1
+                        return
+                    continue
+            else:
+                message, future = actor.queue.get_nowait()
+
+            turns = [(message, future)]
+            settings = self.classifier.settings
+            if settings.speculative_turns_enabled:
+                while len(turns) < settings.speculative_max_turns and not actor.queue.empty():
+                    turns.append(actor.queue.get_nowait())
+            try:
+                await self._classify_turns(conversation_id, [turn for turn in turns if not turn[1].cancelled()])
+            finally:
+                for _ in turns:
+                    actor.queue.task_done()
+
+    async def _classify_turns(self, conversation_id: str, turns: List[_Turn]) -> None:
+        while turns:
+            outputs: List[ConversationalClassifierOutput] = []
+            error: Optional[Exception] = None
+            try:
+                await self.classifier.aclassify_conversational_turns([message for message, _ in turns], conversation_id=conversation_id, outputs=outputs)
+            except Exception as exc:
+                error = exc
+            for (_, future), output in zip(turns, outputs):
+                if not future.done():
+                    future.set_result(output)
+            if error is None:
+                return
+            # The turn after the applied ones failed; the turns behind it are classified again.
+            failed = turns[len(outputs)][1]
+            if not failed.done():
+                failed.set_exception(error)
+            turns = turns[len(outputs) + 1:]
+
+    async def drain(self) -> None:
+        """Wait for every queued turn to be classified, then stop all actors."""
+        actors = list(self._actors.values())
+        await asyncio.gather(*(actor.queue.join() for actor in actors))
+        for actor in actors:
+            actor.task.cancel()
+        await asyncio.gather(*(actor.task for actor in actors), return_exceptions=True)
+        self._actors.clear()
+
+    def stats(self) -> ExecutorStats:
+        return self._stats.model_copy(update={
+            "active_actors": len(self._actors),
+            "queued": sum(actor.queue.qsize() for actor in self._actors.values()),
+        })
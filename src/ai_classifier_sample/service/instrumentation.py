@@ -0,0 +1,150 @@
+"""
+Hook points on the classification hot path.
+
+``MessageClassifier`` wraps each stage of a call (cache lookup, prompt
+formatting, the LLM call, output parsing, conversation state and session
+updates) in ``Instrumentation.stage(operation, stage)``, and reports which
+local tier answered a message and the token usage of every model response.
+Those events go to the registered ``InstrumentationHook`` objects.
+
+With no hooks registered, ``stage`` returns one shared no-op context manager
+and the other methods return at once, so disabled instrumentation costs a
+method call and an empty-list check per stage. ``MetricsHook`` is the
+built-in hook; it records everything into a ``MetricsRegistry``.
+"""
+
+import time
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, List, Optional, Sequence
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.service.metrics import MetricsRegistry
+
+# Stage names used by MessageClassifier.
+CACHE_LOOKUP = "cache_lookup"
+FORMAT_PROMPT = "format_prompt"
+LLM_CALL = "llm_call"
+PARSE_OUTPUT = "parse_output"
+CACHE_STORE = "cache_store"
+STATE_UPDATE = "state_update"
+SESSION_LOAD = "session_load"
+SESSION_SAVE = "session_save"
+
+# The tier that answered a message without the LLM, or LLM_SOURCE.
+LLM_SOURCE = "llm"
+
+_NO_OP = nullcontext()
+
+
+class InstrumentationHook:
+    """Receives instrumentation events. Every method is a no-op; override the ones you need.
+
+    Hooks are called synchronously on the request path, from any thread, so
+    they should be quick and thread-safe.
+    """
+
+    def on_stage(self, operation: str, stage: str, seconds: float) -> None:
+        """A stage of operation finished after seconds, successfully or not."""
+
+    def on_error(self, operation: str, stage: str, error: BaseException) -> None:
+        """A stage of operation raised error."""
+
+    def on_lookup(self, source: str) -> None:
+        """A single-turn message was answered by source: 'rules', 'result_cache', 'similarity', 'local', or 'llm' if none could."""
+
+    def on_llm_usage(self, usage_metadata: Dict[str, Any]) -> None:
+        """A model response reported usage_metadata (input, output and cached token counts)."""
+
+
+class _StageTimer:
+    __slots__ = ("_hooks", "_operation", "_stage", "_start")
+
+    def __init__(self, hooks: List[InstrumentationHook], operation: str, stage: str):
+        self._hooks = hooks
+        self._operation = operation
+        self._stage = stage
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], traceback: Any) -> bool:
+        seconds = time.perf_counter() - self._start
+        for hook in self._hooks:
+            hook.on_stage(self._operation, self._stage, seconds)
+            if exc is not None:
+                hook.on_error(self._operation, self._stage, exc)
+        return False
+
+
+class Instrumentation:
+    """Dispatches hot-path events to hooks; does nothing while no hook is registered."""
+
+    def __init__(self, hooks: Sequence[InstrumentationHook] = ()):
+        self.hooks: List[InstrumentationHook] = list(hooks)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.hooks)
+
+    def add_hook(self, hook: InstrumentationHook) -> None:
+        self.hooks.append(hook)
+
+    def stage(self, operation: str, stage: str) -> ContextManager[None]:
+        """Context manager timing one stage of operation."""
+        if not self.hooks:
+            return _NO_OP
+        return _StageTimer(self.hooks, operation, stage)
+
+    def lookup(self, source: str) -> None:
+        for hook in self.hooks:
+            hook.on_lookup(source)
+
+    def llm_usage(self, usage_metadata: Dict[str, Any]) -> None:
+        for hook in self.hooks:
+            hook.on_llm_usage(usage_metadata)
+
+
+class MetricsHook(InstrumentationHook):
+    """Records stage latencies, errors, lookups and token counts in a MetricsRegistry."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.stage_seconds = registry.histogram(
+            "ai_classifier_stage_duration_seconds", "Time spent in each stage of a classification", labels=("operation", "stage")
+        )
+        self.errors = registry.counter(
+            "ai_classifier_errors_total", "Exceptions raised by a stage of a classification", labels=("operation", "stage", "error")
+        )
+        self.lookups = registry.counter(
+            "ai_classifier_lookups_total", "Local lookups for single-turn messages, by the tier that answered (llm if none did)", labels=("source",)
+        )
+        self.tokens = registry.counter(
+            "ai_classifier_llm_tokens_total", "Tokens reported by model responses, by kind", labels=("kind",)
+        )
+
+    def on_stage(self, operation: str, stage: str, seconds: float) -> None:
+        self.stage_seconds.observe(seconds, operation, stage)
+
+    def on_error(self, operation: str, stage: str, error: BaseException) -> None:
+        self.errors.inc(operation, stage, type(error).__name__)
+
+    def on_lookup(self, source: str) -> None:
+        self.lookups.inc(source)
+
+    def on_llm_usage(self, usage_metadata: Dict[str, Any]) -> None:
+        details = usage_metadata.get("input_token_details") or {}
+        for kind, value in (
+            ("input", usage_metadata.get("input_tokens", 0)),
+            ("output", usage_metadata.get("output_tokens", 0)),
+            ("cache_read", details.get("cache_read", 0)),
+            ("cache_write", details.get("cache_creation", 0)),
+        ):
+            if value:
+                self.tokens.inc(kind, amount=value)
+
+
+def build_instrumentation(settings: Settings) -> Instrumentation:
+    """Instrumentation recording into a new MetricsRegistry when metrics are enabled, else a no-op."""
+    if not settings.metrics_enabled:
+        return Instrumentation()
+    return Instrumentation([MetricsHook(MetricsRegistry())])
@@ -0,0 +1,213 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+``MetricsRegistry`` holds counters and histograms that are updated on the hot
+path, plus collectors: callables that report values already tracked
+elsewhere (scheduler, caches, endpoints) only when the registry is scraped.
+``render_prometheus`` writes everything in the Prometheus text format 0.0.4.
+``render_families`` does the same for families gathered from several
+registries, such as one per tenant told apart by ``with_labels``.
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Literal, Optional, Sequence, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+MetricType = Literal["counter", "gauge", "histogram"]
+
+
+class Sample(BaseModel):
+    suffix: str = Field("", description="Appended to the family name, e.g. _bucket")
+    labels: Dict[str, str] = Field(default_factory=dict, description="Label names and values")
+    value: float = Field(..., description="Sample value")
+
+
+class MetricFamily(BaseModel):
+    name: str = Field(..., description="Metric name")
+    type: MetricType = Field(..., description="Prometheus metric type")
+    help: str = Field("", description="One-line description")
+    samples: List[Sample] = Field(default_factory=list, description="Samples of this metric")
+
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = list(self._values.items())
+        return MetricFamily(name=self.name, type="counter", help=self.help, samples=[
+            Sample(labels=dict(zip(self.label_names, key)), value=value) for key, value in values
+        ])
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (the last one is +Inf), the sum and the total count.
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series is not None else 0
+
+    def collect(self) -> MetricFamily:
+        samples: List[Sample] = []
+        with self._lock:
+            series = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        for key, counts, total in series:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(Sample(suffix="_bucket", labels={**labels, "le": _format_value(bound)}, value=cumulative))
+            samples.append(Sample(suffix="_sum", labels=labels, value=total))
+            samples.append(Sample(suffix="_count", labels=labels, value=cumulative))
+        return MetricFamily(name=self.name, type="histogram", help=self.help, samples=samples)
+
+
+Metric = Union[Counter, Histogram]
+
+
+class MetricsRegistry:
+    """Named counters, histograms and scrape-time collectors."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"Metric '{metric.name}' is already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Return the counter called name, creating it on first use."""
+        return self._register(Counter(name, help, labels))  # type: ignore[return-value]
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Return the histogram called name, creating it on first use."""
+        return self._register(Histogram(name, help, labels, buckets))  # type: ignore[return-value]
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        return render_families(self.collect())
+
+
+def with_labels(families: Iterable[MetricFamily], labels: Dict[str, str]) -> List[MetricFamily]:
+    """Copies of families with labels added to every sample, e.g. to tell registries apart."""
+    return [
+        family.model_copy(update={"samples": [sample.model_copy(update={"labels": {**labels, **sample.labels}}) for sample in family.samples]})
+        for family in families
+    ]
+
+
+def render_families(families: Iterable[MetricFamily]) -> str:
+    """Families in the Prometheus text exposition format; samples of families with the same name share one header."""
+    merged: Dict[str, MetricFamily] = {}
+    for family in families:
+        existing = merged.get(family.name)
+        if existing is None:
+            merged[family.name] = family.model_copy(update={"samples": list(family.samples)})
+        else:
+            existing.samples.extend(family.samples)
+
+    lines: List[str] = []
+    for family in merged.values():
+        lines.append(f"# HELP {family.name} {_escape_help(family.help)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for sample in family.samples:
+            lines.append(f"{family.name}{sample.suffix}{_format_labels(sample.labels)} {_format_value(sample.value)}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def gauge(name: str, help: str, value: float, labels: Optional[Dict[str, str]] = None) -> MetricFamily:
+    """A single-sample gauge family, for collectors."""
+    return MetricFamily(name=name, type="gauge", help=help, samples=[Sample(labels=labels or {}, value=value)])
+
+
+def counter(name: str, help: str, value: float, labels: Optional[Dict[str, str]] = None) -> MetricFamily:
+    """A single-sample counter family, for collectors."""
+    return MetricFamily(name=name, type="counter", help=help, samples=[Sample(labels=labels or {}, value=value)])
@@ -0,0 +1,288 @@
+"""
+Prompt registry for MessageClassifier.
+
+Each ``PromptSpec`` pairs a system prompt, a human template and the output
+schema, and carries a version hash derived from all three. ``PromptRegistry``
+binds every spec to a chat model once, so a classification call only formats
+the human message and invokes a prebuilt structured-output runnable.
+
+The system prompts hold only static text, the category taxonomy and the
+instructions, while everything that varies per call is in the human message.
+With ``cache_system_prompts`` the system message ends in a Bedrock cache
+point, so the tool definition and system prompt before it form a prompt-cache
+prefix shared by every call of that type. Bedrock ignores cache points after
+prefixes shorter than the model's minimum, so prompts whose estimated prefix
+is below ``cache_min_tokens`` get none.
+"""
+
+import json
+import threading
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from ai_classifier_sample.models import (
+    BatchClassifierOutput,
+    ClassifierOutput,
+    CompactBatchClassifierOutput,
+    CompactClassifierOutput,
+    CompactConversationalClassifierOutput,
+    ConversationalClassifierOutput,
+    TranscriptClassifierOutput,
+)
+from ai_classifier_sample.service.cache import prompt_version_hash
+from ai_classifier_sample.service.tokens import estimate_tokens, round_up_to_bucket
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage, SystemMessage
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.runnables import Runnable
+
+SINGLE_TURN = "single_turn"
+CONVERSATIONAL = "conversational"
+BATCH = "batch"
+TRANSCRIPT = "transcript"
+
+# A Bedrock Converse content block ending a prompt-cache prefix.
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+
+class PromptSpec:
+    """A versioned prompt and the structured output it asks for."""
+
+    def __init__(self, name: str, system_prompt: str, human_template: str, schema: Type[BaseModel]):
+        self.name = name
+        self.system_prompt = system_prompt
+        self.human_template = human_template
+        self.schema = schema
+
+    @cached_property
+    def version(self) -> str:
+        schema_json = json.dumps(self.schema.model_json_schema(), sort_keys=True)
+        return prompt_version_hash(self.system_prompt, self.human_template, schema_json)
+
+    @cached_property
+    def prefix_tokens(self) -> int:
+        """Estimated tokens of the system prompt and tool schema, the prefix a cache point would cover."""
+        return estimate_tokens(self.system_prompt) + estimate_tokens(json.dumps(self.schema.model_json_schema()))
+
+    @cached_property
+    def template(self) -> "ChatPromptTemplate":
+        from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+
+        return ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(self.system_prompt),
+            HumanMessagePromptTemplate.from_template(self.human_template)
+        ])
+
+    @cached_property
+    def system_message(self) -> "SystemMessage":
+        from langchain_core.messages import SystemMessage
+
+        # The system prompt has no variables, so one message object serves every call.
+        return SystemMessage(content=self.system_prompt)
+
+    @cached_property
+    def cached_system_message(self) -> "SystemMessage":
+        """The system message followed by a cache point, marking everything up to it as cacheable."""
+        from langchain_core.messages import SystemMessage
+
+        return SystemMessage(content=[{"type": "text", "text": self.system_prompt}, CACHE_POINT])
+
+    def format_messages(self, **kwargs: Any) -> List["BaseMessage"]:
+        """Equivalent to template.format_messages, without re-parsing the template per call."""
+        from langchain_core.messages import HumanMessage
+
+        return [self.system_message, HumanMessage(content=self.human_template.format(**kwargs))]
+
+
+class CompiledPrompt:
+    """A PromptSpec bound to a chat model's structured-output runnable.
+
+    With ``max_output_tokens`` set, the model's output limit is capped for this
+    call type; ``runnable_for`` raises the cap for calls that need more, such
+    as ones echoing a long input back, building one runnable per rounded-up limit.
+    With ``cache_system_prompt`` the formatted messages carry a cache point,
+    unless the spec's prefix is estimated below ``cache_min_tokens``.
+    """
+
+    def __init__(self, spec: PromptSpec, llm: "BaseChatModel", max_output_tokens: Optional[int] = None, output_token_cap: Optional[int] = None, cache_system_prompt: bool = False, cache_min_tokens: int = 0):
+        self.spec = spec
+        self.max_output_tokens = max_output_tokens
+        self.cache_system_prompt = cache_system_prompt and spec.prefix_tokens >= cache_min_tokens
+        self._llm = llm
+        self._output_token_cap = output_token_cap
+        self._limited: Dict[int, "Runnable"] = {}
+        self._lock = threading.Lock()
+        self.runnable: "Runnable" = self._build(max_output_tokens)
+
+    def _build(self, max_tokens: Optional[int]) -> "Runnable":
+        llm = self._llm
+        if max_tokens is not None and "max_tokens" in type(llm).model_fields:
+            # A shallow copy: the limited model shares the original's client and connection pool.
+            llm = llm.model_copy(update={"max_tokens": max_tokens})
+        return llm.with_structured_output(self.spec.schema)
+
+    def runnable_for(self, extra_tokens: int) -> "Runnable":
+        """The runnable whose output limit allows extra_tokens beyond max_output_tokens."""
+        if self.max_output_tokens is None or extra_tokens <= 0:
+            return self.runnable
+        limit = round_up_to_bucket(self.max_output_tokens + extra_tokens)
+        if self._output_token_cap is not None:
+            limit = min(limit, self._output_token_cap)
+        if limit <= self.max_output_tokens:
+            return self.runnable
+        with self._lock:
+            runnable = self._limited.get(limit)
+            if runnable is None:
+                runnable = self._limited[limit] = self._build(limit)
+        return runnable
+
+    @property
+    def version(self) -> str:
+        return self.spec.version
+
+    def format_messages(self, **kwargs: Any) -> List["BaseMessage"]:
+        messages = self.spec.format_messages(**kwargs)
+        if self.cache_system_prompt:
+            messages[0] = self.spec.cached_system_message
+        return messages
+
+
+SINGLE_TURN_PROMPT = PromptSpec(
+    name=SINGLE_TURN,
+    system_prompt="You are a customer support message classifier. Classify the following message into one of the categories: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'.",
+    human_template="Message: '{question}'\nCategory:",
+    schema=ClassifierOutput,
+)
+
+CONVERSATIONAL_PROMPT = PromptSpec(
+    name=CONVERSATIONAL,
+    system_prompt="""You are a conversational customer support intent classifier. Analyze the current message in the context of an ongoing conversation.
+
+Available intents: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'
+
+Determine:
+1. Is this continuing the current active intent or introducing a new one?
+2. What is the specific intent for this message?
+3. How confident are you in this classification?
+
+Intent Transitions:
+- CONTINUE: Following up on the same intent
+- NEW: Introducing a completely new intent
+- CLARIFICATION: Asking for clarification or providing additional details""",
+    human_template="""<conversation_context>
+Current Active Intent: {current_intent}
+Recent Conversation:
+{conversation_context}
+</conversation_context>
+
+<current_message>{current_message}</current_message>
+
+Provide your analysis in the following format:
+- Reasoning for your classification
+- Intent transition type (CONTINUE/NEW/CLARIFICATION)
+- The specific intent category
+- Your confidence level (HIGH/MEDIUM/LOW)""",
+    schema=ConversationalClassifierOutput,
+)
+
+BATCH_PROMPT = PromptSpec(
+    name=BATCH,
+    system_prompt="You are a customer support message classifier. Classify each of the following messages into one of the categories: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'. Return exactly one classification per message, using the index attribute of its <message> tag.",
+    human_template="Messages:\n{messages}",
+    schema=BatchClassifierOutput,
+)
+
+TRANSCRIPT_PROMPT = PromptSpec(
+    name=TRANSCRIPT,
+    system_prompt="""You are a conversational customer support intent classifier. Label every customer turn of a transcript, in order, as if you were classifying each one as it arrived.
+
+Available intents: 'Support, Feedback, Complaint', 'Order Tracking', 'Refund/Exchange'
+
+For each turn, determine its intent, how confident you are, and its transition relative to the intent active just before that turn:
+- CONTINUE: Following up on the same intent
+- NEW: Introducing a completely new intent; it becomes the active intent for the following turns
+- CLARIFICATION: Asking for clarification or providing additional details
+
+Return exactly one label per turn, using the index attribute of its <turn> tag.""",
+    human_template="""<conversation_context>
+Current Active Intent: {current_intent}
+Recent Conversation:
+{conversation_context}
+</conversation_context>
+
+<transcript>
+{turns}
+</transcript>""",
+    schema=TranscriptClassifierOutput,
+)
+
+DEFAULT_PROMPTS: Dict[str, PromptSpec] = {
+    spec.name: spec for spec in (SINGLE_TURN_PROMPT, CONVERSATIONAL_PROMPT, BATCH_PROMPT, TRANSCRIPT_PROMPT)
+}
+
+# Compact mode: the model returns only enum fields (conversational reasoning is
+# optional) and the classifier rebuilds the full outputs from the input.
+COMPACT_PROMPTS: Dict[str, PromptSpec] = {
+    SINGLE_TURN: PromptSpec(
+        name=SINGLE_TURN,
+        system_prompt=SINGLE_TURN_PROMPT.system_prompt,
+        human_template=SINGLE_TURN_PROMPT.human_template,
+        schema=CompactClassifierOutput,
+    ),
+    CONVERSATIONAL: PromptSpec(
+        name=CONVERSATIONAL,
+        system_prompt=CONVERSATIONAL_PROMPT.system_prompt,
+        human_template="""<conversation_context>
+Current Active Intent: {current_intent}
+Recent Conversation:
+{conversation_context}
+</conversation_context>
+
+<current_message>{current_message}</current_message>
+
+Provide the intent transition type (CONTINUE/NEW/CLARIFICATION), the specific intent category and your confidence level (HIGH/MEDIUM/LOW). Add one short sentence of reasoning only if the classification is ambiguous.""",
+        schema=CompactConversationalClassifierOutput,
+    ),
+    BATCH: PromptSpec(
+        name=BATCH,
+        system_prompt=BATCH_PROMPT.system_prompt,
+        human_template=BATCH_PROMPT.human_template,
+        schema=CompactBatchClassifierOutput,
+    ),
+    # Transcript labels are enum fields already.
+    TRANSCRIPT: TRANSCRIPT_PROMPT,
+}
+
+
+class PromptRegistry:
+    """Compiles every prompt against a chat model once and serves it by name.
+
+    ``output_limits`` optionally caps output tokens per prompt name, never above
+    ``output_token_cap``. ``cache_system_prompts`` adds a prompt-cache point
+    after every system prompt whose prefix reaches ``cache_min_tokens``.
+    """
+
+    def __init__(self, llm: "BaseChatModel", prompts: Dict[str, PromptSpec] = DEFAULT_PROMPTS, output_limits: Optional[Dict[str, int]] = None, output_token_cap: Optional[int] = None, cache_system_prompts: bool = False, cache_min_tokens: int = 0):
+        output_limits = output_limits or {}
+        self._compiled: Dict[str, CompiledPrompt] = {}
+        for name, spec in prompts.items():
+            limit = output_limits.get(name)
+            if limit is not None:
+                limit = round_up_to_bucket(limit)
+                limit = min(limit, output_token_cap) if output_token_cap is not None else limit
+            self._compiled[name] = CompiledPrompt(
+                spec, llm, max_output_tokens=limit, output_token_cap=output_token_cap, cache_system_prompt=cache_system_prompts, cache_min_tokens=cache_min_tokens
+            )
+
+    def __getitem__(self, name: str) -> CompiledPrompt:
+        return self._compiled[name]
+
+    def version(self, name: str) -> str:
+        return self._compiled[name].version
+
+    def versions(self) -> Dict[str, str]:
+        return {name: compiled.version for name, compiled in self._compiled.items()}
@@ -0,0 +1,282 @@
+"""
+Append-only recordings of LLM calls, for replaying production traffic offline.
+
+A recording is one data file of records, each holding the prompt key, the
+call latency, the structured response as JSON and the prompt messages as
+zlib-compressed JSON::
+
+    b"AICREC1\\n"
+    ( <16-byte key> <latency: f64> <response length: u32> <prompt length: u32> response prompt )*
+
+The key is a 16-byte BLAKE2b digest of the output schema name and the text of
+every prompt message, so it does not change with prompt-cache points. Every
+record is written with a single ``write`` on a file opened for appending,
+under a shared ``flock``, so several processes can record into the same file.
+
+Lookups go through a sidecar index (``<path>.idx``) of ``(key, offset)``
+entries sorted by key. ``Recording`` memory-maps both files and
+binary-searches the index, so a lookup reads O(log n) index entries and one
+record no matter how large the recording is. The index notes the data size it
+was built from and where the complete records end, and is rebuilt when the
+recording has changed size since. A record left half-written by a crash is
+cut off by the next ``RecordingWriter`` to open the file, under an exclusive
+``flock`` that waits out every append in progress, so later appends are not
+garbled. Readers never modify the recording; they index around a torn record.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ai_classifier_sample.config.settings import Settings
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+try:
+    import fcntl
+except ImportError:  # Windows: without advisory locks, writers leave torn records alone.
+    fcntl = None  # type: ignore[assignment]
+
+DATA_MAGIC = b"AICREC1\n"
+INDEX_MAGIC = b"AICIDX2\n"
+
+_RECORD = struct.Struct("<16sdII")
+# Magic, the data size the index was built from and the end of its last complete record.
+_INDEX_HEADER = struct.Struct("<8sQQ")
+_ENTRY = struct.Struct("<16sQ")
+
+
+class RecordingFormatError(ValueError):
+    """A file is not a recording or its index, or is truncated."""
+
+
+def prompt_key(schema: str, messages: Sequence["BaseMessage"]) -> bytes:
+    """The lookup key of a call: a digest of the output schema name and the prompt text."""
+    digest = hashlib.blake2b(schema.encode(), digest_size=16)
+    for message in messages:
+        digest.update(b"\x1e" + message.type.encode() + b"\x1f" + message.text().encode())
+    return digest.digest()
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+class RecordingWriter:
+    """Appends calls to a recording; safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        if self._file.tell() == 0:
+            self._file.write(DATA_MAGIC)
+            self._file.flush()
+        else:
+            with open(path, "rb") as existing:
+                if existing.read(len(DATA_MAGIC)) != DATA_MAGIC:
+                    self._file.close()
+                    raise RecordingFormatError(f"{path} is not a recording")
+            size = self._file.tell()
+            if fcntl is not None and _index_covers(path, size) != (size, size):
+                # Appending after a torn record would misalign every record after it. The
+                # exclusive lock waits for other writers' appends, so what is left is torn.
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+                try:
+                    truncate_partial_record(path)
+                finally:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def append(self, schema: str, messages: Sequence["BaseMessage"], response: Dict[str, Any], latency: float) -> None:
+        """Record one call: its prompt, the structured response and how long the model took."""
+        body = json.dumps(response, separators=(",", ":")).encode()
+        prompt = zlib.compress(json.dumps(
+            {"schema": schema, "messages": [[message.type, message.text()] for message in messages]}, separators=(",", ":")
+        ).encode())
+        record = _RECORD.pack(prompt_key(schema, messages), latency, len(body), len(prompt)) + body + prompt
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_SH)
+            try:
+                self._file.write(record)
+                self._file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        """Close the file and write its index, so replay does not have to build it."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+        build_index(self.path)
+
+
+def _scan(data: mmap.mmap) -> Tuple[List[Tuple[bytes, int]], int]:
+    """(key, offset) of every complete record and the offset where the complete records end."""
+    entries = []
+    offset = len(DATA_MAGIC)
+    while offset + _RECORD.size <= len(data):
+        key, _, body_length, prompt_length = _RECORD.unpack_from(data, offset)
+        end = offset + _RECORD.size + body_length + prompt_length
+        if end > len(data):
+            break
+        entries.append((key, offset))
+        offset = end
+    return entries, offset
+
+
+def truncate_partial_record(path: str) -> int:
+    """Cut off a record left half-written at the end of the recording, e.g. by a crash; returns the bytes removed.
+
+    Only safe while no other process is appending; RecordingWriter calls it
+    under an exclusive lock.
+    """
+    with open(path, "r+b") as file:
+        if file.read(len(DATA_MAGIC)) != DATA_MAGIC:
+            raise RecordingFormatError(f"{path} is not a recording")
+        size = os.fstat(file.fileno()).st_size
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            covered = _scan(data)[1]
+        if covered < size:
+            file.truncate(covered)
+    return size - covered
+
+
+def _index_covers(path: str, size: int) -> Optional[Tuple[int, int]]:
+    """(data size, end of complete records) of the index at path if it was built from size bytes, else None."""
+    try:
+        with open(index_path(path), "rb") as file:
+            magic, indexed, covered = _INDEX_HEADER.unpack(file.read(_INDEX_HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return None
+    return (indexed, covered) if magic == INDEX_MAGIC and indexed == size else None
+
+
+def build_index(path: str) -> int:
+    """Write the sorted index of the recording at path and return its number of records.
+
+    A record still being written at the end of the file is left out.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(DATA_MAGIC)) != DATA_MAGIC:
+            raise RecordingFormatError(f"{path} is not a recording")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            entries, covered = _scan(data)
+            size = len(data)
+    entries.sort()
+
+    temporary = index_path(path) + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(_INDEX_HEADER.pack(INDEX_MAGIC, size, covered))
+        file.write(b"".join(_ENTRY.pack(key, offset) for key, offset in entries))
+    os.replace(temporary, index_path(path))
+    return len(entries)
+
+
+def iter_records(path: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+    """(prompt, response, latency) of every complete record, in the order they were written.
+
+    The prompt holds the schema name and the [type, text] pair of each message.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(DATA_MAGIC)) != DATA_MAGIC:
+            raise RecordingFormatError(f"{path} is not a recording")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for _, offset in _scan(data)[0]:
+                _, latency, body_length, prompt_length = _RECORD.unpack_from(data, offset)
+                start = offset + _RECORD.size
+                response = json.loads(data[start:start + body_length])
+                prompt = json.loads(zlib.decompress(data[start + body_length:start + body_length + prompt_length]))
+                yield prompt, response, latency
+
+
+class Recording:
+    """Read-only, memory-mapped view of a recording with indexed lookups by prompt key.
+
+    A prompt recorded several times is answered with each of its recorded
+    responses in turn.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data_file = open(path, "rb")
+        if self._data_file.read(len(DATA_MAGIC)) != DATA_MAGIC:
+            self._data_file.close()
+            raise RecordingFormatError(f"{path} is not a recording")
+        # A torn last record is left out of the index but kept in the file; only writers cut it.
+        if _index_covers(path, os.fstat(self._data_file.fileno()).st_size) is None:
+            build_index(path)
+        self._index_file = open(index_path(path), "rb")
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = (len(self._index) - _INDEX_HEADER.size) // _ENTRY.size
+        self._served: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key_at(self, position: int) -> bytes:
+        start = _INDEX_HEADER.size + position * _ENTRY.size
+        return self._index[start:start + 16]
+
+    def _bound(self, key: bytes, upper: bool) -> int:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._key_at(middle)
+            if probe < key or (upper and probe == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, key: bytes) -> Optional[Tuple[Dict[str, Any], float]]:
+        """The next recorded (response, latency) for key, or None if the prompt was never recorded."""
+        first = self._bound(key, upper=False)
+        if first == self._count or self._key_at(first) != key:
+            return None
+        matches = self._bound(key, upper=True) - first
+        if matches == 1:
+            position = first
+        else:
+            with self._lock:
+                served = self._served.get(key, 0)
+                self._served[key] = served + 1
+            position = first + served % matches
+
+        _, offset = _ENTRY.unpack_from(self._index, _INDEX_HEADER.size + position * _ENTRY.size)
+        _, latency, body_length, _ = _RECORD.unpack_from(self._data, offset)
+        start = offset + _RECORD.size
+        return json.loads(self._data[start:start + body_length]), latency
+
+    def prompt(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """The schema name and prompt messages first recorded for key."""
+        first = self._bound(key, upper=False)
+        if first == self._count or self._key_at(first) != key:
+            return None
+        _, offset = _ENTRY.unpack_from(self._index, _INDEX_HEADER.size + first * _ENTRY.size)
+        _, _, body_length, prompt_length = _RECORD.unpack_from(self._data, offset)
+        start = offset + _RECORD.size + body_length
+        return json.loads(zlib.decompress(self._data[start:start + prompt_length]))
+
+    def close(self) -> None:
+        self._index.close()
+        self._data.close()
+        self._index_file.close()
+        self._data_file.close()
+
+
+def build_recorder(settings: Settings) -> Optional[RecordingWriter]:
+    """The writer for settings.record_path, or None when recording is off."""
+    if not settings.record_path:
+        return None
+    return RecordingWriter(settings.record_path)
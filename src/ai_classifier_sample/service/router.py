@@ -0,0 +1,238 @@
+"""
+Routing of LLM calls across several regions and models.
+
+An ``EndpointRouter`` holds one ``RoutedEndpoint`` per configured
+``Endpoint``. Each call goes to the healthy endpoint with the lowest score:
+
+- ``least_outstanding``: requests in flight, divided by the endpoint weight.
+- ``ewma``: the exponentially weighted moving average of its latency, scaled
+  by requests in flight and divided by the weight. Endpoints without a
+  latency sample yet score zero, so each is tried early.
+
+Every endpoint has a circuit breaker. After ``failure_threshold``
+consecutive throttling or transient errors it is ejected (open) for
+``reset_seconds``; then a single trial call is let through (half-open), and
+its outcome closes or re-opens the circuit. A call that fails with such an
+error is retried on the next best endpoint it has not tried yet, so callers
+only see the error if every endpoint failed.
+"""
+
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Literal, Optional, Set, TypeVar
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.config.settings import Endpoint, Settings
+from ai_classifier_sample.service.scheduler import is_retryable_error
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+T = TypeVar("T")
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class NoHealthyEndpointError(ConnectionError):
+    """Every endpoint is ejected or has already failed this call."""
+
+
+class EndpointStats(BaseModel):
+    name: str = Field(..., description="Endpoint label")
+    region: str = Field(..., description="Cloud provider region")
+    model_arn: str = Field(..., description="Model served by the endpoint")
+    weight: float = Field(..., description="Relative share of traffic")
+    state: CircuitState = Field("closed", description="Circuit breaker state")
+    outstanding: int = Field(0, description="Calls in flight")
+    requests: int = Field(0, description="Calls routed to the endpoint")
+    failures: int = Field(0, description="Calls that failed with a throttling or transient error")
+    failovers: int = Field(0, description="Failed calls that were retried on another endpoint")
+    ejections: int = Field(0, description="Times the circuit opened")
+    ewma_latency_seconds: float = Field(0.0, description="Moving average latency of successful calls")
+
+
+class RoutedEndpoint:
+    """An endpoint's chat model, created on first use, with its load and health state."""
+
+    def __init__(self, endpoint: Endpoint, settings: Settings, llm: Optional["BaseChatModel"] = None):
+        self.endpoint = endpoint
+        self.settings = settings.model_copy(update={"cloud_region": endpoint.region, "model_arn": endpoint.model_arn})
+        self._llm = llm
+        self._llm_lock = threading.Lock()
+
+        # Guarded by the router's lock.
+        self.state: CircuitState = "closed"
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.ewma_latency: Optional[float] = None
+        self.stats = EndpointStats(name=endpoint.label, region=endpoint.region, model_arn=endpoint.model_arn, weight=endpoint.weight)
+
+    @property
+    def name(self) -> str:
+        return self.endpoint.label
+
+    @property
+    def llm(self) -> "BaseChatModel":
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    from ai_classifier_sample.providers.bedrock import get_client_factory
+
+                    self._llm = get_client_factory().chat_model(self.settings)
+        return self._llm
+
+
+class EndpointRouter:
+    """Thread-safe load balancer with per-endpoint circuit breakers and failover."""
+
+    def __init__(
+        self,
+        endpoints: List[RoutedEndpoint],
+        strategy: Literal["least_outstanding", "ewma"] = "least_outstanding",
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+    ):
+        if not endpoints:
+            raise ValueError("EndpointRouter needs at least one endpoint")
+        names = [endpoint.name for endpoint in endpoints]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Endpoint names must be unique, got {names}")
+        self.endpoints = endpoints
+        self.strategy = strategy
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+
+    def _score(self, endpoint: RoutedEndpoint) -> float:
+        load = endpoint.outstanding + 1
+        if self.strategy == "ewma":
+            return (endpoint.ewma_latency or 0.0) * load / endpoint.endpoint.weight
+        return load / endpoint.endpoint.weight
+
+    def _admits(self, endpoint: RoutedEndpoint, now: float) -> bool:
+        if endpoint.state == "closed":
+            return True
+        # An open circuit lets one trial call through once it has rested; the trial holds half-open.
+        return endpoint.state == "open" and now - endpoint.opened_at >= self.reset_seconds
+
+    def acquire(self, exclude: Optional[Set[str]] = None) -> RoutedEndpoint:
+        """Pick the best admissible endpoint not in exclude and count a call in flight on it."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                endpoint for endpoint in self.endpoints
+                if (not exclude or endpoint.name not in exclude) and self._admits(endpoint, now)
+            ]
+            if not candidates:
+                raise NoHealthyEndpointError("No healthy endpoint is available")
+            endpoint = min(candidates, key=self._score)
+            if endpoint.state == "open":
+                endpoint.state = "half_open"
+            endpoint.outstanding += 1
+            endpoint.stats.requests += 1
+            return endpoint
+
+    def release(self, endpoint: RoutedEndpoint, latency: Optional[float] = None, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a call; errors that are not the endpoint's fault leave its health alone."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                if latency is not None:
+                    previous = endpoint.ewma_latency
+                    endpoint.ewma_latency = latency if previous is None else previous + self.ewma_alpha * (latency - previous)
+                endpoint.consecutive_failures = 0
+                endpoint.state = "closed"
+            elif is_retryable_error(error):
+                endpoint.stats.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.state == "half_open" or endpoint.consecutive_failures >= self.failure_threshold:
+                    if endpoint.state != "open":
+                        endpoint.stats.ejections += 1
+                    endpoint.state = "open"
+                    endpoint.opened_at = time.monotonic()
+            elif endpoint.state == "half_open":
+                # A cancelled trial says nothing about the endpoint; any other error means the model answered.
+                endpoint.state = "open" if isinstance(error, asyncio.CancelledError) else "closed"
+
+    def _next(self, tried: Set[str], failed: Optional[RoutedEndpoint], error: Optional[Exception]) -> RoutedEndpoint:
+        """The endpoint for the next attempt of a call; re-raises error if there is none to fail over to."""
+        if error is not None and not is_retryable_error(error):
+            raise error
+        try:
+            endpoint = self.acquire(exclude=tried)
+        except NoHealthyEndpointError:
+            if error is not None:
+                raise error
+            raise
+        if failed is not None:
+            with self._lock:
+                failed.stats.failovers += 1
+        return endpoint
+
+    def call(self, fn: Callable[[RoutedEndpoint], T]) -> T:
+        """Run fn on the best endpoint, failing over to the others on retryable errors."""
+        tried: Set[str] = set()
+        failed: Optional[RoutedEndpoint] = None
+        error: Optional[Exception] = None
+        while True:
+            endpoint = self._next(tried, failed, error)
+            start = time.perf_counter()
+            try:
+                result = fn(endpoint)
+            except Exception as exc:
+                self.release(endpoint, error=exc)
+                tried.add(endpoint.name)
+                failed, error = endpoint, exc
+                continue
+            self.release(endpoint, latency=time.perf_counter() - start)
+            return result
+
+    async def acall(self, fn: Callable[[RoutedEndpoint], Awaitable[T]]) -> T:
+        """Async variant of call."""
+        tried: Set[str] = set()
+        failed: Optional[RoutedEndpoint] = None
+        error: Optional[Exception] = None
+        while True:
+            endpoint = self._next(tried, failed, error)
+            start = time.perf_counter()
+            try:
+                result = await fn(endpoint)
+            except asyncio.CancelledError as exc:
+                self.release(endpoint, error=exc)
+                raise
+            except Exception as exc:
+                self.release(endpoint, error=exc)
+                tried.add(endpoint.name)
+                failed, error = endpoint, exc
+                continue
+            self.release(endpoint, latency=time.perf_counter() - start)
+            return result
+
+    def stats(self) -> List[EndpointStats]:
+        with self._lock:
+            return [
+                endpoint.stats.model_copy(update={
+                    "state": endpoint.state,
+                    "outstanding": endpoint.outstanding,
+                    "ewma_latency_seconds": endpoint.ewma_latency or 0.0,
+                })
+                for endpoint in self.endpoints
+            ]
+
+
+def build_router(settings: Settings) -> Optional[EndpointRouter]:
+    """Create the router for settings.endpoints, or None when no endpoints are configured."""
+    if not settings.endpoints:
+        return None
+    return EndpointRouter(
+        [RoutedEndpoint(endpoint, settings) for endpoint in settings.endpoints],
+        strategy=settings.router_strategy,
+        ewma_alpha=settings.router_ewma_alpha,
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_seconds=settings.circuit_reset_seconds,
+    )
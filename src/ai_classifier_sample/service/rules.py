@@ -0,0 +1,183 @@
+"""
+Rule-based pre-classifier that answers unambiguous messages without the LLM.
+
+Rules are loaded from a JSON file and compiled once: every keyword from every
+rule goes into a single Aho-Corasick automaton, so matching costs one pass
+over the message regardless of how many keywords are configured. Regex
+patterns are compiled alongside. A rule fires when any of its keywords and
+any of its patterns match (an empty group is ignored); the message is served
+locally only if the fired rules agree on one category with enough confidence.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Set
+
+from pydantic import BaseModel, Field, model_validator
+
+from ai_classifier_sample.config.settings import Settings
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / "config" / "rules.json"
+
+
+class Rule(BaseModel):
+    name: str = Field(..., description="Identifier reported when the rule fires")
+    category: str = Field(..., description="Category assigned when the rule fires")
+    keywords: List[str] = Field(default_factory=list, description="Case-insensitive phrases; any one must appear")
+    patterns: List[str] = Field(default_factory=list, description="Regular expressions; any one must match")
+    confidence: float = Field(..., ge=0, le=1, description="Confidence reported when the rule fires")
+
+    @model_validator(mode="after")
+    def _require_condition(self) -> "Rule":
+        if not self.keywords and not self.patterns:
+            raise ValueError(f"Rule '{self.name}' needs at least one keyword or pattern")
+        return self
+
+
+class RuleMatch(BaseModel):
+    category: str = Field(..., description="Category assigned by the rules")
+    confidence: float = Field(..., description="Confidence of the strongest fired rule")
+    rules: List[str] = Field(..., description="Names of the rules that fired")
+
+
+class RuleStats(BaseModel):
+    evaluated: int = Field(0, description="Messages checked against the rules")
+    served_locally: int = Field(0, description="Messages answered without calling the LLM")
+    local_seconds: float = Field(0.0, description="Time spent evaluating rules for locally served messages")
+    average_llm_seconds: float = Field(0.0, description="Mean latency of recent LLM classifications")
+
+    @property
+    def local_fraction(self) -> float:
+        return self.served_locally / self.evaluated if self.evaluated else 0.0
+
+    @property
+    def latency_saved_seconds(self) -> float:
+        return max(self.served_locally * self.average_llm_seconds - self.local_seconds, 0.0)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lower-cased keywords, matching at word starts."""
+
+    def __init__(self, keywords: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword.lower())
+
+        # Breadth-first, so every failure link points at an already-finished shallower state.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Set[str]:
+        """Return the keywords that occur in text starting at a word boundary."""
+        text = text.lower()
+        found: Set[str] = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._output[state]:
+                start = position - len(keyword) + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    found.add(keyword)
+        return found
+
+
+class RuleClassifier:
+    """Compiled rule set with served-locally and latency-saved accounting."""
+
+    # LLM latency is averaged over this many recent calls.
+    LATENCY_WINDOW = 100
+
+    def __init__(self, rules: List[Rule], min_confidence: float = 0.9):
+        self.rules = rules
+        self.min_confidence = min_confidence
+        self._automaton = KeywordAutomaton([keyword for rule in rules for keyword in rule.keywords])
+        self._keywords: List[Set[str]] = [{keyword.lower() for keyword in rule.keywords} for rule in rules]
+        self._patterns: List[List[Pattern[str]]] = [[re.compile(pattern, re.IGNORECASE) for pattern in rule.patterns] for rule in rules]
+
+        self._lock = threading.Lock()
+        self._evaluated = 0
+        self._served = 0
+        self._local_seconds = 0.0
+        self._llm_latencies: deque = deque(maxlen=self.LATENCY_WINDOW)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None, min_confidence: float = 0.9) -> "RuleClassifier":
+        with open(path or DEFAULT_RULES_PATH, encoding="utf-8") as handle:
+            data = json.load(handle)
+        return cls([Rule(**rule) for rule in data["rules"]], min_confidence=min_confidence)
+
+    def match(self, message: str) -> Optional[RuleMatch]:
+        """Return a confident, unambiguous match, or None to defer to the LLM."""
+        start = time.perf_counter()
+        keyword_hits = self._automaton.search(message)
+
+        fired: List[Rule] = []
+        for rule, keywords, patterns in zip(self.rules, self._keywords, self._patterns):
+            if keywords and not keywords & keyword_hits:
+                continue
+            if patterns and not any(pattern.search(message) for pattern in patterns):
+                continue
+            fired.append(rule)
+
+        result: Optional[RuleMatch] = None
+        # Rules pointing at different categories mean the message is ambiguous.
+        if fired and len({rule.category for rule in fired}) == 1:
+            confidence = max(rule.confidence for rule in fired)
+            if confidence >= self.min_confidence:
+                result = RuleMatch(category=fired[0].category, confidence=confidence, rules=[rule.name for rule in fired])
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._evaluated += 1
+            if result is not None:
+                self._served += 1
+                self._local_seconds += elapsed
+        return result
+
+    def record_llm_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._llm_latencies.append(seconds)
+
+    def stats(self) -> RuleStats:
+        with self._lock:
+            average = sum(self._llm_latencies) / len(self._llm_latencies) if self._llm_latencies else 0.0
+            return RuleStats(
+                evaluated=self._evaluated,
+                served_locally=self._served,
+                local_seconds=self._local_seconds,
+                average_llm_seconds=average,
+            )
+
+
+def build_rule_classifier(settings: Settings) -> Optional[RuleClassifier]:
+    """Load and compile the configured rules, or None when the fast path is disabled."""
+    if not settings.rules_enabled:
+        return None
+    return RuleClassifier.from_file(settings.rules_path, min_confidence=settings.rules_min_confidence)
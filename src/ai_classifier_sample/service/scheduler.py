@@ -0,0 +1,406 @@
+"""
+Client-side scheduling of LLM calls.
+
+Every chat model call a ``MessageClassifier`` makes goes through an
+``LLMScheduler``, which combines three things:
+
+- An ``AdaptiveLimiter`` caps the calls in flight. In adaptive mode it works
+  like TCP's AIMD congestion control: each success raises the limit by about
+  one per limit's worth of calls, and a throttling error multiplies it by a
+  backoff ratio. Throttles from calls started before the last decrease are
+  ignored, so one burst of rejections shrinks the limit only once.
+- Throttling and transient errors are retried with full-jitter exponential
+  backoff, within a total deadline that also covers waiting for a slot.
+- Async calls can be hedged: if a call is still running after the recent p95
+  latency, a second identical call is started when the limiter has a free
+  slot, and whichever finishes first wins.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.config.settings import Settings
+
+T = TypeVar("T")
+
+THROTTLING_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+})
+TRANSIENT_ERROR_CODES = frozenset({
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+})
+
+
+class ThrottlingError(Exception):
+    """The service rejected a call because it is over its rate or capacity limit."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """An LLM call, including its retries, did not finish within its deadline."""
+
+
+def error_code(exc: BaseException) -> Optional[str]:
+    """The AWS error code of a botocore ClientError, or None for other exceptions."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        return (response.get("Error") or {}).get("Code")
+    return None
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    return isinstance(exc, ThrottlingError) or error_code(exc) in THROTTLING_ERROR_CODES
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    if is_throttling_error(exc) or error_code(exc) in TRANSIENT_ERROR_CODES:
+        return True
+    # Read timeouts and dropped connections, from botocore or the standard library.
+    return isinstance(exc, (TimeoutError, ConnectionError)) or type(exc).__name__ in ("ReadTimeoutError", "EndpointConnectionError")
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class SchedulerStats(BaseModel):
+    concurrency_limit: float = Field(0.0, description="Current limit on calls in flight")
+    in_flight: int = Field(0, description="Calls holding a slot right now, hedges included")
+    calls: int = Field(0, description="Scheduled calls, each counted once however often it was retried")
+    succeeded: int = Field(0, description="Scheduled calls that returned a result")
+    failed: int = Field(0, description="Scheduled calls that raised after their last attempt")
+    throttles: int = Field(0, description="Attempts rejected with a throttling error")
+    retries: int = Field(0, description="Attempts made after a retryable error")
+    deadline_exceeded: int = Field(0, description="Scheduled calls that ran out of time")
+    hedges: int = Field(0, description="Hedged attempts started")
+    hedge_wins: int = Field(0, description="Hedged attempts that finished before the original")
+    p95_latency_seconds: float = Field(0.0, description="95th percentile latency of recent successful attempts")
+
+
+class AdaptiveLimiter:
+    """Concurrency limit shared by threads and event loops, optionally adjusted by AIMD.
+
+    Sync callers block on a condition; async callers wait on a future that is
+    resolved through its own loop, so one limiter can serve both at once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        backoff_ratio: float = 0.5,
+        adaptive: bool = True,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit or initial_limit, initial_limit)
+        self.backoff_ratio = backoff_ratio
+        self.adaptive = adaptive
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = deque()
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _has_capacity(self) -> bool:
+        return self._in_flight < max(int(self._limit), 1)
+
+    def _wake(self) -> None:
+        # Called with the lock held whenever a slot frees up or the limit grows.
+        self._cond.notify_all()
+        free = max(int(self._limit), 1) - self._in_flight
+        while free > 0 and self._waiters:
+            loop, future = self._waiters.popleft()
+            if future.done() or loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(_resolve, future)
+            free -= 1
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free right now."""
+        with self._cond:
+            if not self._has_capacity():
+                return False
+            self._in_flight += 1
+            return True
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a slot is free; False if timeout seconds pass first."""
+        with self._cond:
+            if not self._cond.wait_for(self._has_capacity, timeout=timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a slot is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._has_capacity():
+                    self._in_flight += 1
+                    return
+                future: "asyncio.Future[None]" = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._cond:
+                    if (loop, future) in self._waiters:
+                        self._waiters.remove((loop, future))
+                    else:
+                        # This waiter was woken for a slot it will not take; pass it on.
+                        self._wake()
+                raise
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._wake()
+
+    def on_success(self) -> None:
+        """Additive increase: about one more slot per limit's worth of successful calls."""
+        if not self.adaptive:
+            return
+        with self._cond:
+            grown = min(self._limit + 1.0 / self._limit, float(self.max_limit))
+            if int(grown) > int(self._limit):
+                self._limit = grown
+                self._wake()
+            else:
+                self._limit = grown
+
+    def on_throttle(self, started_at: float) -> None:
+        """Multiplicative decrease, once per burst of throttles."""
+        if not self.adaptive:
+            return
+        with self._cond:
+            if started_at < self._last_decrease:
+                return
+            self._limit = max(self._limit * self.backoff_ratio, float(self.min_limit))
+            self._last_decrease = time.monotonic()
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMScheduler:
+    """Runs LLM calls under an AdaptiveLimiter with retries, a deadline and optional hedging."""
+
+    def __init__(
+        self,
+        limiter: AdaptiveLimiter,
+        max_retries: int = 2,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        deadline_seconds: Optional[float] = 60.0,
+        hedging: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+        rng: Optional[random.Random] = None,
+    ):
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds or None
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._stats = SchedulerStats()
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for name, amount in increments.items():
+                setattr(self._stats, name, getattr(self._stats, name) + amount)
+
+    def _latency_percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            if not self._latencies:
+                return None
+            return _percentile(sorted(self._latencies), fraction)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a running call is hedged, or None if hedging is off or unwarmed."""
+        if not self.hedging or len(self._latencies) < self.hedge_min_samples:
+            return None
+        return self._latency_percentile(self.hedge_percentile)
+
+    def _deadline(self) -> Optional[float]:
+        return time.monotonic() + self.deadline_seconds if self.deadline_seconds else None
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _backoff(self, attempt: int) -> float:
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _on_success(self, started_at: float) -> None:
+        self.limiter.on_success()
+        with self._lock:
+            self._latencies.append(time.monotonic() - started_at)
+
+    def _next_delay(self, exc: Exception, attempt: int, started_at: float, deadline: Optional[float]) -> float:
+        """Backoff before the next attempt, or re-raise if exc is final."""
+        if is_throttling_error(exc):
+            self._count(throttles=1)
+            self.limiter.on_throttle(started_at)
+        if not is_retryable_error(exc) or attempt >= self.max_retries:
+            self._count(failed=1)
+            raise exc
+        delay = self._backoff(attempt)
+        remaining = self._remaining(deadline)
+        if remaining is not None and delay >= remaining:
+            self._count(failed=1, deadline_exceeded=1)
+            raise DeadlineExceededError(f"LLM call would exceed its {self.deadline_seconds}s deadline") from exc
+        self._count(retries=1)
+        return delay
+
+    def _deadline_error(self, cause: Optional[BaseException] = None) -> DeadlineExceededError:
+        self._count(failed=1, deadline_exceeded=1)
+        error = DeadlineExceededError(f"LLM call did not finish within its {self.deadline_seconds}s deadline")
+        error.__cause__ = cause
+        return error
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run fn under the limiter, retrying throttling and transient errors.
+
+        The deadline bounds waiting for a slot and backing off; a call already
+        in progress cannot be interrupted from another thread. Sync calls are
+        never hedged.
+        """
+        self._count(calls=1)
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            remaining = self._remaining(deadline)
+            if (remaining is not None and remaining <= 0) or not self.limiter.acquire(timeout=remaining):
+                raise self._deadline_error()
+            started_at = time.monotonic()
+            try:
+                result = fn()
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, started_at, deadline)
+            else:
+                self._on_success(started_at)
+                self._count(succeeded=1)
+                return result
+            finally:
+                self.limiter.release()
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of call; attempts are cancelled at the deadline and may be hedged."""
+        self._count(calls=1)
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            try:
+                await asyncio.wait_for(self.limiter.aacquire(), timeout=self._remaining(deadline))
+            except asyncio.TimeoutError as exc:
+                raise self._deadline_error(exc) from exc
+            started_at = time.monotonic()
+            try:
+                result = await asyncio.wait_for(self._ahedged(fn), timeout=self._remaining(deadline))
+            except asyncio.TimeoutError as exc:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise self._deadline_error(exc) from exc
+                delay = self._next_delay(exc, attempt, started_at, deadline)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, started_at, deadline)
+            else:
+                self._on_success(started_at)
+                self._count(succeeded=1)
+                return result
+            finally:
+                self.limiter.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _ahedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        # Hedges only use spare capacity, so they never queue behind other calls.
+        if done or not self.limiter.try_acquire():
+            return await primary
+
+        self._count(hedges=1)
+        hedge = asyncio.ensure_future(fn())
+        try:
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count(hedge_wins=1)
+                        return task.result()
+            # Both attempts failed; report the original's error.
+            raise primary.exception()  # type: ignore[misc]
+        finally:
+            primary.cancel()
+            hedge.cancel()
+            self.limiter.release()
+
+    def stats(self) -> SchedulerStats:
+        p95 = self._latency_percentile(0.95) or 0.0
+        with self._lock:
+            return self._stats.model_copy(update={
+                "concurrency_limit": self.limiter.limit,
+                "in_flight": self.limiter.in_flight,
+                "p95_latency_seconds": p95,
+            })
+
+
+def build_scheduler(settings: Settings) -> LLMScheduler:
+    """Create the LLM scheduler described by settings."""
+    limiter = AdaptiveLimiter(
+        initial_limit=settings.max_concurrency,
+        min_limit=settings.adaptive_min_concurrency,
+        max_limit=settings.adaptive_max_concurrency,
+        backoff_ratio=settings.adaptive_backoff_ratio,
+        adaptive=settings.adaptive_concurrency_enabled,
+    )
+    return LLMScheduler(
+        limiter,
+        max_retries=settings.llm_max_retries,
+        base_delay=settings.llm_retry_base_delay,
+        max_delay=settings.llm_retry_max_delay,
+        deadline_seconds=settings.llm_deadline_seconds,
+        hedging=settings.hedging_enabled,
+        hedge_percentile=settings.hedge_latency_percentile,
+        hedge_min_samples=settings.hedge_min_samples,
+    )
@@ -0,0 +1,194 @@
+"""
+Conversation session stores keyed by conversation id.
+
+A store hands out a ``ConversationState`` together with a version number and
+only accepts the updated state back if the version is unchanged, so two
+workers appending to the same conversation cannot silently overwrite each
+other (optimistic concurrency). ``MemorySessionStore`` is an in-process
+LRU with an idle TTL; ``SQLiteSessionStore`` is a WAL-mode file that several
+worker processes on one host can share.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.service.conversation import ConversationState
+
+
+class ConcurrentModificationError(Exception):
+    """Raised when a session changed between load and save."""
+
+
+class SessionStore(ABC):
+    """Interface for conversation session stores."""
+
+    # Whether calls wait on disk, so async callers run them in a worker thread.
+    blocking = False
+
+    @abstractmethod
+    def load(self, conversation_id: str) -> Tuple[ConversationState, int]:
+        """Return the session state and its version; unknown ids get a fresh state at version 0.
+
+        Fresh states come from the store's ``state_factory``.
+        """
+
+    @abstractmethod
+    def save(self, conversation_id: str, state: ConversationState, expected_version: int) -> int:
+        """Store state if the session is still at expected_version and return the new version.
+
+        Raises ConcurrentModificationError if another writer got there first.
+        """
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> None:
+        """Drop a session."""
+
+    @abstractmethod
+    def expire_idle(self, max_idle_seconds: Optional[float] = None) -> int:
+        """Drop every session idle for longer than max_idle_seconds (default: the store TTL)."""
+
+    def close(self) -> None:
+        """Release any file or connection the store holds."""
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU session store with an idle TTL."""
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: Optional[float] = 1800.0, state_factory: Callable[[], ConversationState] = ConversationState):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.state_factory = state_factory
+        # Snapshots rather than live objects, so a caller's unsaved changes never leak into the store.
+        self._sessions: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_expired(self, updated_at: float, now: float, max_idle_seconds: Optional[float]) -> bool:
+        return bool(max_idle_seconds) and updated_at < now - max_idle_seconds  # type: ignore[operator]
+
+    def load(self, conversation_id: str) -> Tuple[ConversationState, int]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(conversation_id)
+            if entry is None or self._is_expired(entry[2], now, self.ttl_seconds):
+                self._sessions.pop(conversation_id, None)
+                return self.state_factory(), 0
+            self._sessions.move_to_end(conversation_id)
+            snapshot, version, _ = entry
+        return ConversationState.from_dict(snapshot), version
+
+    def save(self, conversation_id: str, state: ConversationState, expected_version: int) -> int:
+        snapshot = state.to_dict()
+        with self._lock:
+            entry = self._sessions.get(conversation_id)
+            current_version = entry[1] if entry is not None else 0
+            if current_version != expected_version:
+                raise ConcurrentModificationError(
+                    f"Conversation '{conversation_id}' is at version {current_version}, expected {expected_version}"
+                )
+            self._sessions[conversation_id] = (snapshot, expected_version + 1, time.monotonic())
+            self._sessions.move_to_end(conversation_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return expected_version + 1
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(conversation_id, None)
+
+    def expire_idle(self, max_idle_seconds: Optional[float] = None) -> int:
+        max_idle_seconds = self.ttl_seconds if max_idle_seconds is None else max_idle_seconds
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._sessions.items() if self._is_expired(entry[2], now, max_idle_seconds)]
+            for key in expired:
+                del self._sessions[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store in a WAL-mode SQLite file, shared by the worker processes on a host."""
+
+    blocking = True
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = 1800.0, state_factory: Callable[[], ConversationState] = ConversationState):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.state_factory = state_factory
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "conversation_id TEXT PRIMARY KEY, version INTEGER NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def load(self, conversation_id: str) -> Tuple[ConversationState, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, version, updated_at FROM sessions WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        if row is None:
+            return self.state_factory(), 0
+        state, version, updated_at = row
+        if self.ttl_seconds and updated_at < time.time() - self.ttl_seconds:
+            # Expired sessions restart from scratch; the stale row is overwritten on the next save.
+            return self.state_factory(), version
+        return ConversationState.from_dict(json.loads(state)), version
+
+    def save(self, conversation_id: str, state: ConversationState, expected_version: int) -> int:
+        payload = json.dumps(state.to_dict())
+        now = time.time()
+        with self._lock:
+            if expected_version == 0:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO sessions (conversation_id, version, state, updated_at) VALUES (?, 1, ?, ?)",
+                    (conversation_id, payload, now),
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE sessions SET version = ?, state = ?, updated_at = ? WHERE conversation_id = ? AND version = ?",
+                    (expected_version + 1, payload, now, conversation_id, expected_version),
+                )
+        if cursor.rowcount != 1:
+            raise ConcurrentModificationError(f"Conversation '{conversation_id}' changed since version {expected_version}")
+        return expected_version + 1
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE conversation_id = ?", (conversation_id,))
+
+    def expire_idle(self, max_idle_seconds: Optional[float] = None) -> int:
+        max_idle_seconds = self.ttl_seconds if max_idle_seconds is None else max_idle_seconds
+        if not max_idle_seconds:
+            return 0
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_idle_seconds,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_session_store(settings: Settings) -> SessionStore:
+    """Build the session store configured in settings; new sessions follow its token-budget settings."""
+    state_factory = partial(ConversationState.from_settings, settings)
+    if settings.session_store == "sqlite":
+        if not settings.session_store_path:
+            raise ValueError("SESSION_STORE_PATH is required when SESSION_STORE is 'sqlite'")
+        return SQLiteSessionStore(settings.session_store_path, ttl_seconds=settings.session_ttl_seconds, state_factory=state_factory)
+    return MemorySessionStore(max_sessions=settings.session_max_entries, ttl_seconds=settings.session_ttl_seconds, state_factory=state_factory)
@@ -0,0 +1,220 @@
+"""
+Near-duplicate reuse of single-turn classifications.
+
+Messages are embedded as hashed character n-gram vectors and compared by
+cosine similarity with a NumPy matrix-vector product, so lookups stay on the
+CPU and need no model. The index is a fixed-size ring buffer: once full, the
+oldest entry is overwritten, which bounds memory at
+``max_entries * dimensions * 4`` bytes. With a snapshot path, a background
+thread rewrites the snapshot as entries are added, so ``add`` never waits
+on the disk; ``close`` writes the entries added since the last one.
+"""
+
+import os
+import re
+import threading
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.service.cache import CacheStats
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_CONTRACTIONS = [
+    (re.compile(r"\bcan['’]t\b"), "cannot"),
+    (re.compile(r"\bwon['’]t\b"), "will not"),
+    (re.compile(r"n['’]t\b"), " not"),
+    (re.compile(r"['’]s\b"), " is"),
+    (re.compile(r"['’]re\b"), " are"),
+    (re.compile(r"['’]m\b"), " am"),
+    (re.compile(r"['’]ll\b"), " will"),
+    (re.compile(r"['’]ve\b"), " have"),
+    (re.compile(r"['’]d\b"), " would"),
+]
+
+
+def _normalize(message: str) -> str:
+    # Contractions and punctuation carry little intent, so "where's my order??" ~ "where is my order".
+    text = message.lower()
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    return " ".join(_NON_WORD.sub("", text).split())
+
+
+def hashed_ngram_vector(message: str, dimensions: int, n: int = 3) -> np.ndarray:
+    """L2-normalized bag of hashed character n-grams, padded at word boundaries."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    text = f" {_normalize(message)} "
+    for start in range(max(len(text) - n + 1, 1)):
+        # crc32 is stable across processes, unlike hash(), so snapshots stay valid.
+        digest = zlib.crc32(text[start:start + n].encode("utf-8"))
+        vector[digest % dimensions] += 1.0 if digest & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SimilarityIndex:
+    """Bounded nearest-neighbour index mapping message vectors to categories."""
+
+    # The snapshot thread rewrites the snapshot once every this many additions when a path is set.
+    SNAPSHOT_INTERVAL = 100
+
+    def __init__(
+        self,
+        namespace: str,
+        threshold: float = 0.9,
+        max_entries: int = 5000,
+        dimensions: int = 1024,
+        snapshot_path: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dimensions = dimensions
+        self.snapshot_path = snapshot_path
+
+        self._vectors = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._categories: List[str] = [""] * max_entries
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._additions = 0
+        self._saved_additions = 0
+
+        # Started on the first snapshot that falls due; add() only wakes it.
+        self._snapshot_due = threading.Event()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load(snapshot_path)
+
+    def lookup(self, message: str) -> Optional[str]:
+        """Return the category of the nearest stored message if it clears the threshold."""
+        vector = hashed_ngram_vector(message, self.dimensions)
+        with self._lock:
+            if self._size:
+                scores = self._vectors[:self._size] @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._hits += 1
+                    return self._categories[best]
+            self._misses += 1
+            return None
+
+    def add(self, message: str, category: str) -> None:
+        vector = hashed_ngram_vector(message, self.dimensions)
+        with self._lock:
+            if self._size == self.max_entries:
+                self._evictions += 1
+            else:
+                self._size += 1
+            self._vectors[self._next] = vector
+            self._categories[self._next] = category
+            self._next = (self._next + 1) % self.max_entries
+            self._additions += 1
+            if self.snapshot_path is None or self._additions % self.SNAPSHOT_INTERVAL or self._closed:
+                return
+            if self._snapshot_thread is None:
+                self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="similarity-snapshot", daemon=True)
+                self._snapshot_thread.start()
+        self._snapshot_due.set()
+
+    def _snapshot_loop(self) -> None:
+        while True:
+            self._snapshot_due.wait()
+            self._snapshot_due.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except OSError:
+                # Keep the thread alive; the next snapshot, or close(), tries again.
+                pass
+
+    def flush(self) -> None:
+        """Write the snapshot now if entries were added since the last one."""
+        if self.snapshot_path is None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                additions = self._additions
+            if additions == self._saved_additions:
+                return
+            self.save(self.snapshot_path)
+            self._saved_additions = additions
+
+    def close(self) -> None:
+        """Stop the snapshot thread and write the entries added since the last snapshot."""
+        with self._lock:
+            self._closed = True
+            thread = self._snapshot_thread
+        if thread is not None:
+            self._snapshot_due.set()
+            thread.join()
+        self.flush()
+
+    def save(self, path: str) -> None:
+        """Write the index to path atomically."""
+        with self._lock:
+            vectors = self._vectors[:self._size].copy()
+            categories = np.array(self._categories[:self._size], dtype=str)
+            position = self._next
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                namespace=np.array(self.namespace),
+                dimensions=np.array(self.dimensions),
+                next=np.array(position),
+                vectors=vectors,
+                categories=categories,
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Load a snapshot; returns False if it was built for another model, prompt or shape."""
+        with np.load(path) as snapshot:
+            if str(snapshot["namespace"]) != self.namespace or int(snapshot["dimensions"]) != self.dimensions:
+                return False
+            vectors = snapshot["vectors"]
+            categories = [str(category) for category in snapshot["categories"]]
+            position = int(snapshot["next"])
+
+        # Rewrite the ring oldest-first and keep the newest entries that fit this index.
+        if len(vectors):
+            order = np.roll(np.arange(len(vectors)), -(position % len(vectors)))[-self.max_entries:]
+            vectors = vectors[order]
+            categories = [categories[index] for index in order]
+
+        with self._lock:
+            self._size = len(vectors)
+            self._vectors[:self._size] = vectors
+            self._categories[:self._size] = categories
+            self._next = self._size % self.max_entries
+        return True
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions, size=self._size)
+
+
+def build_similarity_index(settings: Settings, namespace: str) -> Optional[SimilarityIndex]:
+    """Build the similarity index configured in settings, or None when it is disabled."""
+    if not settings.similarity_cache_enabled:
+        return None
+
+    return SimilarityIndex(
+        namespace=namespace,
+        threshold=settings.similarity_threshold,
+        max_entries=settings.similarity_max_entries,
+        dimensions=settings.similarity_dimensions,
+        snapshot_path=settings.similarity_snapshot_path,
+    )
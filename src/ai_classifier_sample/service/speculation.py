@@ -0,0 +1,48 @@
+"""
+Counters for speculative pipelining of conversational turns.
+
+``MessageClassifier.aclassify_conversational_turns`` can send a turn before
+the turn ahead of it has been classified, with the prompt it would get if that
+turn continued the current intent. ``SpeculationTracker`` counts these
+speculative calls, how many were kept because the guess was right, and the
+time saved by not waiting for the previous turn.
+"""
+
+import threading
+
+from pydantic import BaseModel, Field
+
+
+class SpeculationStats(BaseModel):
+    speculated: int = Field(0, description="Calls sent with a prompt built on an assumed conversation state")
+    hits: int = Field(0, description="Speculative results kept because the assumed prompt was the real one")
+    misses: int = Field(0, description="Speculative results discarded and re-sent with the real state")
+    latency_saved_seconds: float = Field(0.0, description="Time kept results were in flight before their previous turn finished")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.speculated if self.speculated else 0.0
+
+
+class SpeculationTracker:
+    """Thread-safe running totals of speculative calls."""
+
+    def __init__(self):
+        self._stats = SpeculationStats()
+        self._lock = threading.Lock()
+
+    def record(self, speculated: int, hits: int, latency_saved: float) -> None:
+        """Count one pipelined window: its speculative calls, the ones kept and the time they saved."""
+        with self._lock:
+            self._stats.speculated += speculated
+            self._stats.hits += hits
+            self._stats.misses += speculated - hits
+            self._stats.latency_saved_seconds += latency_saved
+
+    def stats(self) -> SpeculationStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = SpeculationStats()
@@ -0,0 +1,299 @@
+"""
+Per-tenant classifiers for serving several configurations from one process.
+
+``get_settings()`` describes a single model, region and profile. A
+``ClassifierRegistry`` instead holds one ``Settings`` per tenant, built from
+the base settings plus the tenant's overrides in a JSON file::
+
+    {"tenants": {
+        "acme": {"model_arn": "us.anthropic.claude-sonnet-4-20250514-v1:0", "rules_path": "rules/acme.json"},
+        "globex": {"cloud_region": "eu-west-1", "provider": "local", "local_model_path": "models/globex.bin"}
+    }}
+
+Each tenant's ``MessageClassifier`` is built on first use and kept in an LRU
+of ``TENANT_MAX_CLASSIFIERS`` entries; the least recently used one is evicted
+when a new tenant needs room. Tenants whose settings resolve to the same
+region, profile, pool and model share Bedrock clients and chat models through
+the process-wide client factory, so a tenant classifier is cheap to rebuild.
+Each tenant's session store is kept by the registry rather than the
+classifier, so live conversations carry on with the rebuilt classifier.
+Use ``lease`` (or ``acquire``/``release``) when other threads may evict the
+tenant meanwhile: an evicted classifier is closed only once its last lease
+ends.
+Counters are kept per tenant, and ``render_metrics`` labels every tenant's
+metrics with ``tenant``.
+
+Overrides can only change what ``Settings`` holds: model, region, caches,
+rules, limits and so on. The category taxonomy is not a setting. It is fixed
+by ``models.Category`` and the built-in prompts, so every tenant classifies
+into the same categories.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set
+
+from pydantic import BaseModel, Field
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.metrics import MetricFamily, Sample, gauge, render_families, with_labels
+from ai_classifier_sample.service.sessions import SessionStore, build_session_store
+
+ClassifierFactory = Callable[[Settings, SessionStore], MessageClassifier]
+EvictionListener = Callable[[str, MessageClassifier], None]
+
+
+class UnknownTenantError(KeyError):
+    """A request names a tenant that is not configured."""
+
+
+class TenantStats(BaseModel):
+    tenant: str = Field(..., description="Tenant id")
+    active: bool = Field(False, description="Whether the tenant's classifier is currently built")
+    requests: int = Field(0, description="Times the tenant's classifier was requested")
+    builds: int = Field(0, description="Times the tenant's classifier was built, including after eviction")
+    evictions: int = Field(0, description="Times the tenant's classifier was evicted to make room")
+    build_seconds: float = Field(0.0, description="Total time spent building the tenant's classifier")
+
+
+class RegistryStats(BaseModel):
+    capacity: int = Field(..., description="Classifiers kept at once")
+    active: int = Field(0, description="Classifiers currently built")
+    tenants: int = Field(0, description="Configured tenants")
+    requests: int = Field(0, description="Classifier requests over all tenants")
+    builds: int = Field(0, description="Classifiers built over all tenants")
+    evictions: int = Field(0, description="Classifiers evicted over all tenants")
+
+
+def load_tenants(path: str) -> Dict[str, Dict[str, Any]]:
+    """Settings overrides per tenant id from a JSON file."""
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    return data["tenants"]
+
+
+def tenant_settings(base: Settings, overrides: Dict[str, Any]) -> Settings:
+    """base with overrides applied and validated; unknown setting names are rejected."""
+    unknown = sorted(set(overrides) - set(Settings.model_fields))
+    if unknown:
+        raise ValueError(f"Unknown settings {', '.join(unknown)}")
+    # model_validate does not read the environment again, so only base and overrides count.
+    return Settings.model_validate({**base.model_dump(), **overrides})
+
+
+class ClassifierRegistry:
+    """Thread-safe LRU of MessageClassifiers, one per configured tenant."""
+
+    def __init__(
+        self,
+        base_settings: Settings,
+        tenants: Dict[str, Dict[str, Any]],
+        max_classifiers: int = 32,
+        factory: Optional[ClassifierFactory] = None,
+    ):
+        # Every tenant's settings are validated up front, so bad overrides fail at startup.
+        self.settings: Dict[str, Settings] = {tenant: tenant_settings(base_settings, overrides) for tenant, overrides in tenants.items()}
+        self.max_classifiers = max_classifiers
+        self._factory: ClassifierFactory = factory or (lambda settings, sessions: MessageClassifier(settings=settings, sessions=sessions))
+        self._classifiers: "OrderedDict[str, MessageClassifier]" = OrderedDict()
+        # Session stores outlive evictions; they are built with the tenant's first classifier.
+        self._sessions: Dict[str, SessionStore] = {}
+        self._stats: Dict[str, TenantStats] = {tenant: TenantStats(tenant=tenant) for tenant in self.settings}
+        self._listeners: List[EvictionListener] = []
+        # Open leases per classifier, and evicted classifiers left open until their last lease ends.
+        self._leases: Dict[MessageClassifier, int] = {}
+        self._retired: Set[MessageClassifier] = set()
+        self._lock = threading.Lock()
+        # One build lock per tenant keeps concurrent first requests from building it twice.
+        self._build_locks: Dict[str, threading.Lock] = {tenant: threading.Lock() for tenant in self.settings}
+
+    def add_eviction_listener(self, listener: EvictionListener) -> None:
+        """Call listener(tenant, classifier) after a tenant's classifier is evicted, e.g. to drain its queues.
+
+        The registry closes the evicted classifier itself once no lease on it is left.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def get(self, tenant: str) -> MessageClassifier:
+        """The tenant's classifier, built on first use or after eviction.
+
+        Another thread may evict and close it while it is in use; callers that
+        share the registry between threads should use lease() instead.
+        """
+        self._count_request(tenant)
+        return self._classifier(tenant, leased=False)
+
+    def acquire(self, tenant: str) -> MessageClassifier:
+        """Like get(), but the classifier stays open, even if evicted, until release() is called for it."""
+        self._count_request(tenant)
+        return self._classifier(tenant, leased=True)
+
+    def try_acquire(self, tenant: str) -> Optional[MessageClassifier]:
+        """acquire() without building: the leased classifier, or None if the tenant is not built."""
+        if tenant not in self.settings:
+            raise UnknownTenantError(tenant)
+        with self._lock:
+            classifier = self._cached(tenant, leased=True)
+            if classifier is not None:
+                self._stats[tenant].requests += 1
+        return classifier
+
+    def release(self, classifier: MessageClassifier) -> None:
+        """End a lease from acquire(); an evicted classifier is closed with its last lease."""
+        with self._lock:
+            self._leases[classifier] -= 1
+            if self._leases[classifier]:
+                return
+            del self._leases[classifier]
+            if classifier not in self._retired:
+                return
+            self._retired.discard(classifier)
+        classifier.close()
+
+    @contextmanager
+    def lease(self, tenant: str) -> Iterator[MessageClassifier]:
+        """The tenant's classifier, kept open for the duration of the with block."""
+        classifier = self.acquire(tenant)
+        try:
+            yield classifier
+        finally:
+            self.release(classifier)
+
+    def _count_request(self, tenant: str) -> None:
+        if tenant not in self.settings:
+            raise UnknownTenantError(tenant)
+        with self._lock:
+            self._stats[tenant].requests += 1
+
+    def _classifier(self, tenant: str, leased: bool) -> MessageClassifier:
+        with self._lock:
+            classifier = self._cached(tenant, leased)
+        if classifier is not None:
+            return classifier
+        with self._build_locks[tenant]:
+            with self._lock:
+                classifier = self._cached(tenant, leased)
+            return classifier if classifier is not None else self._build(tenant, leased)
+
+    def _cached(self, tenant: str, leased: bool) -> Optional[MessageClassifier]:
+        """The built classifier, marked as most recently used and leased if asked; the caller holds the lock."""
+        classifier = self._classifiers.get(tenant)
+        if classifier is not None:
+            self._classifiers.move_to_end(tenant)
+            if leased:
+                self._leases[classifier] = self._leases.get(classifier, 0) + 1
+        return classifier
+
+    def _build(self, tenant: str, leased: bool) -> MessageClassifier:
+        start = time.perf_counter()
+        sessions = self._sessions.get(tenant)
+        if sessions is None:
+            # Only the tenant's build lock holder gets here, so the store is built once.
+            sessions = self._sessions[tenant] = build_session_store(self.settings[tenant])
+        classifier = self._factory(self.settings[tenant], sessions)
+        evicted, unused = [], []
+        with self._lock:
+            stats = self._stats[tenant]
+            stats.builds += 1
+            stats.build_seconds += time.perf_counter() - start
+            self._classifiers[tenant] = classifier
+            if leased:
+                self._leases[classifier] = 1
+            while len(self._classifiers) > self.max_classifiers:
+                evicted.append(self._classifiers.popitem(last=False))
+                self._stats[evicted[-1][0]].evictions += 1
+                # A leased classifier is closed by its last release() instead.
+                if self._leases.get(evicted[-1][1]):
+                    self._retired.add(evicted[-1][1])
+                else:
+                    unused.append(evicted[-1][1])
+            listeners = list(self._listeners)
+        for evicted_tenant, evicted_classifier in evicted:
+            for listener in listeners:
+                listener(evicted_tenant, evicted_classifier)
+        for evicted_classifier in unused:
+            evicted_classifier.close()
+        return classifier
+
+    def sessions(self, tenant: str) -> Optional[SessionStore]:
+        """The tenant's session store, or None before its first classifier is built."""
+        return self._sessions.get(tenant)
+
+    def close(self) -> None:
+        """Close every built classifier and session store, e.g. at shutdown."""
+        with self._lock:
+            classifiers, self._classifiers = list(self._classifiers.values()) + list(self._retired), OrderedDict()
+            sessions, self._sessions = list(self._sessions.values()), {}
+            self._retired = set()
+        for classifier in classifiers:
+            classifier.close()
+        for store in sessions:
+            store.close()
+
+    def warmup(self, tenants: Optional[Sequence[str]] = None) -> List[str]:
+        """Build classifiers and compile their prompts ahead of traffic; returns the tenants warmed.
+
+        Without tenants, the first TENANT_MAX_CLASSIFIERS configured tenants are
+        warmed, so warming never evicts one of them.
+        """
+        warmed = list(tenants) if tenants is not None else list(self.settings)[:self.max_classifiers]
+        for tenant in warmed:
+            if tenant not in self.settings:
+                raise UnknownTenantError(tenant)
+            # Compiling the prompts builds (or reuses) the chat model and its clients.
+            self._classifier(tenant, leased=False).prompts
+        return warmed
+
+    def active(self) -> Dict[str, MessageClassifier]:
+        """Built classifiers by tenant, least recently used first."""
+        with self._lock:
+            return dict(self._classifiers)
+
+    def tenant_stats(self) -> List[TenantStats]:
+        with self._lock:
+            return [stats.model_copy(update={"active": tenant in self._classifiers}) for tenant, stats in self._stats.items()]
+
+    def stats(self) -> RegistryStats:
+        with self._lock:
+            return RegistryStats(
+                capacity=self.max_classifiers,
+                active=len(self._classifiers),
+                tenants=len(self._stats),
+                requests=sum(stats.requests for stats in self._stats.values()),
+                builds=sum(stats.builds for stats in self._stats.values()),
+                evictions=sum(stats.evictions for stats in self._stats.values()),
+            )
+
+    def _collect_metrics(self) -> List[MetricFamily]:
+        tenants = self.tenant_stats()
+
+        def per_tenant(name: str, help: str, field: str) -> MetricFamily:
+            samples = [Sample(labels={"tenant": stats.tenant}, value=getattr(stats, field)) for stats in tenants]
+            return MetricFamily(name=name, type="counter", help=help, samples=samples)
+
+        return [
+            gauge("ai_classifier_tenants_active", "Tenant classifiers currently built", float(sum(stats.active for stats in tenants))),
+            per_tenant("ai_classifier_tenant_requests_total", "Classifier requests per tenant", "requests"),
+            per_tenant("ai_classifier_tenant_builds_total", "Classifier builds per tenant", "builds"),
+            per_tenant("ai_classifier_tenant_evictions_total", "Classifier evictions per tenant", "evictions"),
+        ]
+
+    def render_metrics(self) -> str:
+        """Prometheus text exposition of the registry counters and each built classifier's metrics, labeled by tenant."""
+        families = self._collect_metrics()
+        for tenant, classifier in self.active().items():
+            if classifier.metrics is not None:
+                families.extend(with_labels(classifier.metrics.collect(), {"tenant": tenant}))
+        return render_families(families)
+
+
+def build_classifier_registry(settings: Settings, factory: Optional[ClassifierFactory] = None) -> Optional[ClassifierRegistry]:
+    """The registry of the tenants in settings.tenants_path, or None when no tenants are configured."""
+    if not settings.tenants_path:
+        return None
+    return ClassifierRegistry(settings, load_tenants(settings.tenants_path), max_classifiers=settings.tenant_max_classifiers, factory=factory)
@@ -0,0 +1,56 @@
+"""
+Token estimates for prompt budgeting and output limits.
+
+Estimates use roughly four characters per token, which is close enough for
+English text and needs no tokenizer. Output limits are derived from the
+structured-output schema: enumerated strings and scalars are cheap, free-text
+strings get a fixed allowance, and arrays are sized for the most items a
+call can ask for.
+"""
+
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+# Structured output arrives as a tool call; this covers its name and JSON punctuation.
+TOOL_CALL_OVERHEAD_TOKENS = 40
+ENUM_FIELD_TOKENS = 12
+SCALAR_FIELD_TOKENS = 8
+
+# Output limits are rounded up to a multiple of this, so few distinct limits are ever used.
+OUTPUT_TOKEN_BUCKET = 128
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _node_tokens(node: Dict[str, Any], definitions: Dict[str, Any], free_text_tokens: int, max_items: int) -> int:
+    if "$ref" in node:
+        node = definitions[node["$ref"].rsplit("/", 1)[-1]]
+    if "anyOf" in node:
+        return max(_node_tokens(option, definitions, free_text_tokens, max_items) for option in node["anyOf"])
+    if "enum" in node or "const" in node:
+        return ENUM_FIELD_TOKENS
+
+    node_type = node.get("type")
+    if node_type == "object":
+        return sum(
+            estimate_tokens(name) + 2 + _node_tokens(child, definitions, free_text_tokens, max_items)
+            for name, child in node.get("properties", {}).items()
+        )
+    if node_type == "array":
+        return max_items * (_node_tokens(node.get("items", {}), definitions, free_text_tokens, max_items) + 2)
+    if node_type == "string":
+        return free_text_tokens
+    return SCALAR_FIELD_TOKENS
+
+
+def schema_output_tokens(schema: Type[BaseModel], free_text_tokens: int = 200, max_items: int = 1) -> int:
+    """Upper estimate of the output tokens needed to fill schema."""
+    json_schema = schema.model_json_schema()
+    return TOOL_CALL_OVERHEAD_TOKENS + _node_tokens(json_schema, json_schema.get("$defs", {}), free_text_tokens, max_items)
+
+
+def round_up_to_bucket(tokens: int) -> int:
+    return -(-tokens // OUTPUT_TOKEN_BUCKET) * OUTPUT_TOKEN_BUCKET
@@ -0,0 +1,86 @@
+"""
+Token usage reported by the chat model.
+
+Every LLM call made by a ``MessageClassifier`` passes through a callback that
+adds the response's ``usage_metadata`` to a ``UsageTracker``. Besides input
+and output tokens this includes Bedrock prompt-cache activity: tokens read
+from the cache and tokens written to it when a cached prefix is created.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+
+class TokenUsage(BaseModel):
+    calls: int = Field(0, description="LLM calls that completed")
+    input_tokens: int = Field(0, description="Input tokens billed at the full rate")
+    output_tokens: int = Field(0, description="Output tokens generated")
+    cache_read_tokens: int = Field(0, description="Input tokens read from the prompt cache")
+    cache_write_tokens: int = Field(0, description="Input tokens written to the prompt cache")
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of all input tokens that were served from the prompt cache."""
+        total = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+        return self.cache_read_tokens / total if total else 0.0
+
+
+class UsageTracker:
+    """Thread-safe running totals of the token usage of LLM calls.
+
+    ``listener``, if given, also receives each response's usage metadata.
+    """
+
+    def __init__(self, listener: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self._listener = listener
+        self._usage = TokenUsage()
+        self._lock = threading.Lock()
+        self._handler: Optional["BaseCallbackHandler"] = None
+
+    def record(self, usage_metadata: Optional[Dict[str, Any]]) -> None:
+        usage_metadata = usage_metadata or {}
+        details = usage_metadata.get("input_token_details") or {}
+        with self._lock:
+            self._usage.calls += 1
+            self._usage.input_tokens += usage_metadata.get("input_tokens", 0)
+            self._usage.output_tokens += usage_metadata.get("output_tokens", 0)
+            self._usage.cache_read_tokens += details.get("cache_read", 0)
+            self._usage.cache_write_tokens += details.get("cache_creation", 0)
+        if self._listener is not None:
+            self._listener(usage_metadata)
+
+    def stats(self) -> TokenUsage:
+        with self._lock:
+            return self._usage.model_copy()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._usage = TokenUsage()
+
+    @property
+    def callback_handler(self) -> "BaseCallbackHandler":
+        """A LangChain callback handler that records every chat model response."""
+        if self._handler is None:
+            self._handler = _usage_callback_handler(self)
+        return self._handler
+
+
+def _usage_callback_handler(tracker: UsageTracker) -> "BaseCallbackHandler":
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class UsageCallbackHandler(BaseCallbackHandler):
+        # Recording is a few additions, so async calls need not hop to a thread for it.
+        run_inline = True
+
+        def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    tracker.record(getattr(message, "usage_metadata", None))
+
+    return UsageCallbackHandler()
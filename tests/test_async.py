@@ -0,0 +1,75 @@
+"""Tests for the asyncio classification API."""
+
+import asyncio
+import json
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import ConversationState, MessageClassifier
+
+
+class TestAsyncClassifier:
+    """Test class for aclassify, aclassify_conversational and aclassify_many."""
+
+    def test_aclassify_matches_sync(self):
+        """Test that the async path returns the same payload as classify."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+        message = "Where is my order #12345?"
+
+        result = asyncio.run(classifier.aclassify(message))
+
+        assert result == classifier.classify(message)
+        assert json.loads(result)["category"] == "Order Tracking"
+
+    def test_aclassify_conversational_updates_state(self):
+        """Test that the async conversational path updates the conversation state."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+        state = ConversationState()
+
+        response = asyncio.run(classifier.aclassify_conversational("I want a refund", state))
+
+        assert response.intent == "Refund/Exchange"
+        assert state.current_intent == "Refund/Exchange"
+        assert len(state.conversation_history) == 1
+
+    def test_aclassify_output_and_lookup(self):
+        """Test that aclassify_output returns the model and alookup answers only from the caches."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(result_cache_enabled=True), llm=llm)
+
+        async def run():
+            missed = await classifier.alookup("Where is my order?")
+            output = await classifier.aclassify_output("Where is my order?")
+            return missed, output, await classifier.alookup("Where is my order?")
+
+        missed, output, cached = asyncio.run(run())
+
+        assert missed is None
+        assert output.category == cached.category == "Order Tracking"
+        assert llm.calls == 1
+
+    def test_aclassify_many_preserves_order(self):
+        """Test that results come back in input order."""
+        classifier = MessageClassifier(llm=FakeChatModel(latency=0.001))
+        messages = [f"message {i}" for i in range(20)]
+
+        results = asyncio.run(classifier.aclassify_many(messages))
+
+        assert [json.loads(result)["message"] for result in results] == messages
+
+    def test_aclassify_many_respects_concurrency_limit(self):
+        """Test that in-flight requests never exceed Settings.max_concurrency."""
+        llm = FakeChatModel(latency=0.01)
+        classifier = MessageClassifier(settings=Settings(max_concurrency=3), llm=llm)
+
+        asyncio.run(classifier.aclassify_many([f"message {i}" for i in range(12)]))
+
+        assert llm.calls == 12
+        assert llm.max_in_flight == 3
+
+    def test_limiter_reused_across_event_loops(self):
+        """Test that the scheduler's concurrency limiter keeps working across asyncio.run calls."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+
+        asyncio.run(classifier.aclassify("first"))
+        asyncio.run(classifier.aclassify("second"))
@@ -0,0 +1,108 @@
+"""Tests for multi-message batch classification."""
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import default_responder
+from ai_classifier_sample.service.classifier import MessageClassifier, _split_batches
+
+
+class TestSplitBatches:
+    """Test class for batch splitting."""
+
+    def test_split_by_size(self):
+        """Test that batches never exceed the size limit."""
+        batches = _split_batches(["hi"] * 7, max_size=3, max_tokens=1000)
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_split_by_token_budget(self):
+        """Test that long messages start a new batch once the budget is used."""
+        messages = ["x" * 40, "x" * 40, "x" * 40]
+        batches = _split_batches(messages, max_size=10, max_tokens=25)
+        assert batches == [[0, 1], [2]]
+
+    def test_oversized_message_gets_its_own_batch(self):
+        """Test that a message over budget is still sent, alone."""
+        batches = _split_batches(["x" * 400, "hi"], max_size=10, max_tokens=10)
+        assert batches == [[0], [1]]
+
+
+class TestClassifyBatch:
+    """Test class for classify_batch."""
+
+    def test_results_in_input_order(self):
+        """Test that each result carries its own message and category."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(batch_max_size=2), llm=llm)
+        messages = ["Where is my order?", "Refund please", "Great service", "Track my package", "Exchange this"]
+
+        results = classifier.classify_batch(messages)
+
+        assert [result.message for result in results] == messages
+        assert [result.category for result in results] == [
+            "Order Tracking",
+            "Refund/Exchange",
+            "Support, Feedback, Complaint",
+            "Order Tracking",
+            "Refund/Exchange",
+        ]
+        assert llm.calls == 3
+
+    def test_reissues_only_missing_items(self):
+        """Test that items dropped or misaligned by the model are re-issued."""
+        prompts = []
+
+        def partial_responder(messages, function):
+            response = default_responder(messages, function)
+            prompts.append(messages[-1].text())
+            if len(prompts) == 1:
+                # Drop the second item and report the third under a bogus index.
+                items = response["classifications"]
+                response["classifications"] = [items[0], {"index": 9, "category": items[2]["category"]}]
+            return response
+
+        llm = FakeChatModel(responder=partial_responder)
+        classifier = MessageClassifier(llm=llm)
+        messages = ["Where is my order?", "Refund please", "Great service"]
+
+        results = classifier.classify_batch(messages)
+
+        assert [result.message for result in results] == messages
+        assert llm.calls == 2
+        assert "Where is my order?" not in prompts[1]
+        assert "Refund please" in prompts[1] and "Great service" in prompts[1]
+
+    def test_falls_back_to_single_classification(self):
+        """Test that items still missing after retries are classified one at a time."""
+
+        def empty_batch_responder(messages, function):
+            if function["name"] == "BatchClassifierOutput":
+                return {"classifications": []}
+            return default_responder(messages, function)
+
+        llm = FakeChatModel(responder=empty_batch_responder)
+        classifier = MessageClassifier(settings=Settings(batch_max_retries=1), llm=llm)
+
+        results = classifier.classify_batch(["Refund please", "Where is my order?"])
+
+        assert [result.category for result in results] == ["Refund/Exchange", "Order Tracking"]
+        assert llm.calls == 2 + 2
+
+    def test_empty_input(self):
+        """Test that an empty batch makes no calls."""
+        llm = FakeChatModel()
+        assert MessageClassifier(llm=llm).classify_batch([]) == []
+        assert llm.calls == 0
+
+    def test_results_stored_and_reused(self):
+        """Test that batched answers fill the result cache and each message is looked up once."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(result_cache_enabled=True, metrics_enabled=True), llm=llm)
+        messages = ["Where is my order?", "Refund please"]
+
+        classifier.classify_batch(messages)
+        results = classifier.classify_batch(messages)
+
+        assert [result.category for result in results] == ["Order Tracking", "Refund/Exchange"]
+        assert llm.calls == 1
+        lookups = classifier.metrics.get("ai_classifier_lookups_total")
+        assert (lookups.value("llm"), lookups.value("result_cache")) == (2, 2)
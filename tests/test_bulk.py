@@ -0,0 +1,108 @@
+"""Tests for streaming bulk classification."""
+
+import asyncio
+import json
+
+import pytest
+
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import default_responder
+from ai_classifier_sample.service.bulk import BulkClassifier, iter_records, load_checkpoint
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+MESSAGES = ["Where is my order?", "Refund please", "Great service", "Track my package", "Exchange this"]
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-run."""
+
+
+def write_jsonl(path, count):
+    with open(path, "w") as handle:
+        for i in range(count):
+            handle.write(json.dumps({"message": f"{MESSAGES[i % len(MESSAGES)]} ({i})"}) + "\n")
+
+
+def read_output(path):
+    with open(path) as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestIterRecords:
+    """Test class for input readers."""
+
+    def test_csv_with_id_field(self, tmp_path):
+        """Test that CSV rows yield the configured id and text fields."""
+        path = tmp_path / "tickets.csv"
+        path.write_text('ticket_id,body\nT-1,Refund please\nT-2,"Where is my order, again?"\n')
+
+        assert list(iter_records(str(path), "csv", text_field="body", id_field="ticket_id")) == [
+            ("T-1", "Refund please"),
+            ("T-2", "Where is my order, again?"),
+        ]
+
+    def test_missing_text_field(self, tmp_path):
+        """Test that a row without the text field is reported."""
+        path = tmp_path / "tickets.jsonl"
+        path.write_text('{"body": "hi"}\n')
+
+        with pytest.raises(ValueError):
+            list(iter_records(str(path), "jsonl"))
+
+
+class TestBulkClassifier:
+    """Test class for BulkClassifier."""
+
+    def test_output_in_input_order(self, tmp_path):
+        """Test that results are written in input order with row-number ids."""
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, 25)
+        bulk = BulkClassifier(MessageClassifier(llm=FakeChatModel(latency=0.001)), concurrency=4, checkpoint_every=10)
+
+        stats = asyncio.run(bulk.run(str(source), str(output)))
+
+        rows = read_output(output)
+        assert [row["id"] for row in rows] == list(range(25))
+        assert rows[1] == {"id": 1, "message": "Refund please (1)", "category": "Refund/Exchange"}
+        assert stats.rows == 25 and stats.errors == 0
+        assert stats.p95_seconds >= stats.p50_seconds > 0
+        assert load_checkpoint(str(output)).rows_done == 25
+
+    def test_resume_after_crash(self, tmp_path):
+        """Test that a rerun skips checkpointed rows and repairs the partial output."""
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, 20)
+
+        def crash_after_eight_rows(stats):
+            if stats.rows == 8:
+                raise Crash()
+
+        crashing = BulkClassifier(MessageClassifier(llm=FakeChatModel()), concurrency=1, checkpoint_every=3, progress=crash_after_eight_rows, progress_interval=0)
+        with pytest.raises(Crash):
+            asyncio.run(crashing.run(str(source), str(output)))
+        assert len(read_output(output)) == 8
+        assert load_checkpoint(str(output)).rows_done == 6
+
+        llm = FakeChatModel()
+        stats = asyncio.run(BulkClassifier(MessageClassifier(llm=llm), concurrency=4).run(str(source), str(output)))
+
+        assert stats.skipped == 6
+        assert llm.calls == 14
+        assert [row["id"] for row in read_output(output)] == list(range(20))
+
+    def test_failed_rows_are_recorded(self, tmp_path):
+        """Test that a row whose classification fails is written with its error."""
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, 3)
+
+        def flaky_responder(messages, function):
+            if "(1)" in messages[-1].text():
+                raise RuntimeError("throttled")
+            return default_responder(messages, function)
+
+        stats = asyncio.run(BulkClassifier(MessageClassifier(llm=FakeChatModel(responder=flaky_responder))).run(str(source), str(output)))
+
+        rows = read_output(output)
+        assert stats.errors == 1
+        assert rows[1]["error"] == "RuntimeError: throttled"
+        assert "category" in rows[2]
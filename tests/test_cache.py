@@ -0,0 +1,140 @@
+"""Tests for the single-turn result cache."""
+
+import asyncio
+import json
+import threading
+import time
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.cache import (
+    MemoryResultCache,
+    SQLiteResultCache,
+    TieredResultCache,
+    build_result_cache,
+    make_cache_key,
+)
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+
+class TestCacheKey:
+    """Test class for cache key construction."""
+
+    def test_normalizes_case_and_whitespace(self):
+        """Test that trivially different messages share a key."""
+        assert make_cache_key("Refund  please", "arn", "v1") == make_cache_key(" refund please\n", "arn", "v1")
+
+    def test_model_and_prompt_version_are_part_of_key(self):
+        """Test that a model or prompt change invalidates the key."""
+        key = make_cache_key("refund please", "arn", "v1")
+        assert key != make_cache_key("refund please", "other-arn", "v1")
+        assert key != make_cache_key("refund please", "arn", "v2")
+
+
+class TestMemoryResultCache:
+    """Test class for the in-memory LRU+TTL tier."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = MemoryResultCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.evictions, stats.size) == (2, 1, 1, 2)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        cache = MemoryResultCache(ttl_seconds=0.01)
+        cache.set("a", "1")
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.stats().evictions == 1
+
+
+class TestSQLiteResultCache:
+    """Test class for the persistent tier."""
+
+    def test_survives_reopen(self, tmp_path):
+        """Test that entries are visible to a new cache on the same file."""
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteResultCache(path)
+        cache.set("a", "Order Tracking")
+        cache.close()
+
+        assert SQLiteResultCache(path).get("a") == "Order Tracking"
+
+    def test_prune_over_capacity(self, tmp_path):
+        """Test that pruning keeps only the most recently used rows."""
+        cache = SQLiteResultCache(str(tmp_path / "cache.db"), max_entries=2)
+        for key in "abc":
+            cache.set(key, key)
+            time.sleep(0.001)
+        cache.prune()
+
+        assert cache.get("a") is None
+        assert cache.stats().size == 2
+        assert cache.stats().evictions == 1
+
+    def test_tiered_promotes_persistent_hits(self, tmp_path):
+        """Test that a persistent hit is copied into the memory tier."""
+        persistent = SQLiteResultCache(str(tmp_path / "cache.db"))
+        persistent.set("a", "Refund/Exchange")
+        cache = TieredResultCache(MemoryResultCache(), persistent)
+
+        assert cache.get("a") == "Refund/Exchange"
+        assert cache.memory.get("a") == "Refund/Exchange"
+
+
+class TestClassifierCache:
+    """Test class for cache integration in MessageClassifier."""
+
+    def test_disabled_by_default(self):
+        """Test that no cache is built unless enabled."""
+        assert build_result_cache(Settings(result_cache_enabled=False)) is None
+
+    def test_hit_skips_llm(self):
+        """Test that a repeated message is served without another LLM call."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(result_cache_enabled=True), llm=llm)
+
+        first = json.loads(classifier.classify("Where is my order?"))
+        second = json.loads(classifier.classify("where is my   ORDER?"))
+
+        assert llm.calls == 1
+        assert second == {"message": "where is my   ORDER?", "category": first["category"]}
+        assert classifier.result_cache.stats().hits == 1
+
+    def test_persistent_tier_across_classifiers(self, tmp_path):
+        """Test that a new classifier reuses results written by an earlier one."""
+        settings = Settings(result_cache_enabled=True, result_cache_path=str(tmp_path / "cache.db"))
+        MessageClassifier(settings=settings, llm=FakeChatModel()).classify("Refund please")
+
+        llm = FakeChatModel()
+        MessageClassifier(settings=settings, llm=llm).classify("Refund please")
+
+        assert llm.calls == 0
+
+    def test_async_sqlite_tier_leaves_the_event_loop(self, tmp_path):
+        """Test that async calls read and write a SQLite tier in a worker thread."""
+        settings = Settings(result_cache_enabled=True, result_cache_path=str(tmp_path / "cache.db"))
+        classifier = MessageClassifier(settings=settings, llm=FakeChatModel())
+        persistent = classifier.result_cache.persistent
+        threads = []
+        original_get, original_set = persistent.get, persistent.set
+        persistent.get = lambda key: threads.append(threading.get_ident()) or original_get(key)
+        persistent.set = lambda key, value: threads.append(threading.get_ident()) or original_set(key, value)
+
+        async def run():
+            await classifier.aclassify("Refund please")
+            await classifier.aclassify_batch(["Where is my order?", "Great service"])
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        assert len(threads) == 6 and loop_thread not in threads
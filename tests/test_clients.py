@@ -0,0 +1,67 @@
+"""Tests for the shared Bedrock client factory."""
+
+import threading
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import BedrockClientFactory, get_client_factory
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+
+class TestBedrockClientFactory:
+    """Test class for BedrockClientFactory."""
+
+    def test_clients_shared_per_configuration(self):
+        """Test that equal settings share one client and a new region gets its own."""
+        factory = BedrockClientFactory()
+        settings = Settings(cloud_region="us-east-1", cloud_profile=None)
+
+        runtime, control = factory.clients(settings)
+
+        assert factory.clients(Settings(cloud_region="us-east-1", cloud_profile=None))[0] is runtime
+        assert factory.clients(settings.model_copy(update={"cloud_region": "eu-west-1"}))[0] is not runtime
+        assert runtime.meta.service_model.service_name == "bedrock-runtime"
+        assert control.meta.service_model.service_name == "bedrock"
+
+    def test_pool_settings_applied(self):
+        """Test that pool size, timeouts and keep-alive reach the botocore config."""
+        settings = Settings(cloud_profile=None, bedrock_max_pool_connections=7, bedrock_read_timeout=12.0, bedrock_tcp_keepalive=True)
+        config = BedrockClientFactory().clients(settings)[0].meta.config
+
+        assert config.max_pool_connections == 7
+        assert config.read_timeout == 12.0
+        assert config.tcp_keepalive is True
+
+    def test_sdk_leaves_retries_to_the_scheduler(self):
+        """Test that the SDK makes one attempt while the scheduler retries or adapts to throttling."""
+        def attempts(**overrides):
+            settings = Settings(cloud_profile=None, bedrock_max_attempts=5, **overrides)
+            return BedrockClientFactory().clients(settings)[0].meta.config.retries["total_max_attempts"]
+
+        assert attempts() == 1
+        assert attempts(llm_max_retries=0, adaptive_concurrency_enabled=True) == 1
+        assert attempts(llm_max_retries=0, adaptive_concurrency_enabled=False) == 5
+
+    def test_concurrent_first_use_builds_one_model(self):
+        """Test that threads racing on first use all get the same chat model."""
+        factory = BedrockClientFactory()
+        settings = Settings(cloud_profile=None)
+        models = []
+
+        threads = [threading.Thread(target=lambda: models.append(factory.chat_model(settings))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(model is models[0] for model in models)
+        assert models[0].client is factory.clients(settings)[0]
+
+    def test_classifiers_share_the_model(self):
+        """Test that classifiers with the same settings reuse the chat model and its client."""
+        settings = Settings(cloud_profile=None)
+
+        first = MessageClassifier(settings=settings)
+        second = MessageClassifier(settings=settings)
+
+        assert first.llm is second.llm
+        assert first.llm is get_client_factory().chat_model(settings)
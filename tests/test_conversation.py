@@ -0,0 +1,194 @@
+"""Tests for the bounded conversation state and transcript classification."""
+
+import asyncio
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import canned_responder, default_responder
+from ai_classifier_sample.service.classifier import ConversationState, MessageClassifier
+from ai_classifier_sample.service.tokens import estimate_tokens
+
+
+class TestConversationState:
+    """Test class for ConversationState retention and context rendering."""
+
+    def test_history_is_bounded(self):
+        """Test that only the last max_turns turns are retained."""
+        state = ConversationState(max_turns=3)
+        for i in range(10):
+            state.add_turn(f"message {i}", "user")
+
+        assert [turn.message for turn in state.conversation_history] == ["message 7", "message 8", "message 9"]
+
+    def test_resolved_intents_are_bounded(self):
+        """Test that the oldest resolved-intent markers are dropped first."""
+        state = ConversationState(max_resolved_intents=2)
+        for intent in ["A", "B", "C", "D"]:
+            state.resolve_current_intent(intent)
+
+        assert state.current_intent == "D"
+        assert state.resolved_intents == ["B", "C"]
+
+    def test_render_context_matches_recent_turns(self):
+        """Test that the incremental context equals formatting the recent turns from scratch."""
+        state = ConversationState(context_turns=2)
+        assert state.render_context() == "No previous conversation"
+
+        for i in range(4):
+            state.add_turn(f"message {i}", "user")
+            expected = MessageClassifier._format_conversation_context(state.get_recent_context(max_turns=2))
+            assert state.render_context() == expected
+
+    def test_render_context_is_cached_between_turns(self):
+        """Test that rendering twice without a new turn reuses the same string."""
+        state = ConversationState()
+        state.add_turn("hello", "user")
+        assert state.render_context() is state.render_context()
+
+    def test_classifier_uses_rendered_context(self):
+        """Test that the prompt carries the last context_turns turns."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+        state = ConversationState(context_turns=1)
+        classifier.classify_conversational("Where is my order?", state)
+        classifier.classify_conversational("I want a refund", state)
+
+        prompt = classifier._conversational_prompt_messages("thanks", state)[-1].text()
+        assert "user: I want a refund" in prompt
+        assert "Where is my order?" not in prompt
+        assert state.resolved_intents == ["Order Tracking"]
+
+
+class TestTokenBudget:
+    """Test class for token-budgeted context with a rolling summary."""
+
+    def test_context_stays_within_budget(self):
+        """Test that a long conversation keeps its context under the budget."""
+        state = ConversationState(context_turns=50, context_token_budget=100)
+        for i in range(200):
+            state.add_turn(f"Where is my order number {i}? It has been a while now.", "user", "Order Tracking")
+
+        context = state.render_context()
+        assert estimate_tokens(context) <= 100
+        assert context.startswith("Earlier in the conversation (")
+        assert "user: Where is my order number 199?" in context
+
+    def test_summary_folds_turns_per_intent(self):
+        """Test that every turn leaving the window is counted under its intent."""
+        state = ConversationState(context_turns=1, context_token_budget=500)
+        state.add_turn("Where is my order?", "user", "Order Tracking")
+        state.add_turn("Still nothing", "user", "Order Tracking")
+        state.add_turn("I want a refund", "user", "Refund/Exchange")
+        state.add_turn("thanks", "user")
+
+        assert state.render_context().splitlines() == [
+            'Earlier in the conversation (3 turns): Order Tracking (2 turns, latest: "Still nothing"); Refund/Exchange (1 turns, latest: "I want a refund")',
+            "user: thanks",
+        ]
+
+    def test_oversized_turn_is_truncated(self):
+        """Test that one turn longer than the budget is cut to fit."""
+        state = ConversationState(context_token_budget=60)
+        state.add_turn("x" * 2000, "user")
+
+        assert estimate_tokens(state.render_context()) <= 60
+
+    def test_round_trip_keeps_summary(self):
+        """Test that a snapshot restores the same summary and window without re-folding."""
+        state = ConversationState(context_turns=3, context_token_budget=80)
+        for i in range(12):
+            state.add_turn(f"message {i} about my refund request", "user", "Refund/Exchange")
+
+        restored = ConversationState.from_dict(state.to_dict())
+        assert restored.render_context() == state.render_context()
+
+        restored.add_turn("one more", "user")
+        state.add_turn("one more", "user")
+        assert restored.render_context() == state.render_context()
+
+    def test_classifier_builds_budgeted_conversations(self):
+        """Test that token-budget mode reaches conversations created by the classifier and session store."""
+        classifier = MessageClassifier(settings=Settings(token_budget_enabled=True, context_token_budget=300), llm=FakeChatModel())
+
+        assert classifier.new_conversation().context_token_budget == 300
+        assert classifier.sessions.load("c1")[0].context_token_budget == 300
+
+
+TRANSCRIPT = [
+    "Where is my order?",
+    "It was supposed to arrive on Monday",
+    "Actually I just want a refund",
+    "Can the refund go to my card?",
+    "Thanks, your team was great",
+    "And where is the package for my other order?",
+]
+
+
+def summarize(state: ConversationState):
+    return state.current_intent, state.resolved_intents, [(turn.message, turn.intent) for turn in state.conversation_history], state.render_context()
+
+
+class TestTranscript:
+    """Test class for classify_transcript."""
+
+    def test_matches_turn_by_turn(self):
+        """Test that one call labels every turn and leaves the same state as the turn-by-turn path."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(llm=llm)
+        expected_state = classifier.new_conversation()
+        expected = [classifier.classify_conversational(turn, expected_state) for turn in TRANSCRIPT]
+        llm.reset_stats()
+
+        outputs, state = classifier.classify_transcript(TRANSCRIPT)
+
+        assert llm.calls == 1
+        assert [(o.message, o.intent, o.intent_transition) for o in outputs] == [(o.message, o.intent, o.intent_transition) for o in expected]
+        assert summarize(state) == summarize(expected_state)
+        assert state.resolved_intents
+
+    def test_windows_carry_state(self):
+        """Test that long transcripts are split into windows that continue from the previous state."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(transcript_window_turns=4), llm=llm)
+        expected_state = classifier.new_conversation()
+        for turn in TRANSCRIPT * 2:
+            classifier.classify_conversational(turn, expected_state)
+        llm.reset_stats()
+
+        outputs, state = asyncio.run(classifier.aclassify_transcript(TRANSCRIPT * 2))
+
+        assert llm.calls == 3
+        assert len(outputs) == 12
+        assert summarize(state) == summarize(expected_state)
+
+    def test_missing_labels_are_resent(self):
+        """Test that turns left out of a response are labeled by a later call."""
+        def drop_third_label(messages, function):
+            response = default_responder(messages, function)
+            if function["name"] == "TranscriptClassifierOutput":
+                response["labels"] = [label for label in response["labels"] if label["index"] != 2]
+            return response
+
+        classifier = MessageClassifier(llm=FakeChatModel())
+        expected_state = classifier.new_conversation()
+        for turn in TRANSCRIPT[:4]:
+            classifier.classify_conversational(turn, expected_state)
+        llm = FakeChatModel(responder=drop_third_label)
+        classifier = MessageClassifier(llm=llm)
+
+        outputs, state = classifier.classify_transcript(TRANSCRIPT[:4])
+
+        # The first call labels turns 0-1; the second gets turns 2-3 as its indices 0-1.
+        assert llm.calls == 2
+        assert [output.message for output in outputs] == TRANSCRIPT[:4]
+        assert summarize(state) == summarize(expected_state)
+
+    def test_unlabeled_turn_classified_alone(self):
+        """Test the fallback to classify_conversational when the model never labels the next turn."""
+        llm = FakeChatModel(responder=canned_responder({"TranscriptClassifierOutput": {"labels": []}}))
+        classifier = MessageClassifier(llm=llm)
+
+        outputs, state = classifier.classify_transcript(TRANSCRIPT[:2])
+
+        assert [output.intent for output in outputs] == ["Order Tracking", "Support, Feedback, Complaint"]
+        assert len(state.conversation_history) == 2
+        assert llm.calls == 4
@@ -0,0 +1,114 @@
+"""Tests for distilling LLM labels into the local classifier."""
+
+import json
+import random
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import keyword_category
+from ai_classifier_sample.providers.local import LocalModel, LocalModelFormatError, save_model
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.distill import distill, evaluate, export_labels, load_examples, split_holdout, train
+
+MESSAGES = ["Where is my order?", "I want a refund", "Thanks for the help"]
+SUBJECTS = ["order", "package", "refund", "return", "exchange", "invoice", "password", "account", "delivery", "tracking number"]
+TEMPLATES = ["where is my {}", "I need help with my {}", "can you check the {} please", "what happened to the {} from last week", "{} question"]
+
+
+def labeled_examples(count, seed=0):
+    """Synthetic messages labeled by the fake LLM's keyword rules."""
+    rng = random.Random(seed)
+    messages = {f"{rng.choice(TEMPLATES).format(rng.choice(SUBJECTS))} #{number}" for number in range(count)}
+    return [(message, keyword_category(message)) for message in sorted(messages)]
+
+
+def write_labels(path, examples):
+    with open(path, "w", encoding="utf-8") as file:
+        for message, category in examples:
+            file.write(json.dumps({"message": message, "category": category}) + "\n")
+
+
+class TestDistill:
+    """Test class for label export, training and the local provider."""
+
+    def test_export_from_recording_and_jsonl(self, tmp_path):
+        """Test that single-turn and batch calls in a recording and JSONL results are exported once per message."""
+        recording = str(tmp_path / "calls.rec")
+        classifier = MessageClassifier(settings=Settings(record_path=recording), llm=FakeChatModel())
+        for message in MESSAGES:
+            classifier.classify(message)
+        classifier.classify_batch(MESSAGES + ["Has my package shipped?"])
+        classifier.recorder.close()
+
+        results = tmp_path / "results.jsonl"
+        results.write_text(
+            json.dumps({"id": "1", "text": "Please exchange these shoes", "category": "Refund/Exchange", "error": None}) + "\n"
+            + json.dumps({"id": "2", "text": "broken", "category": None, "error": "timeout"}) + "\n"
+        )
+        output = str(tmp_path / "labels.jsonl")
+
+        stats = export_labels([recording, str(results)], output, text_field="text")
+
+        assert (stats.read, stats.written, stats.duplicates) == (8, 5, 3)
+        assert dict(load_examples(output)) == {
+            message: keyword_category(message) for message in MESSAGES + ["Has my package shipped?", "Please exchange these shoes"]
+        }
+
+    def test_distilled_model_agrees_with_llm(self, tmp_path):
+        """Test that a model trained on LLM labels reproduces them on held-out messages and reports it."""
+        labels = str(tmp_path / "labels.jsonl")
+        write_labels(labels, labeled_examples(2000))
+        model_path = str(tmp_path / "model.bin")
+
+        report = distill(labels, model_path, holdout=0.2, dimensions=2 ** 14)
+
+        training, held_out = split_holdout(load_examples(labels), 0.2)
+        assert report.examples == len(held_out) > 0
+        assert report.agreement >= 0.95
+        assert set(report.categories) == {category for _, category in training}
+        assert sum(sum(row.values()) for row in report.confusion.values()) == report.examples
+        saved = json.loads((tmp_path / "model.bin.report.json").read_text())
+        assert saved["model_version"] == report.model_version == LocalModel.load(model_path).version
+
+    def test_save_and_load(self, tmp_path):
+        """Test that a loaded model predicts like the trained one and that damaged files are rejected."""
+        examples = labeled_examples(300)
+        model = train(examples, dimensions=2 ** 12, epochs=3)
+        path = str(tmp_path / "model.bin")
+        version = save_model(path, model.weights, model.bias, model.categories, {"note": "test"})
+
+        loaded = LocalModel.load(path)
+
+        assert loaded.version == version == model.version
+        assert loaded.metadata == {"note": "test"}
+        assert [loaded.predict(message) for message, _ in examples[:20]] == [model.predict(message) for message, _ in examples[:20]]
+        assert evaluate(loaded, examples).agreement == evaluate(model, examples).agreement
+
+        with open(path, "r+b") as file:
+            file.truncate(file.seek(0, 2) - 4)
+        with pytest.raises(LocalModelFormatError):
+            LocalModel.load(path)
+        (tmp_path / "other.bin").write_bytes(b"not a model")
+        with pytest.raises(LocalModelFormatError):
+            LocalModel.load(str(tmp_path / "other.bin"))
+
+    def test_local_provider_skips_llm(self, tmp_path):
+        """Test that PROVIDER=local answers single and batch messages without the LLM, unless it is unsure."""
+        path = str(tmp_path / "model.bin")
+        model = train(labeled_examples(1000), dimensions=2 ** 14)
+        save_model(path, model.weights, model.bias, model.categories)
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(provider="local", local_model_path=path), llm=llm)
+
+        single = classifier.classify("where is my package")
+        batch = classifier.classify_batch(["I need help with my refund", "can you check the password please"])
+
+        assert json.loads(single)["category"] == keyword_category("where is my package")
+        assert [output.category for output in batch] == [keyword_category("refund"), keyword_category("password")]
+        assert llm.calls == 0
+
+        unsure = MessageClassifier(settings=Settings(provider="local", local_model_path=path, local_min_confidence=1.0), llm=llm)
+        assert [output.category for output in unsure.classify_batch(MESSAGES)] == [keyword_category(message) for message in MESSAGES]
+        assert llm.calls == 1
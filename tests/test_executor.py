@@ -0,0 +1,221 @@
+"""Tests for the per-conversation ordered executor and speculative pipelining of turns."""
+
+import asyncio
+import time
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import default_responder
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.executor import ConversationBusyError, ConversationExecutor
+
+TURNS = ["Where is my order?", "Any tracking update?", "Actually, I want a refund", "Thanks for the help"]
+
+
+class TestConversationExecutor:
+    """Test class for ConversationExecutor."""
+
+    def test_turns_of_one_conversation_keep_order(self):
+        """Test that concurrently submitted turns are classified in order without session conflicts."""
+        llm = FakeChatModel(latency=0.01)
+        classifier = MessageClassifier(llm=llm)
+        executor = ConversationExecutor(classifier)
+
+        async def run():
+            results = await asyncio.gather(*(executor.classify("c1", turn) for turn in TURNS))
+            await executor.drain()
+            return results
+
+        results = asyncio.run(run())
+        state, version = classifier.sessions.load("c1")
+
+        assert [result.message for result in results] == TURNS
+        assert [turn.message for turn in state.conversation_history] == TURNS
+        assert version == len(TURNS)
+        assert llm.calls == len(TURNS)
+        assert llm.max_in_flight == 1
+
+    def test_conversations_run_concurrently(self):
+        """Test that different conversations share the event loop instead of waiting for each other."""
+        llm = FakeChatModel(latency=0.05)
+        executor = ConversationExecutor(MessageClassifier(llm=llm))
+
+        async def run():
+            await asyncio.gather(*(executor.classify(f"c{i}", turn) for i in range(8) for turn in TURNS[:2]))
+            return executor.stats()
+
+        stats = asyncio.run(run())
+
+        assert llm.max_in_flight == 8
+        assert stats.actors_started == 8
+        assert stats.active_actors == 8
+        assert stats.requests == 16
+
+    def test_full_queue_applies_backpressure(self):
+        """Test that a full conversation queue makes callers wait and refuses them after the timeout."""
+        llm = FakeChatModel(latency=0.05)
+        executor = ConversationExecutor(MessageClassifier(llm=llm), queue_size=1, queue_timeout=0.02)
+
+        async def run():
+            return await asyncio.gather(*(executor.classify("c1", turn) for turn in TURNS[:3]), return_exceptions=True)
+
+        first, second, third = asyncio.run(run())
+        stats = executor.stats()
+
+        # The first turn fills the queue before the actor starts; the second gets in once the actor
+        # takes the first, and the third is still waiting when the timeout expires.
+        assert first.message == TURNS[0] and second.message == TURNS[1]
+        assert isinstance(third, ConversationBusyError)
+        assert stats.backpressure_waits == 2
+        assert stats.rejected == 1
+
+    def test_idle_actors_expire(self):
+        """Test that an idle actor stops and a later turn starts a new one on the same session."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+        executor = ConversationExecutor(classifier, idle_seconds=0.01)
+
+        async def run():
+            await executor.classify("c1", TURNS[0])
+            await asyncio.sleep(0.05)
+            idle = executor.stats()
+            second = await executor.classify("c1", TURNS[1])
+            return idle, second
+
+        idle, second = asyncio.run(run())
+
+        assert idle.active_actors == 0
+        assert idle.actors_expired == 1
+        assert executor.stats().actors_started == 2
+        assert second.intent_transition == "CONTINUE"
+
+    def test_failure_does_not_stop_the_actor(self):
+        """Test that a failed turn raises to its caller and the next turn is still classified."""
+        def responder(messages, function):
+            if "boom" in messages[-1].text():
+                raise ValueError("bad response")
+            return {"intent_transition": "NEW", "intent": "Order Tracking", "confidence": "HIGH", "reasoning": "", "message": "ok"}
+
+        executor = ConversationExecutor(MessageClassifier(llm=FakeChatModel(responder=responder)))
+
+        async def run():
+            return await asyncio.gather(executor.classify("c1", "boom"), executor.classify("c1", TURNS[0]), return_exceptions=True)
+
+        failed, result = asyncio.run(run())
+
+        assert isinstance(failed, ValueError)
+        assert result.intent == "Order Tracking"
+
+
+BURST = ["Where is my order?", "Where is my package?", "Any tracking update?", "Still no tracking update"]
+
+
+def summarize(state):
+    return state.current_intent, state.resolved_intents, [(turn.message, turn.intent) for turn in state.conversation_history], state.render_context()
+
+
+def turn_by_turn(messages):
+    classifier = MessageClassifier(llm=FakeChatModel())
+    state = classifier.new_conversation()
+    outputs = [classifier.classify_conversational(message, state) for message in messages]
+    return outputs, summarize(state)
+
+
+class TestSpeculativeTurns:
+    """Test class for speculative pipelining of consecutive conversational turns."""
+
+    def test_continuing_turns_are_kept(self):
+        """Test that turns continuing the intent overlap and match turn-by-turn classification."""
+        llm = FakeChatModel(latency=0.05)
+        classifier = MessageClassifier(settings=Settings(speculative_turns_enabled=True), llm=llm)
+        state = classifier.new_conversation()
+
+        start = time.perf_counter()
+        outputs = asyncio.run(classifier.aclassify_conversational_turns(BURST, state))
+        elapsed = time.perf_counter() - start
+        stats = classifier.speculation_stats()
+
+        expected_outputs, expected_state = turn_by_turn(BURST)
+        assert outputs == expected_outputs
+        assert summarize(state) == expected_state
+        # The first turn has no intent to continue, so it goes alone; the other three overlap,
+        # and the two behind the first of them are speculative.
+        assert llm.calls == len(BURST)
+        assert (stats.speculated, stats.hits, stats.hit_rate) == (2, 2, 1.0)
+        assert stats.latency_saved_seconds > 0.05
+        assert elapsed < 0.15
+
+    def test_wrong_guess_is_resent(self):
+        """Test that turns after a change of intent are sent again with the real state."""
+        messages = ["Where is my order?", "Any tracking update?", "I want a refund instead", "How long does the refund take?"]
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(speculative_turns_enabled=True), llm=llm)
+        state = classifier.new_conversation()
+
+        outputs = asyncio.run(classifier.aclassify_conversational_turns(messages, state))
+        stats = classifier.speculation_stats()
+
+        expected_outputs, expected_state = turn_by_turn(messages)
+        assert outputs == expected_outputs
+        assert summarize(state) == expected_state
+        assert stats.misses == 1
+        assert llm.calls == len(messages) + stats.misses
+
+    def test_executor_pipelines_queued_turns(self):
+        """Test that the executor sends queued turns of a conversation together and keeps their order."""
+        llm = FakeChatModel(latency=0.02)
+        classifier = MessageClassifier(settings=Settings(speculative_turns_enabled=True, speculative_max_turns=3), llm=llm)
+        executor = ConversationExecutor(classifier)
+
+        async def run():
+            return await asyncio.gather(*(executor.classify("c1", message) for message in BURST + BURST))
+
+        results = asyncio.run(run())
+        state, _ = classifier.sessions.load("c1")
+
+        expected_outputs, expected_state = turn_by_turn(BURST + BURST)
+        assert results == expected_outputs
+        assert summarize(state) == expected_state
+        assert llm.max_in_flight == 3
+
+    def test_failed_turn_does_not_fail_the_burst(self):
+        """Test that only the failing turn of a pipelined burst raises and the turns after it are classified."""
+        def responder(messages, function):
+            if "boom" in messages[-1].text():
+                raise ValueError("bad response")
+            return default_responder(messages, function)
+
+        classifier = MessageClassifier(settings=Settings(speculative_turns_enabled=True), llm=FakeChatModel(responder=responder))
+        executor = ConversationExecutor(classifier)
+
+        async def run():
+            turns = [BURST[0], BURST[1], "boom", BURST[2]]
+            return await asyncio.gather(*(executor.classify("c1", message) for message in turns), return_exceptions=True)
+
+        first, second, failed, last = asyncio.run(run())
+        state, _ = classifier.sessions.load("c1")
+
+        assert isinstance(failed, ValueError)
+        assert [first.message, second.message, last.message] == BURST[:3]
+        assert [turn.message for turn in state.conversation_history] == BURST[:3]
+
+    def test_outputs_hold_turns_applied_before_a_failure(self):
+        """Test that a failing turn leaves the turns before it applied and in the caller's outputs."""
+        def responder(messages, function):
+            if "boom" in messages[-1].text():
+                raise ValueError("bad response")
+            return default_responder(messages, function)
+
+        classifier = MessageClassifier(settings=Settings(speculative_turns_enabled=True), llm=FakeChatModel(responder=responder))
+        outputs = []
+
+        async def run():
+            await classifier.aclassify_conversational_turns([BURST[0], BURST[1], "boom", BURST[2]], conversation_id="c1", outputs=outputs)
+
+        with pytest.raises(ValueError):
+            asyncio.run(run())
+        state, _ = classifier.sessions.load("c1")
+
+        assert [output.message for output in outputs] == BURST[:2]
+        assert [turn.message for turn in state.conversation_history] == BURST[:2]
@@ -0,0 +1,59 @@
+"""Tests for the FakeChatModel knobs used by the offline benchmark suite."""
+
+import json
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.fake import canned_responder
+from ai_classifier_sample.service.classifier import MessageClassifier
+
+
+class TestFakeChatModel:
+    """Test class for injected latency distributions, errors and canned outputs."""
+
+    @pytest.mark.parametrize("distribution", ["uniform", "lognormal"])
+    def test_latency_distribution_is_seeded(self, distribution):
+        """Test that latencies vary around the median and repeat after reset_stats."""
+        llm = FakeChatModel(latency=0.01, latency_distribution=distribution, latency_sigma=0.5, seed=3)
+
+        def sample():
+            latencies = []
+            for _ in range(50):
+                latencies.append(llm._enter())
+                llm._exit()
+            return latencies
+
+        first = sample()
+        llm.reset_stats()
+
+        assert sample() == first
+        assert len(set(first)) == 50
+        assert min(first) < 0.01 < max(first)
+        if distribution == "uniform":
+            assert 0.005 <= min(first) and max(first) <= 0.015
+
+    def test_errors_are_retried(self):
+        """Test that injected transient errors are counted and retried by the scheduler."""
+        llm = FakeChatModel(error_rate=0.3, seed=1)
+        classifier = MessageClassifier(settings=Settings(llm_retry_base_delay=0.001, llm_max_retries=10), llm=llm)
+
+        for i in range(10):
+            classifier.classify(f"Where is order {i}?")
+
+        assert llm.errors > 0
+        assert llm.calls == 10 + llm.errors
+        assert classifier.scheduler.stats().retries == llm.errors
+
+    def test_canned_responder_cycles_outputs(self):
+        """Test that canned outputs are returned in turn and other schemas use the default responder."""
+        llm = FakeChatModel(responder=canned_responder({
+            "ClassifierOutput": [{"message": "a", "category": "Refund/Exchange"}, {"message": "b", "category": "Order Tracking"}],
+        }))
+        classifier = MessageClassifier(llm=llm)
+
+        categories = [json.loads(classifier.classify(f"message {i}"))["category"] for i in range(3)]
+
+        assert categories == ["Refund/Exchange", "Order Tracking", "Refund/Exchange"]
+        assert classifier.classify_batch(["Where is my package?"])[0].category == "Order Tracking"
@@ -0,0 +1,151 @@
+"""Tests for hot-path instrumentation, the metrics registry and Prometheus exposition."""
+
+import asyncio
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.server import create_app
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.instrumentation import Instrumentation, InstrumentationHook
+from ai_classifier_sample.service.metrics import MetricsRegistry
+from ai_classifier_sample.service.scheduler import ThrottlingError
+
+
+class RecordingHook(InstrumentationHook):
+    def __init__(self):
+        self.stages = []
+        self.errors = []
+        self.lookups = []
+        self.usage = []
+
+    def on_stage(self, operation, stage, seconds):
+        self.stages.append((operation, stage))
+
+    def on_error(self, operation, stage, error):
+        self.errors.append((operation, stage, type(error).__name__))
+
+    def on_lookup(self, source):
+        self.lookups.append(source)
+
+    def on_llm_usage(self, usage_metadata):
+        self.usage.append(usage_metadata)
+
+
+async def get(app, path):
+    """Drive one GET request through the ASGI app and return (status, content type, body text)."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": "GET", "path": path, "headers": []}, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"])[b"content-type"], sent[1]["body"].decode()
+
+
+class TestMetricsRegistry:
+    """Test class for MetricsRegistry and its text exposition."""
+
+    def test_histogram_exposition(self):
+        """Test cumulative buckets, sum and count in the Prometheus format."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", labels=("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, "llm_call")
+
+        text = registry.render_prometheus()
+
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{stage="llm_call",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{stage="llm_call",le="1"} 2' in text
+        assert 'latency_seconds_bucket{stage="llm_call",le="+Inf"} 3' in text
+        assert 'latency_seconds_sum{stage="llm_call"} 5.55' in text
+        assert 'latency_seconds_count{stage="llm_call"} 3' in text
+
+    def test_counter_labels_escaped(self):
+        """Test that label values are escaped and re-registration returns the same counter."""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", labels=("error",)).inc('bad "quote"\n')
+
+        assert registry.counter("errors_total", "Errors", labels=("error",)).value('bad "quote"\n') == 1
+        assert 'errors_total{error="bad \\"quote\\"\\n"} 1' in registry.render_prometheus()
+        with pytest.raises(ValueError):
+            registry.histogram("errors_total", "Errors")
+
+
+class TestInstrumentation:
+    """Test class for MessageClassifier instrumentation."""
+
+    def test_disabled_by_default(self):
+        """Test that without hooks every stage shares one no-op context manager."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+
+        assert not classifier.instrumentation.enabled
+        assert classifier.instrumentation.stage("a", "b") is classifier.instrumentation.stage("c", "d")
+        assert classifier.metrics is None
+        assert classifier.render_metrics() == ""
+
+    def test_single_turn_stages_and_tokens(self):
+        """Test that a classification records each stage, the lookup tier and token counts."""
+        classifier = MessageClassifier(settings=Settings(metrics_enabled=True, result_cache_enabled=True), llm=FakeChatModel())
+
+        classifier.classify("Where is my order?")
+        classifier.classify("Where is my order?")
+
+        stage_seconds = classifier.metrics.get("ai_classifier_stage_duration_seconds")
+        for stage in ("format_prompt", "llm_call", "parse_output", "cache_store"):
+            assert stage_seconds.count("single_turn", stage) == 1
+        assert stage_seconds.count("single_turn", "cache_lookup") == 2
+        lookups = classifier.metrics.get("ai_classifier_lookups_total")
+        assert (lookups.value("llm"), lookups.value("result_cache")) == (1, 1)
+        assert classifier.metrics.get("ai_classifier_llm_tokens_total").value("output") == classifier.token_usage().output_tokens > 0
+
+        text = classifier.render_metrics()
+        assert 'ai_classifier_cache_hits_total{cache="result_cache"} 1' in text
+        assert "ai_classifier_concurrency_limit 16" in text
+
+    def test_conversational_stages(self):
+        """Test that conversational calls time session and state stages."""
+        hook = RecordingHook()
+        classifier = MessageClassifier(llm=FakeChatModel(), instrumentation=Instrumentation([hook]))
+
+        asyncio.run(classifier.aclassify_conversational("I want a refund", conversation_id="c1"))
+
+        assert hook.stages == [
+            ("conversational", "session_load"),
+            ("conversational", "format_prompt"),
+            ("conversational", "llm_call"),
+            ("conversational", "parse_output"),
+            ("conversational", "state_update"),
+            ("conversational", "session_save"),
+        ]
+        assert len(hook.usage) == 1
+
+    def test_errors_and_retries_counted(self):
+        """Test that a failing LLM call is counted as an error of its stage and as a throttle."""
+        llm = FakeChatModel(throttle_rate=1.0)
+        classifier = MessageClassifier(settings=Settings(metrics_enabled=True, llm_max_retries=1, llm_retry_base_delay=0.001), llm=llm)
+
+        with pytest.raises(ThrottlingError):
+            classifier.classify("Where is my order?")
+
+        text = classifier.render_metrics()
+        assert 'ai_classifier_errors_total{operation="single_turn",stage="llm_call",error="ThrottlingError"} 1' in text
+        assert "ai_classifier_llm_throttles_total 2" in text
+        assert "ai_classifier_llm_retries_total 1" in text
+
+    def test_prometheus_endpoint(self):
+        """Test that the server exposes the registry as text, or 404 while metrics are disabled."""
+        enabled = create_app(MessageClassifier(settings=Settings(metrics_enabled=True), llm=FakeChatModel()))
+        disabled = create_app(MessageClassifier(llm=FakeChatModel()))
+
+        status, content_type, body = asyncio.run(get(enabled, "/metrics/prometheus"))
+        assert status == 200
+        assert content_type.startswith(b"text/plain")
+        assert "# TYPE ai_classifier_llm_retries_total counter" in body
+
+        assert asyncio.run(get(disabled, "/metrics/prometheus"))[0] == 404
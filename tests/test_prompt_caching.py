@@ -0,0 +1,127 @@
+"""Tests for Bedrock prompt caching and token usage reporting."""
+
+import asyncio
+from typing import Any, Dict, List
+
+from langchain_aws import ChatBedrockConverse
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers.fake import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.prompts import CACHE_POINT, CONVERSATIONAL_PROMPT, SINGLE_TURN_PROMPT
+
+
+class StubConverseClient:
+    """Records Converse requests and answers with a tool call and cache usage."""
+
+    def __init__(self, cache_read: int = 0, cache_write: int = 0):
+        self.requests: List[Dict[str, Any]] = []
+        self.cache_read = cache_read
+        self.cache_write = cache_write
+
+    def converse(self, **kwargs: Any) -> Dict[str, Any]:
+        self.requests.append(kwargs)
+        tool = kwargs["toolConfig"]["tools"][0]["toolSpec"]["name"]
+        arguments = {"message": "Where is my order?", "category": "Order Tracking"}
+        if tool == "ConversationalClassifierOutput":
+            arguments.update(reasoning="Asks about an order", intent_transition="NEW", intent="Order Tracking", confidence="HIGH")
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"toolUse": {"toolUseId": "call_1", "name": tool, "input": arguments}}]}},
+            "usage": {
+                "inputTokens": 20,
+                "outputTokens": 10,
+                "totalTokens": 30 + self.cache_read + self.cache_write,
+                "cacheReadInputTokens": self.cache_read,
+                "cacheWriteInputTokens": self.cache_write,
+            },
+            "stopReason": "tool_use",
+            "metrics": {"latencyMs": 5},
+        }
+
+
+def _classifier(client: StubConverseClient, prompt_caching_enabled: bool, prompt_cache_min_tokens: int = 0) -> MessageClassifier:
+    llm = ChatBedrockConverse(
+        model="anthropic.claude-3-haiku-20240307-v1:0",
+        provider="anthropic",
+        region_name="us-east-1",
+        client=client,
+        bedrock_client=client,
+    )
+    # The built-in prompts are shorter than Bedrock's minimum, so tests of the payload lower the threshold.
+    settings = Settings(cloud_profile=None, prompt_caching_enabled=prompt_caching_enabled, prompt_cache_min_tokens=prompt_cache_min_tokens)
+    return MessageClassifier(settings=settings, llm=llm)
+
+
+class TestPromptCaching:
+    """Test class for the prompt-cache request payload and usage reporting."""
+
+    def test_cache_point_follows_system_prompt(self):
+        """Test that the Converse request ends the system prompt with a cache point when caching is on."""
+        client = StubConverseClient()
+        classifier = _classifier(client, prompt_caching_enabled=True)
+
+        classifier.classify("Where is my order?")
+
+        system = client.requests[0]["system"]
+        assert system == [{"text": SINGLE_TURN_PROMPT.system_prompt}, CACHE_POINT]
+        # Per-call content stays after the cache point, in the user message.
+        assert "Where is my order?" in client.requests[0]["messages"][0]["content"][0]["text"]
+
+    def test_conversational_prompt_cached(self):
+        """Test that conversational calls carry the cache point too."""
+        client = StubConverseClient()
+        classifier = _classifier(client, prompt_caching_enabled=True)
+
+        classifier.classify_conversational("Where is my order?", classifier.new_conversation())
+
+        assert client.requests[0]["system"] == [{"text": CONVERSATIONAL_PROMPT.system_prompt}, CACHE_POINT]
+
+    def test_no_cache_point_by_default(self):
+        """Test that requests are unchanged when prompt caching is off."""
+        client = StubConverseClient()
+        classifier = _classifier(client, prompt_caching_enabled=False)
+
+        classifier.classify("Where is my order?")
+
+        assert client.requests[0]["system"] == [{"text": SINGLE_TURN_PROMPT.system_prompt}]
+
+    def test_short_prefix_not_cached(self):
+        """Test that prompts estimated below prompt_cache_min_tokens get no cache point Bedrock would ignore."""
+        client = StubConverseClient()
+        classifier = _classifier(client, prompt_caching_enabled=True, prompt_cache_min_tokens=SINGLE_TURN_PROMPT.prefix_tokens + 1)
+
+        classifier.classify("Where is my order?")
+        classifier.classify_conversational("Where is my order?", classifier.new_conversation())
+
+        assert client.requests[0]["system"] == [{"text": SINGLE_TURN_PROMPT.system_prompt}]
+        assert client.requests[1]["system"] == [{"text": CONVERSATIONAL_PROMPT.system_prompt}, CACHE_POINT]
+        assert Settings().prompt_cache_min_tokens > CONVERSATIONAL_PROMPT.prefix_tokens
+
+    def test_cache_tokens_reported(self):
+        """Test that cache reads and writes from the response usage are added up."""
+        client = StubConverseClient(cache_read=900, cache_write=0)
+        classifier = _classifier(client, prompt_caching_enabled=True)
+
+        classifier.classify("Where is my order?")
+        asyncio.run(classifier.aclassify("Where is my parcel?"))
+        usage = classifier.token_usage()
+
+        assert usage.calls == 2
+        assert usage.input_tokens == 40
+        assert usage.output_tokens == 20
+        assert usage.cache_read_tokens == 1800
+        assert usage.cache_write_tokens == 0
+        assert usage.cache_hit_rate == 1800 / 1840
+
+    def test_fake_model_simulates_cache(self):
+        """Test that the fake model reports a cache write for a new prefix and reads afterwards."""
+        classifier = MessageClassifier(settings=Settings(cloud_profile=None, prompt_caching_enabled=True, prompt_cache_min_tokens=0), llm=FakeChatModel())
+
+        classifier.classify("Where is my order?")
+        first = classifier.token_usage()
+        classifier.classify("I want a refund")
+        second = classifier.token_usage()
+
+        assert first.cache_write_tokens > 0 and first.cache_read_tokens == 0
+        assert second.cache_read_tokens == first.cache_write_tokens
+        assert second.cache_write_tokens == first.cache_write_tokens
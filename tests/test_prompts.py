@@ -0,0 +1,142 @@
+"""Tests for the prompt registry."""
+
+from typing import Literal
+
+from pydantic import BaseModel
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.models import BatchClassifierOutput, ClassifierOutput
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.prompts import (
+    BATCH,
+    COMPACT_PROMPTS,
+    CONVERSATIONAL,
+    CONVERSATIONAL_PROMPT,
+    DEFAULT_PROMPTS,
+    SINGLE_TURN,
+    PromptRegistry,
+    PromptSpec,
+)
+from ai_classifier_sample.service.tokens import schema_output_tokens
+
+
+class TestPromptSpec:
+    """Test class for PromptSpec."""
+
+    def test_fast_formatting_matches_template(self):
+        """Test that format_messages produces the same messages as ChatPromptTemplate."""
+        kwargs = {"current_intent": "None", "conversation_context": "user: hi", "current_message": "refund {please}"}
+
+        assert CONVERSATIONAL_PROMPT.format_messages(**kwargs) == CONVERSATIONAL_PROMPT.template.format_messages(**kwargs)
+
+    def test_version_tracks_prompt_and_schema(self):
+        """Test that the version changes when the prompt text or schema changes."""
+        spec = PromptSpec("p", "system", "{question}", ClassifierOutput)
+
+        assert spec.version == PromptSpec("p", "system", "{question}", ClassifierOutput).version
+        assert spec.version != PromptSpec("p", "system v2", "{question}", ClassifierOutput).version
+        assert spec.version != PromptSpec("p", "system", "{question}", BatchClassifierOutput).version
+
+
+class TestPromptRegistry:
+    """Test class for PromptRegistry."""
+
+    def test_runnables_built_once(self, monkeypatch):
+        """Test that classification reuses the runnables compiled at construction."""
+        llm = FakeChatModel()
+        built = []
+        original = FakeChatModel.with_structured_output
+        monkeypatch.setattr(FakeChatModel, "with_structured_output", lambda self, schema, **kw: built.append(schema) or original(self, schema, **kw))
+
+        classifier = MessageClassifier(llm=llm)
+        for _ in range(3):
+            classifier.classify("Where is my order?")
+
+        assert len(built) == len(DEFAULT_PROMPTS)
+
+    def test_versions_exposed(self):
+        """Test that every prompt exposes its version for cache keys."""
+        registry = PromptRegistry(FakeChatModel())
+        classifier = MessageClassifier(llm=FakeChatModel())
+
+        assert set(registry.versions()) == set(DEFAULT_PROMPTS)
+        assert classifier.single_turn_prompt_version == registry.version(SINGLE_TURN)
+        assert registry.version(CONVERSATIONAL) == CONVERSATIONAL_PROMPT.version
+
+
+class TestOutputLimits:
+    """Test class for per-call-type output limits."""
+
+    def test_limits_follow_schema(self):
+        """Test that free-text fields and array sizes drive the estimate, and enums are cheap."""
+        class Tagged(BaseModel):
+            label: Literal["a", "b"]
+
+        single = schema_output_tokens(ClassifierOutput, free_text_tokens=100)
+
+        assert single > 200
+        assert schema_output_tokens(BatchClassifierOutput, free_text_tokens=100, max_items=20) > 10 * schema_output_tokens(BatchClassifierOutput, free_text_tokens=100, max_items=1)
+        assert schema_output_tokens(Tagged, free_text_tokens=100) < 100
+
+    def test_model_output_capped_per_call_type(self):
+        """Test that each prompt gets its own max_tokens and calls needing more get a larger one."""
+        classifier = MessageClassifier(settings=Settings(cloud_profile=None, token_budget_enabled=True, max_tokens=3000))
+        single = classifier.prompts[SINGLE_TURN]
+
+        assert single.runnable.first.bound.max_tokens == single.max_output_tokens < classifier.prompts[CONVERSATIONAL].max_output_tokens
+        assert classifier._runnable_for(SINGLE_TURN, "Where is my order?") is single.runnable
+        assert classifier._runnable_for(SINGLE_TURN, "x" * 4000).first.bound.max_tokens > single.max_output_tokens
+        assert single.runnable_for(extra_tokens=100000).first.bound.max_tokens == 3000
+        assert single.runnable_for(extra_tokens=1000) is single.runnable_for(extra_tokens=1001)
+
+    def test_limits_off_by_default(self):
+        """Test that without token-budget mode the model keeps Settings.max_tokens."""
+        classifier = MessageClassifier(settings=Settings(cloud_profile=None))
+
+        assert classifier.prompts[SINGLE_TURN].max_output_tokens is None
+        assert classifier.prompts[SINGLE_TURN].runnable.first.bound.max_tokens == classifier.settings.max_tokens
+
+
+class TestCompactOutput:
+    """Test class for compact output schemas."""
+
+    def test_outputs_rebuilt_from_input(self):
+        """Test that compact responses expand to the full public objects with the caller's message."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(compact_output_enabled=True), llm=llm)
+        state = classifier.new_conversation()
+
+        single = ClassifierOutput.model_validate_json(classifier.classify("Where is my order?"))
+        turn = classifier.classify_conversational("I want a refund", state)
+        batch = classifier.classify_batch(["Where is my package?", "Thanks!"])
+
+        assert single == ClassifierOutput(message="Where is my order?", category="Order Tracking")
+        assert (turn.message, turn.intent, turn.intent_transition, turn.reasoning) == ("I want a refund", "Refund/Exchange", "NEW", "")
+        assert state.current_intent == "Refund/Exchange"
+        assert [item.category for item in batch] == ["Order Tracking", "Support, Feedback, Complaint"]
+        assert classifier.single_turn_prompt_version == COMPACT_PROMPTS[SINGLE_TURN].version != DEFAULT_PROMPTS[SINGLE_TURN].version
+
+    def test_schemas_are_enum_constrained(self):
+        """Test that compact schemas ask for no free text except optional reasoning."""
+        single = COMPACT_PROMPTS[SINGLE_TURN].schema.model_json_schema()
+        conversational = COMPACT_PROMPTS[CONVERSATIONAL].schema.model_json_schema()
+
+        assert set(single["properties"]) == {"category"}
+        assert "enum" in single["properties"]["category"]
+        assert set(conversational["required"]) == {"intent_transition", "intent", "confidence"}
+        assert "message" not in conversational["properties"]
+        for name in (SINGLE_TURN, CONVERSATIONAL, BATCH):
+            assert schema_output_tokens(COMPACT_PROMPTS[name].schema) < schema_output_tokens(DEFAULT_PROMPTS[name].schema)
+
+    def test_fewer_output_tokens(self):
+        """Test that compact mode generates fewer output tokens for the same messages."""
+        message = "My parcel has not arrived yet and I have been waiting for more than two weeks now " * 3
+        usage = {}
+        for compact in (False, True):
+            classifier = MessageClassifier(settings=Settings(compact_output_enabled=compact), llm=FakeChatModel())
+            classifier.classify(message)
+            classifier.classify_conversational(message, classifier.new_conversation())
+            usage[compact] = classifier.token_usage().output_tokens
+
+        assert usage[True] * 4 < usage[False]
@@ -0,0 +1,158 @@
+"""Tests for recording LLM calls and replaying them offline."""
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel, ReplayChatModel
+from ai_classifier_sample.providers.replay import ReplayMissError
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.recording import Recording, RecordingFormatError, RecordingWriter, index_path, prompt_key
+
+MESSAGES = ["Where is my order?", "I want a refund", "Thanks for the help"]
+
+
+def record(path, latency=0.0):
+    classifier = MessageClassifier(settings=Settings(record_path=str(path)), llm=FakeChatModel(latency=latency))
+    results = [classifier.classify(message) for message in MESSAGES]
+    state = classifier.new_conversation()
+    turns = [classifier.classify_conversational(message, state) for message in MESSAGES]
+    batch = classifier.classify_batch(MESSAGES)
+    classifier.recorder.close()
+    return results, turns, batch
+
+
+class TestRecording:
+    """Test class for the recording file and its index."""
+
+    def test_lookup_and_duplicates(self, tmp_path):
+        """Test keyed lookups, misses and that repeated prompts cycle through their responses."""
+        path = str(tmp_path / "calls.rec")
+        prompt = [SystemMessage(content="system"), HumanMessage(content="hello")]
+        writer = RecordingWriter(path)
+        writer.append("ClassifierOutput", prompt, {"category": "a"}, 0.1)
+        writer.append("ClassifierOutput", prompt, {"category": "b"}, 0.2)
+        writer.append("Other", prompt, {"category": "c"}, 0.3)
+        writer.close()
+
+        recording = Recording(path)
+        key = prompt_key("ClassifierOutput", prompt)
+
+        assert len(recording) == 3
+        assert [recording.lookup(key) for _ in range(3)] == [({"category": "a"}, 0.1), ({"category": "b"}, 0.2), ({"category": "a"}, 0.1)]
+        assert recording.lookup(prompt_key("Other", prompt)) == ({"category": "c"}, 0.3)
+        assert recording.lookup(prompt_key("ClassifierOutput", prompt[1:])) is None
+        assert recording.prompt(key) == {"schema": "ClassifierOutput", "messages": [["system", "system"], ["human", "hello"]]}
+
+    def test_index_rebuilt_and_partial_record_skipped(self, tmp_path):
+        """Test that records appended after indexing are found and a torn last record is ignored."""
+        path = str(tmp_path / "calls.rec")
+        first, second = [HumanMessage(content="one")], [HumanMessage(content="two")]
+        writer = RecordingWriter(path)
+        writer.append("S", first, {"n": 1}, 0.0)
+        writer.close()
+        writer = RecordingWriter(path)
+        writer.append("S", second, {"n": 2}, 0.0)
+        writer._file.write(b"\x00" * 10)
+        writer._file.close()
+
+        size = os.path.getsize(path)
+        recording = Recording(path)
+        recording.close()
+        index_mtime = os.stat(index_path(path)).st_mtime_ns
+        recording = Recording(path)
+
+        assert recording.lookup(prompt_key("S", second)) == ({"n": 2}, 0.0)
+        assert len(recording) == 2
+        assert os.stat(index_path(path)).st_mtime_ns == index_mtime
+        assert os.path.getsize(path) == size
+
+    def test_append_after_torn_record(self, tmp_path):
+        """Test that a writer opened after a crash cuts the torn record before appending."""
+        path = str(tmp_path / "calls.rec")
+        first, second = [HumanMessage(content="one")], [HumanMessage(content="two")]
+        writer = RecordingWriter(path)
+        writer.append("S", first, {"n": 1}, 0.0)
+        writer._file.write(b"\x00" * 30)
+        writer._file.close()
+
+        # Another writer's append in progress holds a shared lock; the torn record is only cut after it.
+        appending = open(path, "ab")
+        fcntl.flock(appending.fileno(), fcntl.LOCK_SH)
+        opened = []
+        thread = threading.Thread(target=lambda: opened.append(RecordingWriter(path)))
+        thread.start()
+        thread.join(0.2)
+        assert not opened
+        fcntl.flock(appending.fileno(), fcntl.LOCK_UN)
+        appending.close()
+        thread.join(5)
+
+        writer = opened[0]
+        writer.append("S", second, {"n": 2}, 0.0)
+        writer.close()
+
+        recording = Recording(path)
+        assert [recording.lookup(prompt_key("S", messages)) for messages in (first, second)] == [({"n": 1}, 0.0), ({"n": 2}, 0.0)]
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file without the recording header is refused."""
+        path = tmp_path / "not-a-recording"
+        path.write_text("hello")
+
+        with pytest.raises(RecordingFormatError):
+            Recording(str(path))
+        with pytest.raises(RecordingFormatError):
+            RecordingWriter(str(path))
+
+
+class TestReplay:
+    """Test class for replaying recorded traffic through MessageClassifier."""
+
+    def test_replay_matches_recording(self, tmp_path):
+        """Test that every call type replays the recorded responses without a model."""
+        path = tmp_path / "calls.rec"
+        results, turns, batch = record(path)
+        assert (tmp_path / "calls.rec.idx").exists()
+
+        classifier = MessageClassifier(settings=Settings(replay_path=str(path), replay_latency_scale=0))
+        state = classifier.new_conversation()
+
+        assert isinstance(classifier.llm, ReplayChatModel)
+        assert classifier.router is None
+        assert [classifier.classify(message) for message in MESSAGES] == results
+        assert [classifier.classify_conversational(message, state) for message in MESSAGES] == turns
+        assert asyncio.run(classifier.aclassify_batch(MESSAGES)) == batch
+        assert classifier.llm.misses == 0
+        assert classifier.token_usage().output_tokens > 0
+
+    def test_scaled_latency(self, tmp_path):
+        """Test that recorded latencies are replayed times the scale."""
+        path = tmp_path / "calls.rec"
+        record(path, latency=0.05)
+        classifier = MessageClassifier(settings=Settings(replay_path=str(path), replay_latency_scale=0.5))
+
+        start = time.perf_counter()
+        classifier.classify(MESSAGES[0])
+
+        assert 0.02 <= time.perf_counter() - start < 0.05
+
+    def test_unrecorded_prompt_raises(self, tmp_path):
+        """Test that a prompt missing from the recording fails without retries."""
+        path = tmp_path / "calls.rec"
+        record(path)
+        classifier = MessageClassifier(settings=Settings(replay_path=str(path), replay_latency_scale=0))
+
+        with pytest.raises(ReplayMissError):
+            classifier.classify("Something never recorded")
+
+        assert classifier.llm.misses == 1
+        assert classifier.scheduler.stats().retries == 0
+        assert json.loads(classifier.classify(MESSAGES[1]))["category"] == "Refund/Exchange"
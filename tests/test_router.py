@@ -0,0 +1,129 @@
+"""Tests for multi-endpoint routing, circuit breaking and failover."""
+
+import asyncio
+import json
+
+import pytest
+
+from ai_classifier_sample.config.settings import Endpoint, Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.router import EndpointRouter, NoHealthyEndpointError, RoutedEndpoint, build_router
+from ai_classifier_sample.service.scheduler import ThrottlingError
+
+SETTINGS = Settings(llm_max_retries=0)
+
+
+def fake_router(*llms: FakeChatModel, weights=None, **kwargs) -> EndpointRouter:
+    weights = weights or [1.0] * len(llms)
+    endpoints = [
+        RoutedEndpoint(Endpoint(region=f"region-{i}", model_arn="model", weight=weight), SETTINGS, llm=llm)
+        for i, (llm, weight) in enumerate(zip(llms, weights))
+    ]
+    return EndpointRouter(endpoints, **kwargs)
+
+
+class TestEndpointRouter:
+    """Test class for EndpointRouter selection and circuit breaking."""
+
+    def test_least_outstanding_respects_weights(self):
+        """Test that concurrent calls spread across endpoints in proportion to their weights."""
+        router = fake_router(FakeChatModel(), FakeChatModel(), weights=[2.0, 1.0])
+
+        chosen = [router.acquire().name for _ in range(6)]
+
+        assert chosen.count("region-0/model") == 4
+        assert chosen.count("region-1/model") == 2
+
+    def test_ewma_prefers_faster_endpoint(self):
+        """Test that the EWMA strategy sends idle traffic to the endpoint with lower latency."""
+        router = fake_router(FakeChatModel(), FakeChatModel(), strategy="ewma")
+        slow, fast = router.endpoints
+        router.release(router.acquire(exclude={fast.name}), latency=0.5)
+        router.release(router.acquire(exclude={slow.name}), latency=0.05)
+
+        assert {router.acquire().name for _ in range(3)} == {fast.name}
+
+    def test_circuit_opens_and_recovers(self):
+        """Test ejection after consecutive failures and recovery through a half-open trial."""
+        router = fake_router(FakeChatModel(), failure_threshold=2, reset_seconds=0)
+        endpoint = router.endpoints[0]
+
+        for _ in range(2):
+            router.release(router.acquire(), error=ThrottlingError())
+        assert router.stats()[0].state == "open"
+        assert router.stats()[0].ejections == 1
+
+        trial = router.acquire()
+        assert trial.state == "half_open"
+        with pytest.raises(NoHealthyEndpointError):
+            router.acquire()
+
+        router.release(trial, latency=0.01)
+        assert endpoint.state == "closed"
+
+    def test_open_circuit_rejects_until_reset(self):
+        """Test that an ejected endpoint gets no traffic while it rests."""
+        router = fake_router(FakeChatModel(), failure_threshold=1, reset_seconds=60)
+        router.release(router.acquire(), error=ThrottlingError())
+
+        with pytest.raises(NoHealthyEndpointError):
+            router.acquire()
+
+    def test_other_errors_do_not_eject(self):
+        """Test that errors unrelated to endpoint health leave the circuit closed."""
+        router = fake_router(FakeChatModel(), failure_threshold=1)
+
+        router.release(router.acquire(), error=ValueError("bad response"))
+
+        assert router.stats()[0].state == "closed"
+
+    def test_build_router_from_settings(self):
+        """Test that endpoints parsed from settings become routed endpoints."""
+        settings = Settings(endpoints=[{"region": "us-east-1", "model_arn": "a"}, {"region": "us-west-2", "model_arn": "a", "name": "west"}])
+
+        router = build_router(settings)
+
+        assert [endpoint.name for endpoint in router.endpoints] == ["us-east-1/a", "west"]
+        assert router.endpoints[1].settings.cloud_region == "us-west-2"
+        assert build_router(Settings()) is None
+
+
+class TestClassifierRouting:
+    """Test class for MessageClassifier with routed fake endpoints."""
+
+    def test_fails_over_to_healthy_endpoint(self):
+        """Test that a throttling endpoint is skipped transparently and then ejected."""
+        down, up = FakeChatModel(throttle_rate=1.0), FakeChatModel()
+        router = fake_router(down, up, weights=[5.0, 1.0], failure_threshold=2, reset_seconds=60)
+        classifier = MessageClassifier(settings=SETTINGS, router=router)
+
+        results = [json.loads(classifier.classify(f"Where is order {i}?")) for i in range(5)]
+
+        stats = {endpoint.name: endpoint for endpoint in router.stats()}
+        assert all(result["category"] == "Order Tracking" for result in results)
+        assert down.throttled == 2
+        assert up.calls == 5
+        assert stats["region-0/model"].state == "open"
+        assert stats["region-0/model"].failovers == 2
+        assert classifier.scheduler.stats().throttles == 0
+
+    def test_error_raised_when_every_endpoint_fails(self):
+        """Test that the last error propagates once no endpoint is left to try."""
+        router = fake_router(FakeChatModel(throttle_rate=1.0), FakeChatModel(throttle_rate=1.0))
+        classifier = MessageClassifier(settings=SETTINGS, router=router)
+
+        with pytest.raises(ThrottlingError):
+            classifier.classify("Where is my order?")
+
+        assert [endpoint.requests for endpoint in router.stats()] == [1, 1]
+
+    def test_async_calls_spread_across_endpoints(self):
+        """Test that concurrent async calls are balanced by outstanding requests."""
+        first, second = FakeChatModel(latency=0.01), FakeChatModel(latency=0.01)
+        classifier = MessageClassifier(settings=Settings(max_concurrency=8), router=fake_router(first, second))
+
+        asyncio.run(classifier.aclassify_many([f"message {i}" for i in range(16)]))
+
+        assert first.calls == second.calls == 8
+        assert first.max_in_flight == second.max_in_flight == 4
@@ -0,0 +1,82 @@
+"""Tests for the rule-based local fast path."""
+
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.rules import KeywordAutomaton, Rule, RuleClassifier
+
+
+class TestKeywordAutomaton:
+    """Test class for the Aho-Corasick keyword matcher."""
+
+    def test_finds_overlapping_keywords(self):
+        """Test that keywords sharing prefixes and suffixes are all found."""
+        automaton = KeywordAutomaton(["he", "she", "hers", "his"])
+        assert automaton.search("ushers") == set()
+        assert automaton.search("she hers his") == {"she", "he", "hers", "his"}
+
+    def test_matches_only_at_word_start(self):
+        """Test that a keyword inside another word does not match."""
+        automaton = KeywordAutomaton(["return"])
+        assert automaton.search("Returned it") == {"return"}
+        assert automaton.search("nonreturnable") == set()
+
+
+class TestRuleClassifier:
+    """Test class for RuleClassifier."""
+
+    def test_bundled_rules(self):
+        """Test the default rules on obvious and ambiguous messages."""
+        rules = RuleClassifier.from_file()
+
+        assert rules.match("Order #12345 tracking shows nothing").category == "Order Tracking"
+        assert rules.match("I want a refund").category == "Refund/Exchange"
+        assert rules.match("Return this, tracking #12345 says delivered") is None
+        assert rules.match("Hello there") is None
+
+    def test_keywords_and_patterns_must_both_match(self):
+        """Test that a rule with both groups needs a hit in each."""
+        rules = RuleClassifier([Rule(name="r", category="Order Tracking", keywords=["tracking"], patterns=[r"#\d+"], confidence=1.0)])
+
+        assert rules.match("tracking please") is None
+        assert rules.match("tracking #42").rules == ["r"]
+
+    def test_low_confidence_defers_to_llm(self):
+        """Test that rules under the confidence floor do not serve the message."""
+        rules = RuleClassifier([Rule(name="r", category="Refund/Exchange", keywords=["refund"], confidence=0.5)], min_confidence=0.9)
+        assert rules.match("refund") is None
+
+    def test_rule_needs_a_condition(self):
+        """Test that a rule with no keywords or patterns is rejected."""
+        with pytest.raises(ValidationError):
+            Rule(name="empty", category="Refund/Exchange", confidence=1.0)
+
+    def test_load_from_file(self, tmp_path):
+        """Test that rules load from a custom file."""
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps({"rules": [{"name": "thanks", "category": "Support, Feedback, Complaint", "keywords": ["thank you"], "confidence": 0.95}]}))
+
+        assert RuleClassifier.from_file(str(path)).match("Thank you!").category == "Support, Feedback, Complaint"
+
+
+class TestClassifierRules:
+    """Test class for the fast path in MessageClassifier."""
+
+    def test_served_locally_and_reported(self):
+        """Test that rule hits skip the LLM and are counted."""
+        llm = FakeChatModel(latency=0.01)
+        classifier = MessageClassifier(settings=Settings(rules_enabled=True), llm=llm)
+
+        local = json.loads(classifier.classify("I want a refund"))
+        classifier.classify("Hello there")
+
+        assert local == {"message": "I want a refund", "category": "Refund/Exchange"}
+        assert llm.calls == 1
+        stats = classifier.rules.stats()
+        assert stats.local_fraction == 0.5
+        assert stats.latency_saved_seconds > 0
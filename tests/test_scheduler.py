@@ -0,0 +1,227 @@
+"""Tests for adaptive concurrency, retries, deadlines and hedging of LLM calls."""
+
+import asyncio
+import json
+import random
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.scheduler import (
+    AdaptiveLimiter,
+    DeadlineExceededError,
+    LLMScheduler,
+    ThrottlingError,
+    is_retryable_error,
+    is_throttling_error,
+)
+
+
+class FakeClientError(Exception):
+    """Shaped like botocore's ClientError."""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code, "Message": code}}
+
+
+def flaky(failures: int, error: Exception = None):
+    """A call that raises error for its first failures attempts, then returns 'ok'."""
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) <= failures:
+            raise error or ThrottlingError("slow down")
+        return "ok"
+
+    return call, attempts
+
+
+def scheduler(limit: int = 4, **kwargs) -> LLMScheduler:
+    kwargs.setdefault("base_delay", 0.001)
+    return LLMScheduler(AdaptiveLimiter(limit, max_limit=kwargs.pop("max_limit", None)), rng=random.Random(0), **kwargs)
+
+
+class TestErrorClassification:
+    """Test class for recognising throttling and transient errors."""
+
+    def test_throttling_and_transient_codes(self):
+        """Test that AWS error codes decide whether a call is retried."""
+        assert is_throttling_error(FakeClientError("ThrottlingException"))
+        assert is_throttling_error(ThrottlingError())
+        assert not is_throttling_error(FakeClientError("ServiceUnavailableException"))
+        assert is_retryable_error(FakeClientError("ServiceUnavailableException"))
+        assert not is_retryable_error(FakeClientError("ValidationException"))
+        assert not is_retryable_error(ValueError("bad schema"))
+
+
+class TestLimiter:
+    """Test class for AdaptiveLimiter."""
+
+    def test_additive_increase_is_bounded(self):
+        """Test that successes raise the limit by about one per limit's worth of calls."""
+        limiter = AdaptiveLimiter(2, max_limit=4)
+
+        for _ in range(3):
+            limiter.on_success()
+        assert int(limiter.limit) == 3
+
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.limit == 4
+
+    def test_one_decrease_per_burst_of_throttles(self):
+        """Test that throttles from calls started before a decrease are ignored."""
+        limiter = AdaptiveLimiter(16, min_limit=2)
+        started_at = 0.0
+
+        for _ in range(5):
+            limiter.on_throttle(started_at)
+        assert limiter.limit == 8
+
+        limiter.on_throttle(float("inf"))
+        assert limiter.limit == 4
+        for _ in range(3):
+            limiter.on_throttle(float("inf"))
+        assert limiter.limit == 2
+
+    def test_fixed_limit_when_not_adaptive(self):
+        """Test that a non-adaptive limiter ignores successes and throttles."""
+        limiter = AdaptiveLimiter(3, adaptive=False)
+
+        limiter.on_success()
+        limiter.on_throttle(float("inf"))
+
+        assert limiter.limit == 3
+        assert [limiter.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+class TestScheduler:
+    """Test class for LLMScheduler retries, deadlines and hedging."""
+
+    def test_retries_throttled_call(self):
+        """Test that throttled calls are retried with backoff and then succeed."""
+        llm_scheduler = scheduler(max_retries=3)
+        call, attempts = flaky(2)
+
+        assert llm_scheduler.call(call) == "ok"
+
+        stats = llm_scheduler.stats()
+        assert len(attempts) == 3
+        assert (stats.calls, stats.succeeded, stats.throttles, stats.retries) == (1, 1, 2, 2)
+        assert stats.in_flight == 0
+
+    def test_gives_up_after_max_retries(self):
+        """Test that the last error propagates once retries run out."""
+        llm_scheduler = scheduler(max_retries=1)
+        call, attempts = flaky(5, FakeClientError("ThrottlingException"))
+
+        with pytest.raises(FakeClientError):
+            llm_scheduler.call(call)
+
+        assert len(attempts) == 2
+        assert llm_scheduler.stats().failed == 1
+
+    def test_does_not_retry_other_errors(self):
+        """Test that errors that are not throttling or transient are raised at once."""
+        llm_scheduler = scheduler(max_retries=3)
+        call, attempts = flaky(1, ValueError("bad schema"))
+
+        with pytest.raises(ValueError):
+            llm_scheduler.call(call)
+
+        assert len(attempts) == 1
+
+    def test_deadline_bounds_retries(self):
+        """Test that backoff never runs past the deadline."""
+        llm_scheduler = scheduler(max_retries=100, base_delay=0.05, deadline_seconds=0.1)
+        call, _ = flaky(1000)
+
+        with pytest.raises(DeadlineExceededError):
+            llm_scheduler.call(call)
+
+        assert llm_scheduler.stats().deadline_exceeded == 1
+
+    def test_async_deadline_cancels_slow_call(self):
+        """Test that an async attempt still running at the deadline is cancelled."""
+        llm_scheduler = scheduler(deadline_seconds=0.05)
+
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(llm_scheduler.acall(lambda: asyncio.sleep(1)))
+
+        assert llm_scheduler.stats().in_flight == 0
+
+    def test_hedges_slow_call(self):
+        """Test that a call slower than recent p95 is hedged and the faster copy wins."""
+        llm_scheduler = scheduler(hedging=True, hedge_min_samples=5)
+        latencies = iter([0.001] * 5 + [1.0, 0.001])
+
+        async def call():
+            await asyncio.sleep(next(latencies))
+            return "ok"
+
+        async def run():
+            for _ in range(5):
+                await llm_scheduler.acall(call)
+            return await asyncio.wait_for(llm_scheduler.acall(call), timeout=0.5)
+
+        assert asyncio.run(run()) == "ok"
+
+        stats = llm_scheduler.stats()
+        assert (stats.hedges, stats.hedge_wins) == (1, 1)
+        assert stats.in_flight == 0
+
+    def test_no_hedge_without_spare_capacity(self):
+        """Test that hedges are skipped when every slot is taken."""
+        llm_scheduler = scheduler(limit=1, hedging=True, hedge_min_samples=1)
+
+        async def run():
+            await llm_scheduler.acall(lambda: asyncio.sleep(0.001))
+            await llm_scheduler.acall(lambda: asyncio.sleep(0.05))
+
+        asyncio.run(run())
+
+        assert llm_scheduler.stats().hedges == 0
+
+
+class TestClassifierScheduling:
+    """Test class for MessageClassifier under an injected throttling fake."""
+
+    def test_adaptive_limit_converges_below_capacity(self):
+        """Test that throttling shrinks the limit and every message is still classified."""
+        llm = FakeChatModel(latency=0.005, capacity=3)
+        settings = Settings(max_concurrency=12, adaptive_concurrency_enabled=True, llm_max_retries=20, llm_retry_base_delay=0.001, llm_retry_max_delay=0.01)
+        classifier = MessageClassifier(settings=settings, llm=llm)
+        messages = [f"message {i}" for i in range(40)]
+
+        results = asyncio.run(classifier.aclassify_many(messages))
+
+        stats = classifier.scheduler.stats()
+        assert [json.loads(result)["message"] for result in results] == messages
+        assert llm.throttled > 0
+        assert stats.throttles == llm.throttled
+        assert stats.concurrency_limit < 12
+        assert stats.succeeded == 40
+
+    def test_sync_classify_retries_random_throttles(self):
+        """Test that the sync path retries throttles injected by the fake."""
+        llm = FakeChatModel(throttle_rate=0.5, seed=1)
+        classifier = MessageClassifier(settings=Settings(llm_max_retries=10, llm_retry_base_delay=0.001), llm=llm)
+
+        for i in range(10):
+            assert json.loads(classifier.classify(f"Where is order {i}?"))["category"] == "Order Tracking"
+
+        assert classifier.scheduler.stats().retries == llm.throttled > 0
+
+    def test_fixed_concurrency_limit_by_default(self):
+        """Test that without adaptive mode the limit stays at max_concurrency."""
+        llm = FakeChatModel(latency=0.005)
+        classifier = MessageClassifier(settings=Settings(max_concurrency=4), llm=llm)
+
+        asyncio.run(classifier.aclassify_many([f"message {i}" for i in range(20)]))
+
+        assert llm.max_in_flight == 4
+        assert classifier.scheduler.stats().concurrency_limit == 4
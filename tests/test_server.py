@@ -0,0 +1,207 @@
+"""Tests for the micro-batcher and the ASGI app."""
+
+import asyncio
+import json
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.server import create_app
+from ai_classifier_sample.service.batcher import MicroBatcher
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.tenants import ClassifierRegistry
+
+MESSAGES = ["Where is my order?", "Refund please", "Great service", "Track my package", "Exchange this"]
+
+
+async def request(app, method, path, payload=None, headers=()):
+    """Drive one HTTP request through the ASGI app and return (status, decoded body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    events = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return events.pop(0) if events else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": list(headers)}, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+class TestMicroBatcher:
+    """Test class for MicroBatcher."""
+
+    def test_concurrent_requests_share_one_call(self):
+        """Test that requests arriving inside the window go out as one batch."""
+        llm = FakeChatModel(latency=0.01)
+        batcher = MicroBatcher(MessageClassifier(llm=llm), max_batch_size=20, max_wait_seconds=0.02)
+
+        async def run():
+            return await asyncio.gather(*(batcher.classify(message) for message in MESSAGES))
+
+        results = asyncio.run(run())
+
+        assert [result.message for result in results] == MESSAGES
+        assert [result.category for result in results][:2] == ["Order Tracking", "Refund/Exchange"]
+        assert llm.calls == 1
+        assert batcher.stats().largest_batch == len(MESSAGES)
+
+    def test_full_batch_flushes_without_waiting(self):
+        """Test that reaching max_batch_size sends the batch before the window ends."""
+        llm = FakeChatModel()
+        batcher = MicroBatcher(MessageClassifier(llm=llm), max_batch_size=2, max_wait_seconds=60)
+
+        async def run():
+            return await asyncio.wait_for(asyncio.gather(*(batcher.classify(message) for message in MESSAGES[:4])), timeout=5)
+
+        asyncio.run(run())
+        stats = batcher.stats()
+        assert stats.batches == 2
+        assert stats.average_batch_size == 2
+
+    def test_zero_wait_disables_batching(self):
+        """Test that each request is classified on its own when the window is zero."""
+        llm = FakeChatModel()
+        batcher = MicroBatcher(MessageClassifier(llm=llm), max_wait_seconds=0)
+
+        async def run():
+            return await asyncio.gather(*(batcher.classify(message) for message in MESSAGES))
+
+        asyncio.run(run())
+        assert llm.calls == len(MESSAGES)
+        assert batcher.stats().batches == 0
+
+    def test_failure_reaches_every_caller(self):
+        """Test that an LLM error is raised to all callers in the batch."""
+        def failing_responder(messages, function):
+            raise RuntimeError("throttled")
+
+        batcher = MicroBatcher(MessageClassifier(llm=FakeChatModel(responder=failing_responder)), max_wait_seconds=0.01)
+
+        async def run():
+            return await asyncio.gather(*(batcher.classify(message) for message in MESSAGES[:3]), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+
+class TestClassifierApp:
+    """Test class for the HTTP endpoints."""
+
+    def test_classify_endpoints(self):
+        """Test single-turn and conversational classification over HTTP."""
+        app = create_app(MessageClassifier(llm=FakeChatModel()))
+
+        async def run():
+            single = await request(app, "POST", "/classify", {"message": "Refund please"})
+            first = await request(app, "POST", "/classify/conversational", {"message": "Where is my order?", "conversation_id": "c1"})
+            second = await request(app, "POST", "/classify/conversational", {"message": "Any tracking update?", "conversation_id": "c1"})
+            return single, first, second
+
+        single, first, second = asyncio.run(run())
+
+        assert single == (200, {"message": "Refund please", "category": "Refund/Exchange"})
+        assert first[0] == 200 and first[1]["intent_transition"] == "NEW"
+        assert second[1]["intent_transition"] == "CONTINUE"
+
+    def test_concurrent_http_requests_are_batched(self):
+        """Test that concurrent HTTP requests reach the LLM as one call and metrics report it."""
+        llm = FakeChatModel(latency=0.01)
+        app = create_app(MessageClassifier(settings=Settings(server_batch_max_wait_ms=20), llm=llm))
+
+        async def run():
+            responses = await asyncio.gather(*(request(app, "POST", "/classify", {"message": message}) for message in MESSAGES))
+            return responses, await request(app, "GET", "/metrics")
+
+        responses, (_, metrics) = asyncio.run(run())
+
+        assert [body["message"] for _, body in responses] == MESSAGES
+        assert llm.calls == 1
+        assert metrics["requests"]["/classify"] == len(MESSAGES)
+        assert metrics["batcher"]["largest_batch"] == len(MESSAGES)
+        assert metrics["token_usage"]["calls"] == 1
+        assert metrics["scheduler"]["succeeded"] == 1
+
+    def test_errors(self):
+        """Test health, unknown routes, wrong methods and invalid bodies."""
+        app = create_app(MessageClassifier(llm=FakeChatModel()))
+
+        async def run():
+            return [
+                await request(app, "GET", "/health"),
+                await request(app, "GET", "/missing"),
+                await request(app, "GET", "/classify"),
+                await request(app, "POST", "/classify", {"text": "hi"}),
+                await request(app, "POST", "/classify/conversational", {"message": "hi"}),
+            ]
+
+        health, missing, wrong_method, invalid, no_id = asyncio.run(run())
+
+        assert health == (200, {"status": "ok"})
+        assert [missing[0], wrong_method[0], invalid[0], no_id[0]] == [404, 405, 422, 422]
+
+    def test_busy_conversation_gets_429(self):
+        """Test that turns beyond a conversation's queue are refused and other conversations still run."""
+        settings = Settings(conversation_queue_size=1, conversation_queue_timeout=0)
+        app = create_app(MessageClassifier(settings=settings, llm=FakeChatModel(latency=0.05)))
+
+        async def run():
+            turns = [request(app, "POST", "/classify/conversational", {"message": message, "conversation_id": "c1"}) for message in MESSAGES[:3]]
+            other = request(app, "POST", "/classify/conversational", {"message": MESSAGES[0], "conversation_id": "c2"})
+            responses = await asyncio.gather(*turns, other)
+            return responses, await request(app, "GET", "/metrics")
+
+        responses, (_, metrics) = asyncio.run(run())
+
+        assert [status for status, _ in responses] == [200, 429, 429, 200]
+        assert metrics["conversations"]["rejected"] == 2
+        assert metrics["conversations"]["active_actors"] == 2
+
+    def test_tenants_routed_by_header(self):
+        """Test that each tenant is served by its own classifier and reported separately."""
+        llm = FakeChatModel()
+        registry = ClassifierRegistry(
+            Settings(), {"acme": {}, "globex": {"server_batch_max_wait_ms": 0}}, factory=lambda settings, sessions: MessageClassifier(settings=settings, llm=llm, sessions=sessions)
+        )
+        app = create_app(settings=Settings(), registry=registry)
+
+        async def run():
+            acme = await request(app, "POST", "/classify", {"message": MESSAGES[0]}, [(b"X-Tenant-Id", b"acme")])
+            globex = await request(
+                app, "POST", "/classify/conversational", {"message": MESSAGES[1], "conversation_id": "c1"}, [(b"x-tenant-id", b"globex")]
+            )
+            missing = await request(app, "POST", "/classify", {"message": MESSAGES[0]})
+            unknown = await request(app, "POST", "/classify", {"message": MESSAGES[0]}, [(b"x-tenant-id", b"hooli")])
+            return acme, globex, missing, unknown, await request(app, "GET", "/metrics")
+
+        acme, globex, missing, unknown, (_, metrics) = asyncio.run(run())
+
+        assert (acme[0], acme[1]["category"]) == (200, "Order Tracking")
+        assert (globex[0], globex[1]["intent"]) == (200, "Refund/Exchange")
+        assert [missing[0], unknown[0]] == [400, 404]
+        assert registry.get("globex").sessions.load("c1")[1] == 1
+        assert registry.get("acme").sessions.load("c1")[1] == 0
+        assert metrics["registry"]["active"] == 2
+        assert metrics["tenants"]["acme"]["batcher"]["requests"] == 1
+        assert metrics["tenants"]["globex"]["conversations"]["requests"] == 1
+
+    def test_evicted_tenant_finishes_in_flight_requests(self, tmp_path):
+        """Test that a request outlives the eviction of its tenant and the classifier is closed afterwards."""
+        tenants = {"acme": {"result_cache_enabled": True, "result_cache_path": str(tmp_path / "acme.db")}, "globex": {}}
+        registry = ClassifierRegistry(
+            Settings(server_batch_max_wait_ms=0), tenants, max_classifiers=1,
+            factory=lambda settings, sessions: MessageClassifier(settings=settings, llm=FakeChatModel(latency=0.05), sessions=sessions),
+        )
+        app = create_app(settings=Settings(), registry=registry)
+
+        async def run():
+            acme = asyncio.ensure_future(request(app, "POST", "/classify", {"message": MESSAGES[0]}, [(b"x-tenant-id", b"acme")]))
+            await asyncio.sleep(0.01)
+            globex = await request(app, "POST", "/classify", {"message": MESSAGES[1]}, [(b"x-tenant-id", b"globex")])
+            return await acme, globex
+
+        acme, globex = asyncio.run(run())
+
+        assert (acme[0], globex[0]) == (200, 200)
+        assert registry.stats().evictions == 1
+        assert registry.tenant_stats()[0].active is False
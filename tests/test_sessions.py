@@ -0,0 +1,156 @@
+"""Tests for the conversation session stores."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import ConversationState, MessageClassifier
+from ai_classifier_sample.service.sessions import (
+    ConcurrentModificationError,
+    MemorySessionStore,
+    SQLiteSessionStore,
+    build_session_store,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+
+class TestSessionStore:
+    """Test class for the memory and SQLite session stores."""
+
+    def test_round_trip(self, store):
+        """Test that a saved state loads back with the same history and intents."""
+        state, version = store.load("c1")
+        assert version == 0
+        state.add_turn("Where is my order?", "user", "Order Tracking")
+        state.resolve_current_intent("Order Tracking")
+
+        assert store.save("c1", state, expected_version=version) == 1
+        loaded, version = store.load("c1")
+
+        assert version == 1
+        assert loaded.to_dict() == state.to_dict()
+        assert loaded.render_context() == state.render_context()
+
+    def test_stale_version_is_rejected(self, store):
+        """Test that a save based on an outdated version raises a conflict."""
+        first, version = store.load("c1")
+        second, _ = store.load("c1")
+        store.save("c1", first, expected_version=version)
+
+        with pytest.raises(ConcurrentModificationError):
+            store.save("c1", second, expected_version=version)
+
+    def test_expire_idle(self, store):
+        """Test that idle sessions are dropped and active ones kept."""
+        store.save("old", ConversationState(), expected_version=0)
+        time.sleep(0.05)
+        store.save("new", ConversationState(), expected_version=0)
+
+        assert store.expire_idle(max_idle_seconds=0.03) == 1
+        assert store.load("old")[1] == 0
+        assert store.load("new")[1] == 1
+
+    def test_expired_session_restarts(self, tmp_path):
+        """Test that a session past its TTL loads empty and can be saved again."""
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=0.01)
+        state = ConversationState()
+        state.add_turn("hello", "user")
+        store.save("c1", state, expected_version=0)
+        time.sleep(0.02)
+
+        loaded, version = store.load("c1")
+        assert not loaded.conversation_history
+        assert store.save("c1", loaded, expected_version=version) == version + 1
+
+    def test_memory_store_is_bounded(self):
+        """Test that the in-process store evicts the least recently used session."""
+        store = MemorySessionStore(max_sessions=2)
+        store.save("a", ConversationState(), expected_version=0)
+        store.save("b", ConversationState(), expected_version=0)
+        store.load("a")
+        store.save("c", ConversationState(), expected_version=0)
+
+        assert len(store) == 2
+        assert store.load("b")[1] == 0
+        assert store.load("a")[1] == 1
+
+    def test_sqlite_requires_path(self):
+        """Test that the SQLite backend needs a file path."""
+        with pytest.raises(ValueError):
+            build_session_store(Settings(session_store="sqlite"))
+
+
+class TestClassifierSessions:
+    """Test class for conversation ids in MessageClassifier."""
+
+    def test_context_shared_across_workers(self, tmp_path):
+        """Test that two classifiers on one SQLite file continue the same conversation."""
+        settings = Settings(session_store="sqlite", session_store_path=str(tmp_path / "sessions.db"))
+        first = MessageClassifier(settings=settings, llm=FakeChatModel())
+        second = MessageClassifier(settings=settings, llm=FakeChatModel())
+
+        first.classify_conversational("Where is my order #12345?", conversation_id="c1")
+        response = second.classify_conversational("Any update on the tracking?", conversation_id="c1")
+
+        assert response.intent_transition == "CONTINUE"
+        state, version = second.sessions.load("c1")
+        assert version == 2
+        assert [turn.message for turn in state.conversation_history] == ["Where is my order #12345?", "Any update on the tracking?"]
+
+    def test_conflict_is_retried(self):
+        """Test that a turn is re-classified when another writer saved first."""
+        store = MemorySessionStore()
+        classifier = MessageClassifier(llm=FakeChatModel(), sessions=store)
+        original_save = store.save
+        interleaved = []
+
+        def racing_save(conversation_id, state, expected_version):
+            if not interleaved:
+                # Simulate another worker appending a turn between our load and save.
+                interleaved.append(True)
+                other, version = store.load(conversation_id)
+                other.add_turn("I want a refund", "user", "Refund/Exchange")
+                original_save(conversation_id, other, version)
+            return original_save(conversation_id, state, expected_version)
+
+        store.save = racing_save
+        classifier.classify_conversational("Where is my order?", conversation_id="c1")
+
+        state, version = store.load("c1")
+        assert version == 2
+        assert [turn.message for turn in state.conversation_history] == ["I want a refund", "Where is my order?"]
+
+    def test_async_sqlite_calls_leave_the_event_loop(self, tmp_path):
+        """Test that async calls load and save SQLite sessions in a worker thread."""
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        classifier = MessageClassifier(llm=FakeChatModel(), sessions=store)
+        threads = []
+        original_load, original_save = store.load, store.save
+        store.load = lambda *args: threads.append(threading.get_ident()) or original_load(*args)
+        store.save = lambda *args, **kwargs: threads.append(threading.get_ident()) or original_save(*args, **kwargs)
+
+        async def run():
+            await classifier.aclassify_conversational("Where is my order?", conversation_id="c1")
+            await classifier.aclassify_conversational_turns(["Any update?", "I want a refund"], conversation_id="c1")
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        assert len(threads) == 4 and loop_thread not in threads
+        assert store.load("c1")[1] == 2
+
+    def test_requires_state_or_id(self):
+        """Test that a call without a state or conversation id is rejected."""
+        classifier = MessageClassifier(llm=FakeChatModel())
+        with pytest.raises(ValueError):
+            classifier.classify_conversational("hello")
@@ -0,0 +1,105 @@
+"""Tests for near-duplicate classification reuse."""
+
+import json
+import threading
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.similarity import SimilarityIndex, hashed_ngram_vector
+
+
+class TestSimilarityIndex:
+    """Test class for SimilarityIndex."""
+
+    def test_near_duplicate_hits(self):
+        """Test that punctuation and contractions do not prevent a match."""
+        index = SimilarityIndex(namespace="test")
+        index.add("where is my order", "Order Tracking")
+
+        assert index.lookup("Where's my order??") == "Order Tracking"
+        assert index.lookup("I want a refund") is None
+        assert (index.stats().hits, index.stats().misses) == (1, 1)
+
+    def test_vectors_are_unit_length(self):
+        """Test that dot products are cosine similarities."""
+        vector = hashed_ngram_vector("refund please", 256)
+        assert abs(float(vector @ vector) - 1.0) < 1e-5
+
+    def test_oldest_entry_is_evicted(self):
+        """Test that the index stays bounded and overwrites the oldest entry."""
+        index = SimilarityIndex(namespace="test", max_entries=2)
+        index.add("where is my order", "Order Tracking")
+        index.add("refund please", "Refund/Exchange")
+        index.add("thanks for the great support", "Support, Feedback, Complaint")
+
+        assert index.lookup("where is my order") is None
+        assert index.lookup("refund please") == "Refund/Exchange"
+        assert index.stats().evictions == 1
+        assert index.stats().size == 2
+
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test that a snapshot restores entries into a new index."""
+        path = str(tmp_path / "index.npz")
+        index = SimilarityIndex(namespace="test", max_entries=2)
+        for message, category in [("a b c", "A"), ("where is my order", "Order Tracking"), ("refund please", "Refund/Exchange")]:
+            index.add(message, category)
+        index.save(path)
+
+        restored = SimilarityIndex(namespace="test", max_entries=4, snapshot_path=path)
+        assert restored.stats().size == 2
+        assert restored.lookup("refund please") == "Refund/Exchange"
+
+        # New additions go after the restored entries rather than over them.
+        restored.add("cancel my subscription", "Support, Feedback, Complaint")
+        assert restored.lookup("where is my order") == "Order Tracking"
+
+    def test_snapshot_for_other_namespace_is_ignored(self, tmp_path):
+        """Test that a snapshot from another model or prompt version is not loaded."""
+        path = str(tmp_path / "index.npz")
+        index = SimilarityIndex(namespace="old-prompt")
+        index.add("refund please", "Refund/Exchange")
+        index.save(path)
+
+        assert SimilarityIndex(namespace="new-prompt", snapshot_path=path).stats().size == 0
+
+    def test_snapshot_written_off_the_caller_thread(self, tmp_path):
+        """Test that add() leaves snapshots to the background thread and close() writes the rest."""
+        path = str(tmp_path / "index.npz")
+        index = SimilarityIndex(namespace="test", snapshot_path=path)
+        index.SNAPSHOT_INTERVAL = 2
+        writers = []
+        saved = threading.Event()
+        original_save = index.save
+
+        def recording_save(path):
+            writers.append(threading.get_ident())
+            original_save(path)
+            saved.set()
+
+        index.save = recording_save
+        index.add("where is my order", "Order Tracking")
+        index.add("refund please", "Refund/Exchange")
+        assert saved.wait(5)
+        index.add("cancel my subscription", "Support, Feedback, Complaint")
+        index.close()
+
+        assert writers[0] != threading.get_ident() and writers[1] == threading.get_ident()
+        assert SimilarityIndex(namespace="test", snapshot_path=path).stats().size == 3
+        index.close()
+        assert len(writers) == 2
+
+
+class TestClassifierSimilarity:
+    """Test class for similarity reuse in MessageClassifier."""
+
+    def test_near_duplicate_skips_llm(self):
+        """Test that a near-duplicate message reuses the stored category."""
+        llm = FakeChatModel()
+        classifier = MessageClassifier(settings=Settings(similarity_cache_enabled=True), llm=llm)
+
+        classifier.classify("where is my order")
+        result = json.loads(classifier.classify("Where's my order??"))
+
+        assert llm.calls == 1
+        assert result == {"message": "Where's my order??", "category": "Order Tracking"}
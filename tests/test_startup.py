@@ -0,0 +1,31 @@
+"""Tests that heavy provider packages load on first use, not at import."""
+
+import subprocess
+import sys
+
+HEAVY_PACKAGES = ["langchain_core", "langchain_aws", "boto3", "numpy"]
+
+
+def loaded_after(code):
+    """Run code in a fresh interpreter and return the heavy packages it loaded."""
+    probe = f"{code}\nimport sys\nprint(','.join(p for p in {HEAVY_PACKAGES!r} if p in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+class TestLazyImports:
+    """Test class for import-time dependencies."""
+
+    def test_classifier_import_is_light(self):
+        """Test that importing the classifier and server modules loads no provider packages."""
+        assert loaded_after("import ai_classifier_sample.service.classifier, ai_classifier_sample.server") == []
+
+    def test_provider_loads_on_first_use(self):
+        """Test that the Bedrock client is only built when the model is first needed."""
+        setup = (
+            "from ai_classifier_sample import MessageClassifier, Settings\n"
+            "classifier = MessageClassifier(settings=Settings(cloud_profile=None))"
+        )
+
+        assert loaded_after(setup) == []
+        assert {"langchain_aws", "boto3"} <= set(loaded_after(setup + "\nclassifier.prompts"))
@@ -0,0 +1,135 @@
+"""Tests for the per-tenant classifier registry."""
+
+import json
+import sqlite3
+
+import pytest
+
+from ai_classifier_sample.config.settings import Settings
+from ai_classifier_sample.providers import FakeChatModel
+from ai_classifier_sample.providers.bedrock import get_client_factory
+from ai_classifier_sample.service.classifier import MessageClassifier
+from ai_classifier_sample.service.tenants import ClassifierRegistry, UnknownTenantError, build_classifier_registry
+
+TENANTS = {"acme": {"max_tokens": 1000}, "globex": {"cloud_region": "eu-west-1"}, "initech": {}}
+
+
+def fake_factory(llm):
+    return lambda settings, sessions: MessageClassifier(settings=settings, llm=llm, sessions=sessions)
+
+
+class TestClassifierRegistry:
+    """Test class for ClassifierRegistry."""
+
+    def test_tenant_settings(self, tmp_path):
+        """Test that tenants get the base settings plus their overrides, and bad tenants are refused."""
+        path = tmp_path / "tenants.json"
+        path.write_text(json.dumps({"tenants": TENANTS}))
+        registry = build_classifier_registry(Settings(tenants_path=str(path), tenant_max_classifiers=2, max_concurrency=7), factory=fake_factory(FakeChatModel()))
+
+        acme = registry.get("acme").settings
+        assert (acme.max_tokens, acme.cloud_region, acme.max_concurrency) == (1000, "us-east-1", 7)
+        assert registry.get("globex").settings.cloud_region == "eu-west-1"
+        assert registry.max_classifiers == 2
+        with pytest.raises(UnknownTenantError):
+            registry.get("hooli")
+        with pytest.raises(ValueError, match="max_tokenz"):
+            ClassifierRegistry(Settings(), {"acme": {"max_tokenz": 10}})
+        assert build_classifier_registry(Settings()) is None
+
+    def test_lru_eviction(self):
+        """Test that the least recently used tenant is evicted, listeners hear of it and it is rebuilt on demand."""
+        registry = ClassifierRegistry(Settings(), TENANTS, max_classifiers=2, factory=fake_factory(FakeChatModel()))
+        evicted = []
+        registry.add_eviction_listener(lambda tenant, classifier: evicted.append((tenant, classifier)))
+
+        acme, globex = registry.get("acme"), registry.get("globex")
+        assert registry.get("acme") is acme
+        registry.get("initech")
+
+        assert evicted == [("globex", globex)]
+        assert list(registry.active()) == ["acme", "initech"]
+        assert registry.get("globex") is not globex
+        assert evicted[-1][0] == "acme"
+
+        stats = {stats.tenant: stats for stats in registry.tenant_stats()}
+        assert (stats["acme"].requests, stats["acme"].builds, stats["acme"].evictions, stats["acme"].active) == (2, 1, 1, False)
+        assert (stats["globex"].requests, stats["globex"].builds, stats["globex"].active) == (2, 2, True)
+        summary = registry.stats()
+        assert (summary.active, summary.tenants, summary.requests, summary.builds, summary.evictions) == (2, 3, 5, 4, 2)
+
+    def test_sessions_survive_eviction(self, tmp_path):
+        """Test that a rebuilt classifier continues the tenant's conversations and the evicted one is closed."""
+        tenants = {"acme": {"result_cache_enabled": True, "result_cache_path": str(tmp_path / "acme.db")}, "globex": {}}
+        registry = ClassifierRegistry(Settings(), tenants, max_classifiers=1, factory=fake_factory(FakeChatModel()))
+        acme = registry.get("acme")
+        acme.classify_conversational("Where is my order?", conversation_id="c1")
+
+        registry.get("globex")
+        rebuilt = registry.get("acme")
+
+        assert rebuilt is not acme and rebuilt.sessions is acme.sessions is registry.sessions("acme")
+        rebuilt.classify_conversational("I want a refund instead", conversation_id="c1")
+        state, version = rebuilt.sessions.load("c1")
+        assert version == 2 and len(state.conversation_history) == 2
+        with pytest.raises(sqlite3.ProgrammingError):
+            acme.result_cache.persistent.get("key")
+        registry.close()
+        assert registry.active() == {}
+
+    def test_leased_classifier_closed_after_release(self, tmp_path):
+        """Test that an evicted classifier stays usable until its last lease ends."""
+        tenants = {"acme": {"result_cache_enabled": True, "result_cache_path": str(tmp_path / "acme.db")}, "globex": {}}
+        registry = ClassifierRegistry(Settings(), tenants, max_classifiers=1, factory=fake_factory(FakeChatModel()))
+
+        with registry.lease("acme") as acme:
+            registry.get("globex")
+            assert registry.try_acquire("acme") is None
+            acme.classify("Where is my order?")
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            acme.result_cache.persistent.get("key")
+        assert registry.stats().requests == 2
+
+    def test_warmup(self):
+        """Test that warmup builds and compiles the first tenants that fit, without counting requests."""
+        registry = ClassifierRegistry(Settings(), TENANTS, max_classifiers=2, factory=fake_factory(FakeChatModel()))
+
+        assert registry.warmup() == ["acme", "globex"]
+
+        assert all(classifier._prompts is not None for classifier in registry.active().values())
+        assert registry.stats().requests == 0
+        assert registry.stats().builds == 2
+        with pytest.raises(UnknownTenantError):
+            registry.warmup(["hooli"])
+
+    def test_matching_configs_share_clients(self):
+        """Test that tenants with the same model and region share one chat model and its compiled prompts, even after eviction."""
+        get_client_factory().clear()
+        tenants = {"acme": {}, "initech": {"rules_enabled": False}, "globex": {"cloud_region": "eu-west-1"}}
+        registry = ClassifierRegistry(Settings(cloud_profile=None), tenants, max_classifiers=1)
+
+        try:
+            acme = registry.get("acme")
+            llm, prompts = acme.llm, acme.prompts
+            initech = registry.get("initech")
+            assert (initech.llm, initech.prompts) == (llm, prompts)
+            assert registry.get("globex").prompts is not prompts
+            rebuilt = registry.get("acme")
+            assert rebuilt is not acme and rebuilt.prompts is prompts
+        finally:
+            get_client_factory().clear()
+
+    def test_metrics_per_tenant(self):
+        """Test that every tenant's metrics are rendered once per family, labeled by tenant."""
+        registry = ClassifierRegistry(Settings(metrics_enabled=True), TENANTS, factory=fake_factory(FakeChatModel()))
+        registry.get("acme").classify("Where is my order?")
+        registry.get("globex").classify("I want a refund")
+
+        text = registry.render_metrics()
+
+        assert text.count("# TYPE ai_classifier_lookups_total counter") == 1
+        assert 'ai_classifier_lookups_total{tenant="acme",source="llm"} 1' in text
+        assert 'ai_classifier_lookups_total{tenant="globex",source="llm"} 1' in text
+        assert 'ai_classifier_tenant_requests_total{tenant="initech"} 0' in text
+        assert "ai_classifier_tenants_active 2" in text